@@ -1,30 +1,41 @@
 import re
+from functools import partial
 import gradio as gr
 from gradio_modal import Modal
 from graph import workflow as rag_workflow
-from config import get_vectorstore
+from config import get_vectorstore, METRICS_PORT
 from core.schemas import RuntimeContext
-from ingestion import load_paper_metadata 
+from core.telemetry import RequestTracer, start_metrics_server
+from core.loop_monitor import ensure_loop_monitor
+from ingestion import load_paper_metadata, metadata_cache
+from ingestion.jobs import job_queue
 from ui import (
-    prepare_dataset_samples,
+    render_inventory,
+    search_papers,
+    change_inventory_page,
     open_paper_detail_from_dataset,
     back_to_main,
     submit_papers,
-    save_paper_notes
+    save_paper_notes,
+    handle_delete_paper,
+    submit_library_job,
+    poll_jobs,
+    INVENTORY_PAGE_SIZE
 )
 
-async def chat_with_agent(message, history, user_id, user_metadata):
+async def chat_with_agent(message, history, user_id):
     """
     The bridge between Gradio and LangGraph.
     """
-    # Runtime context
+    # Runtime context (the user's shared metadata: always the latest library)
     runtime_context = RuntimeContext(
         user_id=user_id,
         vectorstore=await get_vectorstore(),
-        metadata=user_metadata,
+        metadata=await load_paper_metadata(user_id),
     )
-    # Config for LangGraph (Thread isolation)
-    config = {"configurable": {"thread_id": user_id}}
+    # Config for LangGraph (Thread isolation) + per-request tracing
+    tracer = RequestTracer(user_id=user_id, thread_id=user_id)
+    config = {"configurable": {"thread_id": user_id}, "callbacks": [tracer]}
     
     inputs = {"messages": [("user", message)]}
     
@@ -43,9 +54,10 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
     
     # Session States
     user_id = gr.State() 
-    user_metadata = gr.State({})
-    paper_ids_state = gr.State(value=[])
+    paper_ids_state = gr.State(value=[]) # paper ids of the displayed inventory page
+    inventory_page = gr.State(value=0)
     current_selection = gr.State(value='main_chat')
+    metadata_version = gr.State(value=-1) # library version shown in the sidebar
 
     # ------------------- Main Chat -------------------
     with gr.Column(scale=2) as main_chat:
@@ -55,7 +67,7 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
         generalchat = gr.ChatInterface(
             chat_with_agent, 
             chatbot=chatbot, 
-            additional_inputs=[user_id, user_metadata]
+            additional_inputs=[user_id]
             ).queue()
 
     # ------------------- Paper Detail View -------------------
@@ -64,6 +76,8 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
             back_button = gr.Button("← Back to Chat")
             with gr.Column(scale=10, min_width=0):
                 paper_title = gr.Markdown("## Paper Title")
+            delete_paper_btn = gr.Button("🗑️ Delete paper", variant="stop")
+        delete_feedback = gr.Markdown()
         
         with gr.Tabs():
             with gr.TabItem("Read"):
@@ -78,10 +92,16 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
         
             save_notes_btn.click(
             fn=save_paper_notes,
-            inputs=[user_id, user_metadata, current_selection, paper_notes],  
+            inputs=[user_id, current_selection, paper_notes],  
             outputs=[feedback_markdown_for_notes]
             )
 
+        delete_paper_btn.click(
+            fn=handle_delete_paper,
+            inputs=[user_id, current_selection],
+            outputs=[delete_feedback, current_selection, main_chat, paper_detail]
+        )
+
         back_button.click(
             fn=back_to_main,
             outputs=[current_selection, main_chat, paper_detail, paper_title, paper_content, paper_chatbot, paper_notes]
@@ -92,21 +112,47 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
         gr.Markdown("## Research Papers")
         search_box = gr.Textbox(label="Search papers", placeholder="Search...")
         
-        # Use Dataset for clickable paper list
+        # Use Dataset for clickable paper list (one server-side page at a time)
         papers_dataset = gr.Dataset(
             components=[gr.Textbox(visible=False)],
             samples=[["Loading papers..."]],  # Placeholder
             label="Click a paper to view",
-            samples_per_page=10
+            samples_per_page=INVENTORY_PAGE_SIZE
+        )
+        with gr.Row():
+            prev_page_btn = gr.Button("◀", size="sm", min_width=0)
+            page_label = gr.Markdown("")
+            next_page_btn = gr.Button("▶", size="sm", min_width=0)
+
+        inventory_outputs = [papers_dataset, paper_ids_state, inventory_page, page_label]
+        search_box.change(
+            fn=search_papers,
+            inputs=[user_id, search_box],
+            outputs=inventory_outputs,
+            trigger_mode="always_last",
+            show_progress="hidden"
+        )
+        prev_page_btn.click(
+            fn=partial(change_inventory_page, step=-1),
+            inputs=[user_id, search_box, inventory_page],
+            outputs=inventory_outputs,
+            show_progress="hidden"
+        )
+        next_page_btn.click(
+            fn=partial(change_inventory_page, step=1),
+            inputs=[user_id, search_box, inventory_page],
+            outputs=inventory_outputs,
+            show_progress="hidden"
         )
         
         # Handle dataset clicks
         papers_dataset.select(
             fn=open_paper_detail_from_dataset,
-            inputs=[user_metadata, paper_ids_state],
+            inputs=[user_id, paper_ids_state],
             outputs=[current_selection, main_chat, paper_detail, paper_title, paper_content, paper_chatbot, paper_notes]
         )
 
+        job_status = gr.Markdown("")
         add_papers_button = gr.Button("+ Add Papers")
         with Modal(visible=False) as add_paper_modal:
             gr.Markdown("### Add new papers")
@@ -120,32 +166,74 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
             
             submit_btn.click(
                 fn=submit_papers,
-                inputs=[user_id, user_metadata, arxiv_ids_input],
-                outputs=[feedback_markdown, arxiv_ids_input, papers_dataset, paper_ids_state, user_metadata]
+                inputs=[user_id, arxiv_ids_input],
+                outputs=[feedback_markdown, arxiv_ids_input, papers_dataset, paper_ids_state]
             )
             
             add_papers_button.click(
                 fn=lambda: (gr.update(visible=True), "", ""),
                 outputs=[add_paper_modal, arxiv_ids_input, feedback_markdown]
             )
+
+        manage_library_button = gr.Button("Manage Library")
+        with Modal(visible=False) as manage_library_modal:
+            gr.Markdown("### Manage your library")
+            library_ids_input = gr.Textbox(
+                label="ArXiv IDs",
+                placeholder="One per line or comma-separated (not needed to clear the library)",
+                lines=3
+            )
+            target_user_input = gr.Textbox(label="Target user (move / copy)")
+            library_feedback = gr.Markdown("")
+            with gr.Row():
+                bulk_delete_btn = gr.Button("Delete", variant="stop")
+                clear_library_btn = gr.Button("Clear library", variant="stop")
+                move_btn = gr.Button("Move")
+                copy_btn = gr.Button("Copy")
+
+            for button, action in ((bulk_delete_btn, "delete"), (clear_library_btn, "clear"), (move_btn, "move"), (copy_btn, "copy")):
+                button.click(
+                    fn=partial(submit_library_job, action=action),
+                    inputs=[user_id, library_ids_input, target_user_input],
+                    outputs=[library_feedback]
+                )
+
+            manage_library_button.click(
+                fn=lambda: (gr.update(visible=True), ""),
+                outputs=[manage_library_modal, library_feedback]
+            )
     
+    # ------------------- Background job progress -------------------
+    job_timer = gr.Timer(1.0)
+    job_timer.tick(
+        fn=poll_jobs,
+        inputs=[user_id, metadata_version, search_box, inventory_page],
+        outputs=[job_status, papers_dataset, paper_ids_state, inventory_page, page_label, metadata_version],
+        show_progress="hidden"
+    )
+
     # ------------------- Load papers on startup -------------------
     async def on_start():
         """Load papers when the app starts/refreshes"""
+        ensure_loop_monitor()
+        await job_queue.start()
         
         active_id = "demo_user" #TODO Get from request.username or login (in production) 
         
-        # JSON metadata for the user
+        # Shared metadata of the user (read from disk only on the first session)
         meta = await load_paper_metadata(active_id) 
-        # Paper inventory display 
-        samples, ids = prepare_dataset_samples(meta)
+        # Paper inventory display (first page of the user's inventory index)
+        dataset, ids, page, label = render_inventory(active_id, meta)
         
-        return active_id, meta, gr.update(samples=samples if samples else [["No papers yet"]]), ids
+        return active_id, dataset, ids, page, label, metadata_cache.version(active_id)
     
     # Trigger on demo load
     demo.load(
         fn=on_start,
-        outputs=[user_id, user_metadata, papers_dataset, paper_ids_state]
+        outputs=[user_id, papers_dataset, paper_ids_state, inventory_page, page_label, metadata_version]
     )
 
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
 demo.launch()
\ No newline at end of file
@@ -0,0 +1,6 @@
+from .stats import percentile, summarize
+
+__all__ = [
+    "percentile",
+    "summarize"
+]
@@ -0,0 +1,175 @@
+"""
+Benchmark of the query-analysis stage: the `summarize_conv -> analyze_query`
+chain versus the fused `summarize_and_analyze` node (`FUSED_ANALYSIS=true`).
+
+Both variants run on the same labelled conversations. The report covers latency,
+LLM calls, prompt/completion tokens and routing accuracy (clarify / casual / research,
+plus paper scope) per turn.
+
+    cd src && python -m benchmarks.analysis --repeat 20 --llm-latency-ms 300
+
+Offline, the scripted chat model makes routing identical for both variants, so only
+latency and tokens are meaningful. `--live` uses the configured NVIDIA `llm` (needs
+the real credentials) to also measure routing accuracy.
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, Optional
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.runtime import Runtime
+from core.schemas import RuntimeContext
+from core.tokens import count_tokens
+from benchmarks.stats import summarize
+
+@dataclass
+class LabelledTurn:
+    history: List[Tuple[str, str]]  # (role, text) pairs before the question
+    question: str
+    route: str                      # expected "clarify", "casual" or "research"
+    paper_scope: Optional[str] = None
+
+RESEARCH_HISTORY = [
+    ("user", "What does the paper 1706.03762 propose?"),
+    ("assistant", "It proposes the Transformer, an encoder-decoder built only on attention [1]."),
+    ("user", "How is it trained?"),
+    ("assistant", "It is trained on WMT 2014 translation data with Adam and a warmup schedule [2]."),
+]
+CASUAL_HISTORY = [
+    ("user", "hi!"),
+    ("assistant", "Hello! How can I help with your papers today?"),
+]
+
+LABELLED_TURNS = [
+    LabelledTurn([], "hello there", "casual"),
+    LabelledTurn([], "What does 2305.10403 propose for retrieval?", "research", "single"),
+    LabelledTurn([], "How do recent papers use diffusion for robotics?", "research", "multiple"),
+    LabelledTurn([], "Compare the attention mechanisms of my papers on vision transformers", "research", "multiple"),
+    LabelledTurn(CASUAL_HISTORY, "thanks, that helps", "casual"),
+    LabelledTurn(CASUAL_HISTORY, "Which papers in my library discuss contrastive pretraining?", "research", "multiple"),
+    LabelledTurn(RESEARCH_HISTORY, "What are its main limitations?", "research", "single"),
+    LabelledTurn(RESEARCH_HISTORY, "Which optimizer did they use?", "research", "single"),
+    LabelledTurn(RESEARCH_HISTORY, "How does that compare to papers on sparse attention?", "research", "multiple"),
+    LabelledTurn(RESEARCH_HISTORY, "great, thank you!", "casual"),
+    LabelledTurn(RESEARCH_HISTORY, "and the other one?", "clarify"),
+]
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+    return str(prompt)
+
+class CountingModel:
+    """Wraps the model behind a gateway role and counts calls and tokens."""
+    def __init__(self, inner: Any):
+        self.inner = inner
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._parent: Optional["CountingModel"] = None
+
+    def with_structured_output(self, schema, **kwargs) -> "CountingModel":
+        child = CountingModel(self.inner.with_structured_output(schema, **kwargs))
+        child._parent = self
+        return child
+
+    def _root(self) -> "CountingModel":
+        return self._parent or self
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        result = await self.inner.ainvoke(prompt, *args, **kwargs)
+        root = self._root()
+        root.calls += 1
+        root.prompt_tokens += count_tokens(_prompt_text(prompt))
+        output = result.model_dump_json() if hasattr(result, "model_dump_json") else str(getattr(result, "content", result))
+        root.completion_tokens += count_tokens(output)
+        return result
+
+    def reset(self) -> None:
+        self.calls = self.prompt_tokens = self.completion_tokens = 0
+
+def _route(update: Dict[str, Any]) -> str:
+    if not update.get("questionIsClear", True):
+        return "clarify"
+    return update.get("intent", "research")
+
+async def run_variant(name: str, stages: List[Any], turns: List[LabelledTurn], repeat: int, counter: CountingModel) -> Dict[str, Any]:
+    latencies = []
+    correct_route = correct_scope = scoped = 0
+    counter.reset()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for turn in turns:
+            messages = [HumanMessage(content=t) if role == "user" else AIMessage(content=t) for role, t in turn.history]
+            state: Dict[str, Any] = {"messages": messages + [HumanMessage(content=turn.question)], "conversationSummary": ""}
+            runtime = Runtime(context=RuntimeContext(user_id=f"bench-{name}", vectorstore=None, metadata={}))
+            t0 = time.perf_counter()
+            for stage in stages:
+                state.update(await stage(state, runtime))
+            latencies.append(time.perf_counter() - t0)
+            correct_route += _route(state) == turn.route
+            if turn.paper_scope and _route(state) == "research":
+                scoped += 1
+                correct_scope += state.get("paperScope") == turn.paper_scope
+    count = len(latencies) or 1
+    stats = summarize(latencies, time.perf_counter() - start)
+    stats.update({
+        "variant": name,
+        "llm_calls_per_turn": counter.calls / count,
+        "prompt_tokens_per_turn": counter.prompt_tokens / count,
+        "completion_tokens_per_turn": counter.completion_tokens / count,
+        "route_accuracy": correct_route / count,
+        "scope_accuracy": correct_scope / scoped if scoped else 0.0,
+    })
+    return stats
+
+async def run_benchmark(repeat: int, live: bool, llm_latency: float) -> List[Dict[str, Any]]:
+    if not live:
+        from benchmarks.harness import OfflineSettings, install_fakes
+        install_fakes(OfflineSettings(llm_latency=llm_latency))
+    # Imported after the harness so config.py sees the offline credentials
+    import config
+    from rag import summarize_conversation_history, analyze_query, summarize_and_analyze
+
+    counter = CountingModel(config.gateway.model("llm"))
+    config.gateway.register("llm", counter)
+    variants = {
+        "chain": [summarize_conversation_history, analyze_query],
+        "fused": [summarize_and_analyze],
+    }
+    return [await run_variant(name, stages, LABELLED_TURNS, repeat, counter) for name, stages in variants.items()]
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'variant':>8} | {'p50 ms':>8} {'p99 ms':>8} | {'calls':>6} {'prompt tok':>10} {'compl tok':>9} | "
+        f"{'route acc':>9} {'scope acc':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['variant']:>8} | {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} | {r['llm_calls_per_turn']:>6.2f} "
+            f"{r['prompt_tokens_per_turn']:>10.0f} {r['completion_tokens_per_turn']:>9.0f} | "
+            f"{r['route_accuracy']:>9.1%} {r['scope_accuracy']:>9.1%}"
+        )
+    return "\n".join(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Two-node vs fused query analysis benchmark.")
+    parser.add_argument("--repeat", type=int, default=10, help="passes over the labelled conversations")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="simulated llm latency (offline only)")
+    parser.add_argument("--live", action="store_true", help="call the configured NVIDIA llm instead of the scripted model")
+    parser.add_argument("--json", dest="json_path", help="also write raw results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = asyncio.run(run_benchmark(args.repeat, args.live, args.llm_latency_ms / 1000))
+    print(format_report(results))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import re
+import math
+import random
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Optional, Type
+from pydantic import BaseModel
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage
+from core.schemas import QueryAnalysis, DocRelevance, CollectiveAudit, MetadataHints
+
+CASUAL_PATTERN = re.compile(r"^\s*(hi|hello|hey|thanks|thank you|bye|good (morning|evening))\b", re.IGNORECASE)
+ARXIV_ID_PATTERN = re.compile(r"\d{4}\.\d{4,5}")
+
+VOCABULARY = [
+    "transformer", "attention", "diffusion", "retrieval", "reinforcement", "policy", "gradient",
+    "embedding", "contrastive", "graph", "convolution", "benchmark", "dataset", "alignment",
+    "reasoning", "distillation", "quantization", "sparsity", "robotics", "vision", "language",
+    "tokenizer", "optimizer", "pretraining", "finetuning", "evaluation", "latency", "memory",
+]
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.md5(text.encode()).hexdigest(), 16)
+
+def _as_text(messages: Any) -> str:
+    """Flatten a prompt (string, message list or tuples) into plain text."""
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for msg in messages:
+        if isinstance(msg, BaseMessage):
+            parts.append(str(msg.content))
+        elif isinstance(msg, tuple):
+            parts.append(str(msg[-1]))
+        else:
+            parts.append(str(msg))
+    return "\n".join(parts)
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embedder (signed feature hashing, L2-normalized)."""
+    def __init__(self, dim: int = 384, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def _vector(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for token in re.findall(r"\w+", text.lower()):
+            h = _stable_int(token)
+            vec[h % self.dim] += 1.0 if (h >> 64) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.embed_query(text)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        # A batched request costs one round trip, like the real endpoint
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+class ScriptedChatModel:
+    """
+    Stand-in for ChatNVIDIA: returns deterministic, schema-valid outputs after
+    a configurable latency. Only the surface used by the RAG nodes is provided.
+    """
+    def __init__(self, role: str, latency: float = 0.0, audit_fail_rate: float = 0.0, irrelevant_rate: float = 0.0):
+        self.role = role
+        self.latency = latency
+        self.audit_fail_rate = audit_fail_rate
+        self.irrelevant_rate = irrelevant_rate
+        self.calls = 0
+
+    def with_config(self, *args, **kwargs) -> "ScriptedChatModel":
+        return self
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs) -> "_StructuredScript":
+        return _StructuredScript(self, schema)
+
+    async def _wait(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def ainvoke(self, messages: Any, *args, **kwargs) -> AIMessage:
+        await self._wait()
+        prompt = _as_text(messages)
+        question = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+        if "<context>" in prompt:
+            content = (
+                "<thinking>I will use [1] to answer.</thinking>\n"
+                f"<answer>Scripted answer to: {question} [1]</answer>"
+            )
+        else:
+            content = f"Scripted reply to: {question}"
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": _approx_tokens(prompt),
+                "output_tokens": _approx_tokens(content),
+                "total_tokens": _approx_tokens(prompt) + _approx_tokens(content),
+            },
+        )
+
+    def respond(self, schema: Type[BaseModel], prompt: str) -> BaseModel:
+        if schema is QueryAnalysis or issubclass(schema, QueryAnalysis):
+            return self._analysis(schema, prompt)
+        if schema is DocRelevance:
+            irrelevant = (_stable_int(prompt) % 1000) / 1000 < self.irrelevant_rate
+            return DocRelevance(
+                grade="completely irrelevant" if irrelevant else "relevant",
+                reasoning="scripted",
+            )
+        if schema is CollectiveAudit:
+            failed = (_stable_int(prompt) % 1000) / 1000 < self.audit_fail_rate
+            return CollectiveAudit(
+                relevance_passed=not failed,
+                unanswered_aspect="What do recent web sources say about this?" if failed else None,
+            )
+        raise ValueError(f"No script for schema {schema.__name__}")
+
+    def _analysis(self, schema: Type[BaseModel], prompt: str) -> BaseModel:
+        question = prompt.split("User question:")[-1].strip()
+        casual = bool(CASUAL_PATTERN.match(question))
+        topics = [w for w in VOCABULARY if w in question.lower()][:3]
+        fields: Dict[str, Any] = dict(
+            intent="casual" if casual else "research",
+            is_clear=True,
+            rewrittenQuestion=question,
+            paperScope="single" if ARXIV_ID_PATTERN.search(question) else "multiple",
+            clarification_needed="",
+            metadataHints=MetadataHints(topics=topics),
+        )
+        if "updatedSummary" in schema.model_fields:
+            fields["updatedSummary"] = f"The user asked about {', '.join(topics) or 'general matters'}."
+        return schema(**fields)
+
+class _StructuredScript:
+    def __init__(self, model: ScriptedChatModel, schema: Type[BaseModel]):
+        self.model = model
+        self.schema = schema
+
+    def with_config(self, *args, **kwargs) -> "_StructuredScript":
+        return self
+
+    async def ainvoke(self, messages: Any, *args, **kwargs) -> BaseModel:
+        await self.model._wait()
+        return self.model.respond(self.schema, _as_text(messages))
+
+class FakeTavilyClient:
+    """Stand-in for AsyncTavilyClient.search."""
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def search(self, query: str, search_depth: str = "basic", max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "url": f"https://example.org/{_stable_int(query + str(i)) % 10**8}",
+                    "title": f"Web result {i + 1}",
+                    "content": f"Offline web snippet {i + 1} about {query}",
+                }
+                for i in range(max_results)
+            ],
+        }
+
+def synthetic_paper(arxiv_id: str, pages: int = 12) -> Document:
+    """Deterministic fake paper: sectioned prose followed by a bibliography."""
+    rng = random.Random(arxiv_id)
+    topics = rng.sample(VOCABULARY, 4)
+
+    def paragraph() -> str:
+        words = [rng.choice(VOCABULARY if rng.random() < 0.3 else topics) for _ in range(rng.randint(60, 120))]
+        return " ".join(words).capitalize() + "."
+
+    sections = ["Abstract", "1 Introduction", "2 Related Work", "3 Method", "4 Experiments", "5 Conclusion"]
+    body = []
+    paragraphs_per_section = max(1, pages * 3 // len(sections))
+    for name in sections:
+        body.append(name)
+        body.extend(paragraph() for _ in range(paragraphs_per_section))
+    body.append("References")
+    body.extend(f"[{i}] A. Author. A paper about {rng.choice(VOCABULARY)}. 20{rng.randint(10, 24)}." for i in range(1, 30))
+    return Document(
+        page_content="\n\n".join(body),
+        metadata={
+            "Title": f"On {topics[0].capitalize()} and {topics[1].capitalize()} ({arxiv_id})",
+            "Authors": f"Author {topics[2].capitalize()}, Author {topics[3].capitalize()}",
+            "Published": f"20{rng.randint(15, 25)}-01-01",
+            "Summary": f"We study {topics[0]} {topics[1]} with {topics[2]} and {topics[3]}.",
+        },
+    )
+
+class FakeArxivLoader:
+    """Stand-in for ArxivLoader producing synthetic papers without network."""
+    pages = 12
+    latency = 0.0
+
+    def __init__(self, query: str, **kwargs):
+        self.query = query
+
+    def load(self) -> List[Document]:
+        return [synthetic_paper(self.query, self.pages)]
+
+    async def aload(self) -> List[Document]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.load()
+
+def paper_ids(n: int, offset: int = 0) -> List[str]:
+    """Generate n well-formed arXiv identifiers."""
+    return [f"2401.{offset + i:05d}" for i in range(n)]
+
+def sample_questions(metadata: Dict[str, Any], n: int, seed: int = 0) -> List[str]:
+    """Mixed casual / research / explicit-ID questions over a fake library."""
+    rng = random.Random(seed)
+    ids = list(metadata)
+    questions = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0 or not ids:
+            questions.append(rng.choice(["hi there!", "thanks a lot", "hello, who are you?"]))
+        elif kind == 1:
+            questions.append(f"What method does {rng.choice(ids)} propose?")
+        else:
+            words = rng.sample(VOCABULARY, 2)
+            questions.append(f"How do papers use {words[0]} for {words[1]}?")
+    return questions
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import importlib
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional
+
+# config.py builds remote clients at import time: give them inert credentials
+for _var, _value in {
+    "NVIDIA_API_KEY": "offline",
+    "TAVILY_API_KEY": "offline",
+    "EMBEDDING_MODEL": "nvidia/nv-embed-v1",
+}.items():
+    os.environ.setdefault(_var, _value)
+
+import config
+from langchain_core.embeddings import Embeddings
+from core.telemetry import InstrumentedEmbeddings
+from core.embedding_batcher import BatchingEmbeddings
+from qdrant_client import AsyncQdrantClient, models
+from langchain_qdrant import QdrantVectorStore
+from benchmarks.fakes import HashingEmbeddings, ScriptedChatModel, FakeTavilyClient, FakeArxivLoader
+
+BENCH_COLLECTION = "ArXivHub_bench"
+
+@dataclass
+class OfflineSettings:
+    """Latencies are in seconds and applied per call."""
+    embedding_dim: int = 384
+    embedding_latency: float = 0.0
+    llm_latency: float = 0.0
+    research_llm_latency: float = 0.0
+    tavily_latency: float = 0.0
+    arxiv_latency: float = 0.0
+    paper_pages: int = 12
+    audit_fail_rate: float = 0.2
+    irrelevant_rate: float = 0.1
+    qdrant_location: str = ":memory:"  # or a directory for on-disk local mode
+    data_dir: Optional[Path] = None
+
+@dataclass
+class OfflineEnvironment:
+    settings: OfflineSettings
+    embedder: Embeddings
+    llm: ScriptedChatModel
+    research_llm: ScriptedChatModel
+    tavily: FakeTavilyClient
+    qdrant_client: AsyncQdrantClient
+    data_dir: Path
+    vectorstore: Optional[QdrantVectorStore] = field(default=None)
+
+def _rebind(module_name: str, **attributes) -> None:
+    module = importlib.import_module(module_name)
+    for name, value in attributes.items():
+        if hasattr(module, name):
+            setattr(module, name, value)
+
+def install_fakes(settings: Optional[OfflineSettings] = None) -> OfflineEnvironment:
+    """
+    Swap every remote dependency of config.py (NVIDIA, Qdrant, Tavily, arXiv)
+    for a deterministic local stand-in. Must run before the graph executes.
+    """
+    settings = settings or OfflineSettings()
+    data_dir = settings.data_dir or Path(tempfile.mkdtemp(prefix="arxivhub_bench_"))
+    env = OfflineEnvironment(
+        settings=settings,
+        # Same wrapping as config.embedder (micro-batching + metrics)
+        embedder=BatchingEmbeddings(
+            InstrumentedEmbeddings(HashingEmbeddings(settings.embedding_dim, settings.embedding_latency)),
+            max_batch=config.EMBED_MAX_BATCH, max_wait_ms=config.EMBED_MAX_WAIT_MS, cache_size=config.EMBED_QUERY_CACHE_SIZE,
+        ),
+        llm=ScriptedChatModel(
+            "llm", settings.llm_latency,
+            audit_fail_rate=settings.audit_fail_rate, irrelevant_rate=settings.irrelevant_rate,
+        ),
+        research_llm=ScriptedChatModel("research_llm", settings.research_llm_latency),
+        tavily=FakeTavilyClient(settings.tavily_latency),
+        qdrant_client=AsyncQdrantClient(location=settings.qdrant_location),
+        data_dir=data_dir,
+    )
+    FakeArxivLoader.pages = settings.paper_pages
+    FakeArxivLoader.latency = settings.arxiv_latency
+
+    _rebind(
+        "config",
+        embedder=env.embedder, llm=env.llm, research_llm=env.research_llm,
+        tavily=env.tavily, qdrant_client=env.qdrant_client,
+        COLLECTION_NAME=BENCH_COLLECTION, BASE_USER_DATA_DIR=data_dir,
+    )
+    # Nodes reach the LLMs through the gateway: swap its models, keep its limits
+    config.gateway.register("llm", env.llm)
+    config.gateway.register("research_llm", env.research_llm)
+    _rebind("ingestion.paperingestion", ArxivLoader=FakeArxivLoader, BASE_USER_DATA_DIR=data_dir)
+    _rebind("rag.tavily_search", tavily=env.tavily)
+    return env
+
+async def prepare_collection(env: OfflineEnvironment) -> QdrantVectorStore:
+    """Create the benchmark collection (idempotent) and return a vectorstore on it."""
+    if not await env.qdrant_client.collection_exists(BENCH_COLLECTION):
+        await env.qdrant_client.create_collection(
+            collection_name=BENCH_COLLECTION,
+            vectors_config=models.VectorParams(size=env.settings.embedding_dim, distance=models.Distance.COSINE),
+        )
+    env.vectorstore = await config.get_vectorstore()
+    return env.vectorstore
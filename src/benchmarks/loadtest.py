@@ -0,0 +1,194 @@
+"""
+Load test: many concurrent users chatting on one event loop.
+
+Every simulated user has its own library, metadata dict and conversation
+threads, and sends a mix of casual, research and follow-up messages through
+`workflow.astream`. Remote services are replaced by the offline stand-ins
+(with configurable latency) so the report reflects our own event-loop usage.
+
+    cd src && python -m benchmarks.loadtest --users 200 --turns-per-user 5 --llm-latency-ms 200
+"""
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import resource
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+from benchmarks.harness import OfflineEnvironment, OfflineSettings, install_fakes, prepare_collection
+# Imported after the harness so config.py sees the offline credentials
+from graph import workflow, checkpointer
+from core.schemas import RuntimeContext
+from core.loop_monitor import ensure_loop_monitor
+from ingestion import ingest_papers, load_paper_metadata
+from benchmarks.fakes import paper_ids, VOCABULARY
+from benchmarks.stats import percentile, summarize
+
+FOLLOW_UPS = [
+    "What are its main limitations?",
+    "Can you elaborate on the evaluation?",
+    "How does that compare to the previous approach?",
+]
+CASUAL = ["hi!", "thanks, that helps", "hello, what can you do?"]
+
+@dataclass
+class TurnRecord:
+    user_id: str
+    kind: str
+    latency: float
+
+@dataclass
+class LoopLagSampler:
+    """Measures how late a periodic timer fires: a proxy for blocking work on the loop."""
+    interval: float = 0.01
+    samples: List[float] = field(default_factory=list)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+def checkpointer_footprint(saver) -> Dict[str, int]:
+    """Serialized bytes and checkpoint count held by an InMemorySaver."""
+    total = 0
+    stack = [getattr(saver, name, {}) for name in ("storage", "writes", "blobs")]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (bytes, bytearray)):
+            total += len(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    checkpoints = sum(len(ns) for thread in getattr(saver, "storage", {}).values() for ns in thread.values())
+    return {"bytes": total, "checkpoints": checkpoints}
+
+def next_message(rng: random.Random, metadata: Dict[str, Any], turn: int) -> tuple:
+    """Pick the next message and its traffic class."""
+    roll = rng.random()
+    if turn > 0 and roll < 0.3:
+        return "follow_up", rng.choice(FOLLOW_UPS)
+    if roll < 0.5:
+        return "casual", rng.choice(CASUAL)
+    if roll < 0.7 and metadata:
+        return "research", f"Summarize the contributions of {rng.choice(list(metadata))}"
+    words = rng.sample(VOCABULARY, 2)
+    return "research", f"Which papers combine {words[0]} and {words[1]}?"
+
+async def prepare_users(env: OfflineEnvironment, n_users: int, papers_per_user: int) -> Dict[str, Dict[str, Any]]:
+    libraries = {}
+    for u in range(n_users):
+        user_id = f"load_user_{u}"
+        metadata = await load_paper_metadata(user_id)
+        await ingest_papers(user_id, metadata, env.vectorstore, paper_ids(papers_per_user, offset=u * papers_per_user))
+        libraries[user_id] = metadata
+    return libraries
+
+async def simulate_user(env: OfflineEnvironment, user_id: str, metadata: Dict[str, Any], turns: int,
+                        think_time: float, seed: int, records: List[TurnRecord]) -> None:
+    rng = random.Random(seed)
+    thread_id = f"{user_id}-thread"
+    await asyncio.sleep(rng.random() * think_time)  # stagger arrivals
+    for turn in range(turns):
+        kind, message = next_message(rng, metadata, turn)
+        context = RuntimeContext(user_id=user_id, vectorstore=env.vectorstore, metadata=metadata)
+        config = {"configurable": {"thread_id": thread_id}}
+        t0 = time.perf_counter()
+        async for _ in workflow.astream({"messages": [("user", message)]}, config=config, context=context):
+            pass
+        records.append(TurnRecord(user_id, kind, time.perf_counter() - t0))
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+async def run_load(settings: OfflineSettings, n_users: int, turns_per_user: int,
+                   papers_per_user: int, think_time: float) -> Dict[str, Any]:
+    env = install_fakes(settings)
+    await prepare_collection(env)
+    libraries = await prepare_users(env, n_users, papers_per_user)
+
+    records: List[TurnRecord] = []
+    ensure_loop_monitor()  # logs the coroutine behind any stall
+    sampler = LoopLagSampler()
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(sampler.run(stop))
+    footprint_before = checkpointer_footprint(checkpointer)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        simulate_user(env, user_id, metadata, turns_per_user, think_time, seed, records)
+        for seed, (user_id, metadata) in enumerate(libraries.items())
+    ])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler_task
+
+    footprint_after = checkpointer_footprint(checkpointer)
+    by_kind = {}
+    for kind in sorted({r.kind for r in records}):
+        by_kind[kind] = summarize([r.latency for r in records if r.kind == kind], elapsed)
+    return {
+        "users": n_users,
+        "turns": summarize([r.latency for r in records], elapsed),
+        "by_kind": by_kind,
+        "loop_lag_ms": {
+            "p50": 1000 * percentile(sampler.samples, 50),
+            "p99": 1000 * percentile(sampler.samples, 99),
+            "max": 1000 * max(sampler.samples, default=0.0),
+        },
+        "checkpointer": {
+            "bytes_before": footprint_before["bytes"],
+            "bytes_after": footprint_after["bytes"],
+            "bytes_per_turn": (footprint_after["bytes"] - footprint_before["bytes"]) / max(1, len(records)),
+            "checkpoints": footprint_after["checkpoints"],
+        },
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    turns, lag, ckpt = report["turns"], report["loop_lag_ms"], report["checkpointer"]
+    lines = [
+        f"users: {report['users']}  turns: {turns['count']}  throughput: {turns['throughput']:.2f} turns/s",
+        f"latency ms  p50: {turns['p50_ms']:.1f}  p99: {turns['p99_ms']:.1f}  mean: {turns['mean_ms']:.1f}",
+    ]
+    for kind, stats in report["by_kind"].items():
+        lines.append(f"  {kind:<10} n={stats['count']:<5} p50: {stats['p50_ms']:.1f}  p99: {stats['p99_ms']:.1f}")
+    lines.append(f"event-loop lag ms  p50: {lag['p50']:.2f}  p99: {lag['p99']:.2f}  max: {lag['max']:.2f}")
+    lines.append(
+        f"checkpointer  {ckpt['bytes_before'] / 1e6:.2f} MB -> {ckpt['bytes_after'] / 1e6:.2f} MB "
+        f"({ckpt['bytes_per_turn'] / 1e3:.1f} kB/turn, {ckpt['checkpoints']} checkpoints)"
+    )
+    lines.append(f"peak RSS: {report['peak_rss_mb']:.0f} MB")
+    return "\n".join(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent multi-user chat load test (offline).")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns-per-user", type=int, default=5)
+    parser.add_argument("--papers-per-user", type=int, default=3)
+    parser.add_argument("--think-time-ms", type=float, default=500.0, help="mean pause between a user's turns")
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0)
+    parser.add_argument("--research-llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--tavily-latency-ms", type=float, default=300.0)
+    parser.add_argument("--json", dest="json_path", help="also write the raw report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    settings = OfflineSettings(
+        llm_latency=args.llm_latency_ms / 1000,
+        research_llm_latency=args.research_llm_latency_ms / 1000,
+        embedding_latency=args.embedding_latency_ms / 1000,
+        tavily_latency=args.tavily_latency_ms / 1000,
+    )
+    report = asyncio.run(run_load(settings, args.users, args.turns_per_user, args.papers_per_user, args.think_time_ms / 1000))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Offline benchmark of paper ingestion and chat turns.
+
+Runs the real `ingest_papers` and LangGraph `workflow` against local stand-ins
+for NVIDIA, Qdrant, Tavily and arXiv, so results only reflect our own code
+plus the simulated service latencies.
+
+    cd src && python -m benchmarks.run --library-sizes 10 50 200 --turns 100
+
+`--retrieval both` runs the chat turns with fixed and adaptive retrieval budgets
+and reports the context tokens retrieved and prompt tokens sent to the LLMs per turn.
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import List, Dict, Any, Tuple
+from benchmarks.harness import OfflineEnvironment, OfflineSettings, install_fakes, prepare_collection
+# Imported after the harness so config.py sees the offline credentials
+from graph import workflow
+from core.schemas import RuntimeContext, DEFAULT_RETRIEVAL_SETTINGS
+from core.telemetry import RequestTracer
+from ingestion import ingest_papers, load_paper_metadata
+from benchmarks.fakes import paper_ids, sample_questions
+from benchmarks.stats import summarize
+
+CONVERSATIONS_PER_USER = 4
+
+async def bench_ingestion(env: OfflineEnvironment, user_id: str, arxiv_ids: List[str]) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """Ingest papers one call at a time and time each call."""
+    metadata = await load_paper_metadata(user_id)
+    latencies = []
+    start = time.perf_counter()
+    for arxiv_id in arxiv_ids:
+        t0 = time.perf_counter()
+        result = await ingest_papers(user_id, metadata, env.vectorstore, [arxiv_id])
+        latencies.append(time.perf_counter() - t0)
+        if result["failed"]:
+            raise RuntimeError(f"Benchmark ingestion failed: {result['failed']}")
+    return summarize(latencies, time.perf_counter() - start), metadata
+
+async def run_turn(env: OfflineEnvironment, user_id: str, thread_id: str, metadata: Dict[str, Any], question: str,
+                   adaptive: bool = True) -> Tuple[float, RequestTracer]:
+    """Drive one chat turn through the graph; returns its wall time and trace."""
+    settings = {**DEFAULT_RETRIEVAL_SETTINGS, "adaptive_retrieval": adaptive}
+    context = RuntimeContext(user_id=user_id, vectorstore=env.vectorstore, metadata=metadata, settings=settings)
+    tracer = RequestTracer(user_id=user_id, thread_id=thread_id)
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [tracer]}
+    t0 = time.perf_counter()
+    async for _ in workflow.astream({"messages": [("user", question)]}, config=config, context=context):
+        pass
+    return time.perf_counter() - t0, tracer
+
+async def bench_chat(env: OfflineEnvironment, user_id: str, metadata: Dict[str, Any], turns: int, adaptive: bool = True) -> Dict[str, float]:
+    """Sequential chat turns rotating over a few conversations (so follow-ups get summarized)."""
+    latencies = []
+    totals = {"context_tokens": 0.0, "prompt_tokens": 0.0, "retrieved_docs": 0.0}
+    start = time.perf_counter()
+    for i, question in enumerate(sample_questions(metadata, turns)):
+        # Separate threads per mode so both runs see the same conversation history
+        thread_id = f"{user_id}-{'adaptive' if adaptive else 'fixed'}-conv{i % CONVERSATIONS_PER_USER}"
+        latency, tracer = await run_turn(env, user_id, thread_id, metadata, question, adaptive)
+        latencies.append(latency)
+        for name in totals:
+            totals[name] += tracer.totals.get(name, 0)
+    stats = summarize(latencies, time.perf_counter() - start)
+    for name, total in totals.items():
+        stats[f"{name}_per_turn"] = total / turns if turns else 0.0
+    return stats
+
+RETRIEVAL_MODES = {"adaptive": [True], "fixed": [False], "both": [False, True]}
+
+async def run_benchmark(settings: OfflineSettings, library_sizes: List[int], turns: int, retrieval: str = "adaptive") -> List[Dict[str, Any]]:
+    env = install_fakes(settings)
+    await prepare_collection(env)
+    results = []
+    for size in library_sizes:
+        user_id = f"bench_{size}"
+        ingestion_stats, metadata = await bench_ingestion(env, user_id, paper_ids(size))
+        for adaptive in RETRIEVAL_MODES[retrieval]:
+            chat_stats = await bench_chat(env, user_id, metadata, turns, adaptive)
+            results.append({
+                "library_size": size,
+                "retrieval": "adaptive" if adaptive else "fixed",
+                "ingestion": ingestion_stats,
+                "chat": chat_stats,
+            })
+    return results
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'papers':>7} {'retrieval':>9} | {'ingest/s':>9} {'p50 ms':>9} {'p99 ms':>9} | "
+        f"{'turns/s':>8} {'p50 ms':>9} {'p99 ms':>9} | {'docs/turn':>9} {'ctx tok':>8} {'prompt tok':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        ing, chat = r["ingestion"], r["chat"]
+        lines.append(
+            f"{r['library_size']:>7} {r['retrieval']:>9} | {ing['throughput']:>9.2f} {ing['p50_ms']:>9.1f} {ing['p99_ms']:>9.1f} | "
+            f"{chat['throughput']:>8.2f} {chat['p50_ms']:>9.1f} {chat['p99_ms']:>9.1f} | "
+            f"{chat['retrieved_docs_per_turn']:>9.1f} {chat['context_tokens_per_turn']:>8.0f} {chat['prompt_tokens_per_turn']:>10.0f}"
+        )
+    return "\n".join(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline ArxivHub benchmark (no network).")
+    parser.add_argument("--library-sizes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--turns", type=int, default=50, help="chat turns per library size")
+    parser.add_argument("--paper-pages", type=int, default=12)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--research-llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tavily-latency-ms", type=float, default=0.0)
+    parser.add_argument("--qdrant-location", default=":memory:", help="':memory:' or a directory for local on-disk mode")
+    parser.add_argument("--retrieval", choices=sorted(RETRIEVAL_MODES), default="adaptive",
+                        help="retrieval budget for chat turns; 'both' compares context tokens per turn")
+    parser.add_argument("--json", dest="json_path", help="also write raw results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    settings = OfflineSettings(
+        llm_latency=args.llm_latency_ms / 1000,
+        research_llm_latency=args.research_llm_latency_ms / 1000,
+        embedding_latency=args.embedding_latency_ms / 1000,
+        tavily_latency=args.tavily_latency_ms / 1000,
+        paper_pages=args.paper_pages,
+        qdrant_location=args.qdrant_location,
+    )
+    results = asyncio.run(run_benchmark(settings, args.library_sizes, args.turns, args.retrieval))
+    print(format_report(results))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import math
+from typing import List, Dict
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100])."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Throughput (ops/s) and latency percentiles in milliseconds."""
+    return {
+        "count": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
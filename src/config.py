@@ -7,7 +7,13 @@ from tavily import AsyncTavilyClient
 from qdrant_client import AsyncQdrantClient, models
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client.models import PayloadSchemaType
-from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings, ChatNVIDIA
+from langchain_nvidia_ai_endpoints import ChatNVIDIA
+from core.telemetry import InstrumentedEmbeddings
+from core.nvidia_embeddings import NVIDIAQueryEmbeddings
+from core.embedding_batcher import BatchingEmbeddings
+from core.llm_gateway import LLMGateway, ModelLimits
+from core.local_vectors import LocalVectorClient, LocalVectorStore
+from core.executors import configure_pools
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -16,27 +22,73 @@ NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant") # "qdrant" (service) or "local" (in-process, memory-mapped: small / offline deployments)
+LOCAL_VECTOR_DIR = Path(os.getenv("LOCAL_VECTOR_DIR", "vector_data")) # shards of the local backend
 BASE_USER_DATA_DIR = Path("user_data")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) # 0 disables the /metrics endpoint
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "8")) # threads for blocking I/O and CPU work off the event loop
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 2))) # processes for heavy CPU work
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) # event-loop stall reported as blocking
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "section") # "section" (structure-aware) or "recursive" (legacy)
+CHUNK_SIZING = os.getenv("CHUNK_SIZING", "chars") # chunk sizes measured in "chars" or "tokens"
+HIERARCHICAL_INDEX = os.getenv("HIERARCHICAL_INDEX", "true").lower() == "true" # also index paper + section vectors
+PRE_CLASSIFIER = os.getenv("PRE_CLASSIFIER", "true").lower() == "true" # route obvious small talk / questions without the analysis LLM
+FUSED_ANALYSIS = os.getenv("FUSED_ANALYSIS", "false").lower() == "true" # summarize + analyze the query in one LLM call
+AUDIT_CONTEXT_TOKENS = int(os.getenv("AUDIT_CONTEXT_TOKENS", "3000")) # context budget of the audit prompt (llm)
+GENERATION_CONTEXT_TOKENS = int(os.getenv("GENERATION_CONTEXT_TOKENS", "6000")) # context budget of the answer prompt (research_llm)
+GENERATION_CASCADE = os.getenv("GENERATION_CASCADE", "true").lower() == "true" # simple lookups answered by llm, not research_llm
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8")) # in-flight requests to the small llm
+LLM_RATE_PER_S = float(os.getenv("LLM_RATE_PER_S", "0")) # request rate limit of the small llm (0 = unlimited)
+RESEARCH_LLM_MAX_CONCURRENCY = int(os.getenv("RESEARCH_LLM_MAX_CONCURRENCY", "4")) # in-flight requests to research_llm
+RESEARCH_LLM_RATE_PER_S = float(os.getenv("RESEARCH_LLM_RATE_PER_S", "0")) # request rate limit of research_llm (0 = unlimited)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3")) # retries of rate-limited / transient LLM failures
+COMPRESS_PAYLOADS = os.getenv("COMPRESS_PAYLOADS", "false").lower() == "true" # zstd-compress chunk texts in the payloads (needs zstandard)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64")) # chunks embedded + upserted per batch during ingestion
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32")) # concurrent embedding calls coalesced per request
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5")) # how long a call waits for others to join its batch
+EMBED_QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE_SIZE", "1024")) # LRU of recent query embeddings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4")) # background ingestion/deletion jobs running at once
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "1")) # running jobs allowed per user
+STATS_DRIFT_CHECK_S = float(os.getenv("STATS_DRIFT_CHECK_S", "600")) # how often cached library stats are checked against Qdrant
+STATS_DRIFT_TOLERANCE = float(os.getenv("STATS_DRIFT_TOLERANCE", "0.05")) # relative gap to the approximate count tolerated before an exact recount
+
+configure_pools(BLOCKING_POOL_SIZE, CPU_POOL_SIZE)
 
 # Embedder
-embedder = NVIDIAEmbeddings(model=EMBEDDING_MODEL, truncate="END")
+embedder = BatchingEmbeddings(
+    InstrumentedEmbeddings(NVIDIAQueryEmbeddings(model=EMBEDDING_MODEL, truncate="END")),
+    max_batch=EMBED_MAX_BATCH, max_wait_ms=EMBED_MAX_WAIT_MS, cache_size=EMBED_QUERY_CACHE_SIZE,
+)
+
+# LLM (model_role labels token/latency metrics per model)
+llm = ChatNVIDIA(model="meta/llama-3.2-3b-instruct", metadata={"model_role": "llm"})
+research_llm = ChatNVIDIA(model="nvidia/nemotron-3-nano-30b-a3b", metadata={"model_role": "research_llm"})
 
-# LLM
-llm = ChatNVIDIA(model="meta/llama-3.2-3b-instruct")
-research_llm = ChatNVIDIA(model="nvidia/nemotron-3-nano-30b-a3b")
+# Every node calls the LLMs through the gateway (concurrency, rate limits, retries, dedup, fairness)
+gateway = LLMGateway()
+gateway.register("llm", llm, ModelLimits(
+    max_concurrency=LLM_MAX_CONCURRENCY, rate_per_s=LLM_RATE_PER_S, burst=LLM_MAX_CONCURRENCY, max_retries=LLM_MAX_RETRIES,
+))
+gateway.register("research_llm", research_llm, ModelLimits(
+    max_concurrency=RESEARCH_LLM_MAX_CONCURRENCY, rate_per_s=RESEARCH_LLM_RATE_PER_S, burst=RESEARCH_LLM_MAX_CONCURRENCY, max_retries=LLM_MAX_RETRIES,
+))
 
 # Initialize the tavily client
 tavily = AsyncTavilyClient(api_key=TAVILY_API_KEY)
 
-# Qdrant client
-qdrant_client = AsyncQdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=300)
+# Qdrant client (or its in-process stand-in, same call surface)
+if VECTOR_BACKEND == "local":
+    qdrant_client = LocalVectorClient(LOCAL_VECTOR_DIR)
+else:
+    qdrant_client = AsyncQdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=300)
 
 # === Collection creation (if it does not exist) ===
 COLLECTION_NAME = "ArXivHub_collection"
 
 async def get_vectorstore():
-    
+    if VECTOR_BACKEND == "local":
+        return LocalVectorStore(client=qdrant_client, collection_name=COLLECTION_NAME, embeddings=embedder)
     return QdrantVectorStore(
         client=qdrant_client,
         collection_name=COLLECTION_NAME,
@@ -45,6 +97,8 @@ async def get_vectorstore():
     )
 
 async def init_db():
+    if VECTOR_BACKEND == "local":
+        return # shards are created on first write
     # Check if collection exists
     collections_response = await qdrant_client.get_collections()
     exists = any(c.name == COLLECTION_NAME for c in collections_response.collections)
@@ -64,6 +118,8 @@ async def init_db():
             "metadata.user_id": PayloadSchemaType.KEYWORD,
             "metadata.paper_id": PayloadSchemaType.KEYWORD,
             "metadata.title": PayloadSchemaType.TEXT,
+            "metadata.section": PayloadSchemaType.KEYWORD,
+            "metadata.level": PayloadSchemaType.KEYWORD,
         }
         
         for field, schema in payloads.items():
@@ -73,6 +129,15 @@ async def init_db():
                 field_schema=schema,
             )
         logger.info("Database initialized.")
+    else:
+        # Collections created before hierarchical indexing lack the level and section
+        # indexes (coarse_to_fine filters on both); creating an existing index is a no-op
+        for field in ("metadata.level", "metadata.section"):
+            await qdrant_client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name=field,
+                field_schema=PayloadSchemaType.KEYWORD,
+            )
 
 if __name__ == "__main__":
     asyncio.run(init_db())
\ No newline at end of file
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+# Chunk texts kept in memory across turns (follow-ups hit the same papers)
+CHUNK_CACHE_SIZE = 4096
+
+class ChunkCache:
+    """
+    LRU of chunk texts by point ID, indexed by paper. Point IDs are reused when a
+    paper is re-ingested (possibly with a new arXiv version and different text),
+    so ingestion and deletion call `invalidate` for the paper. Only texts that
+    exist are cached: a missing point may be a paper still being upserted.
+    """
+    def __init__(self, max_size: int = CHUNK_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[str, str]]" = OrderedDict() # point ID -> (text, paper_id)
+        self._by_paper: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation: fetches started before it must not be cached
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: str, text: str, paper_id: str, generation: Optional[int] = None) -> None:
+        """Cache a text read from the vector store; skipped if a paper was invalidated since `generation`."""
+        if generation is not None and generation != self.generation:
+            return
+        self._discard(key)
+        self._items[key] = (text, paper_id)
+        self._by_paper.setdefault(paper_id, set()).add(key)
+        while len(self._items) > self.max_size:
+            self._discard(next(iter(self._items)))
+
+    def invalidate(self, paper_id: str) -> None:
+        """Forget every cached chunk of a paper (all users and doc_keys)."""
+        self.generation += 1
+        for key in self._by_paper.pop(paper_id, ()):
+            self._items.pop(key, None)
+
+    def _discard(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        keys = self._by_paper.get(item[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_paper[item[1]]
+
+chunk_cache = ChunkCache()
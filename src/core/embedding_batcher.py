@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Callable, Awaitable
+from langchain_core.embeddings import Embeddings
+from core.telemetry import metrics
+logger = logging.getLogger(__name__)
+
+Vector = List[float]
+
+class _MicroBatcher:
+    """
+    Collects texts submitted by concurrent callers for up to `max_wait` seconds
+    (or until `max_batch` texts are queued) and embeds them with one `flush` call.
+    Identical texts within a batch are embedded once.
+    """
+    def __init__(self, kind: str, flush: Callable[[List[str]], Awaitable[List[Vector]]], max_batch: int, max_wait: float):
+        self.kind = kind
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, texts: List[str]) -> List[Vector]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # new event loop (e.g. successive asyncio.run): drop stale state
+            self._loop, self._pending, self._timer = loop, [], None
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return list(await asyncio.gather(*futures))
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for i in range(0, len(pending), self.max_batch):
+            self._loop.create_task(self._run(pending[i:i + self.max_batch]))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        metrics.observe("arxivhub_embedding_batch_size", len(batch), kind=self.kind)
+        try:
+            vectors = dict(zip(unique, await self.flush(unique)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
+
+def batches_queries(embedder: Embeddings) -> bool:
+    """Whether `embedder.aembed_queries` embeds several queries in one request."""
+    return getattr(embedder, "batches_queries", callable(getattr(embedder, "aembed_queries", None)))
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Embeddings wrapper for many concurrent users: concurrent `aembed_query` and
+    small `aembed_documents` calls are coalesced into batched requests, and
+    repeated query strings are served from an LRU cache.
+    Queries are only micro-batched when the inner embedder has a batched query
+    call (`aembed_queries`); otherwise they go straight through, without waiting.
+    """
+    def __init__(self, inner: Embeddings, max_batch: int = 32, max_wait_ms: float = 5.0, cache_size: int = 1024):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Vector]" = OrderedDict()
+        self._queries: Optional[_MicroBatcher] = None
+        if batches_queries(inner):
+            self._queries = _MicroBatcher("query", self._embed_queries, max_batch, max_wait_ms / 1000)
+        else:
+            logger.info("Embedder has no batched query call: query micro-batching disabled")
+        self._documents = _MicroBatcher("documents", inner.aembed_documents, max_batch, max_wait_ms / 1000)
+
+    async def _embed_queries(self, texts: List[str]) -> List[Vector]:
+        # One request for the whole (already deduplicated) batch
+        vectors = await self.inner.aembed_queries(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(f"Batched query embedding returned {len(vectors)} vectors for {len(texts)} texts")
+        return vectors
+
+    def _cached(self, text: str) -> Optional[Vector]:
+        vector = self._cache.get(text)
+        if vector is not None:
+            self._cache.move_to_end(text)
+        metrics.inc("arxivhub_embedding_cache_total", result="hit" if vector is not None else "miss")
+        return vector
+
+    def _remember(self, text: str, vector: Vector) -> None:
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- Sync API: no batching (no event loop to gather callers on) ---
+    def embed_documents(self, texts: List[str]) -> List[Vector]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> Vector:
+        vector = self._cached(text)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._remember(text, vector)
+        return vector
+
+    # --- Async API ---
+    async def aembed_query(self, text: str) -> Vector:
+        vector = self._cached(text)
+        if vector is None:
+            if self._queries is None:
+                vector = await self.inner.aembed_query(text)
+            else:
+                vector = (await self._queries.submit([text]))[0]
+            self._remember(text, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[Vector]:
+        if len(texts) >= self.max_batch:
+            # Already a full batch (e.g. ingestion): nothing to gain from waiting
+            return await self.inner.aembed_documents(texts)
+        return await self._documents.submit(texts)
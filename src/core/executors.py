@@ -0,0 +1,53 @@
+import os
+import asyncio
+import functools
+from typing import Callable, Optional, TypeVar
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+T = TypeVar("T")
+
+# Pool sizes, set by `configure_pools` (config.py calls it with BLOCKING_POOL_SIZE / CPU_POOL_SIZE).
+# This module must not import config: config itself imports modules that use run_blocking.
+_blocking_pool_size = 8
+_cpu_pool_size = os.cpu_count() or 2
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def configure_pools(blocking_pool_size: int, cpu_pool_size: int) -> None:
+    """Set the pool sizes (takes effect for pools not created yet)."""
+    global _blocking_pool_size, _cpu_pool_size
+    _blocking_pool_size, _cpu_pool_size = blocking_pool_size, cpu_pool_size
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Dedicated pool for blocking work, so it never competes with the default executor."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=_blocking_pool_size, thread_name_prefix="arxivhub-blocking")
+    return _thread_pool
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool for CPU-heavy work that must escape the GIL. Arguments must be picklable."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=_cpu_pool_size)
+    return _process_pool
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking or CPU-bound callable in the thread pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(fn, *args, **kwargs))
+
+async def run_in_process(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a top-level (picklable) function in the process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(fn, *args, **kwargs))
+
+def shutdown_pools(wait: bool = True) -> None:
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=wait)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait)
+        _process_pool = None
@@ -0,0 +1,181 @@
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+from langchain_core.messages import BaseMessage
+from core.telemetry import metrics
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (timeouts, rate limiting, transient server errors)
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+@dataclass
+class ModelLimits:
+    max_concurrency: int = 8   # requests in flight to this model
+    rate_per_s: float = 0.0    # token-bucket refill rate (0 = unlimited)
+    burst: int = 8             # token-bucket capacity
+    max_retries: int = 3       # retries of transient failures
+    retry_base_s: float = 0.5  # backoff base (full jitter: uniform(0, base * 2^attempt))
+
+class FairSemaphore:
+    """Counting semaphore that hands freed slots to waiting users round-robin (not FIFO)."""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._in_use = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._turn: Deque[str] = deque()
+
+    async def acquire(self, user_id: str) -> None:
+        if self._in_use < self.capacity and not self._turn:
+            self._in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(future)
+        if user_id not in self._turn:
+            self._turn.append(user_id)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release() # slot granted just as we were cancelled: hand it on
+            else:
+                self._forget(user_id, future)
+            raise
+
+    def release(self) -> None:
+        self._in_use -= 1
+        while self._turn:
+            user_id = self._turn.popleft()
+            queue = self._waiters[user_id]
+            future = queue.popleft()
+            if queue:
+                self._turn.append(user_id) # back of the line for this user's next call
+            else:
+                del self._waiters[user_id]
+            if not future.cancelled():
+                self._in_use += 1
+                future.set_result(None)
+                return
+
+    def _forget(self, user_id: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(user_id)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[user_id]
+                self._turn.remove(user_id)
+
+class TokenBucket:
+    """Request-rate limiter: `rate` requests per second with bursts up to `capacity`."""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def take(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def is_transient(error: Exception) -> bool:
+    """Whether an LLM call failure is worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return int(status) in RETRYABLE_STATUS
+    name = type(error).__name__.lower()
+    return any(s in name for s in ("timeout", "connection", "ratelimit")) or any(
+        code in str(error) for code in ("429", "502", "503", "504")
+    )
+
+def _prompt_key(role: str, prompt: Any, schema: Optional[Type[BaseModel]]) -> str:
+    if isinstance(prompt, (list, tuple)):
+        parts = [f"{m.type}:{m.content}" if isinstance(m, BaseMessage) else repr(m) for m in prompt]
+        text = "\n".join(parts)
+    else:
+        text = str(prompt)
+    schema_name = schema.__name__ if schema else ""
+    return hashlib.sha1(f"{role}|{schema_name}|{text}".encode()).hexdigest()
+
+class LLMGateway:
+    """
+    Single entry point for every LLM call of the graph nodes.
+    Per model: a fair (per-user round-robin) concurrency limit, token-bucket
+    rate limiting and retries with jittered exponential backoff. Identical
+    in-flight requests (same model, schema and prompt) share one call.
+    """
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._limits: Dict[str, ModelLimits] = {}
+        self._slots: Dict[str, FairSemaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._runnables: Dict[Tuple[str, Optional[type]], Any] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def register(self, role: str, model: Any, limits: Optional[ModelLimits] = None) -> None:
+        """Add (or swap) the model behind `role`. Without `limits`, existing limits are kept."""
+        limits = limits or self._limits.get(role) or ModelLimits()
+        self._models[role] = model
+        self._limits[role] = limits
+        self._slots[role] = FairSemaphore(limits.max_concurrency)
+        self._buckets[role] = TokenBucket(limits.rate_per_s, limits.burst)
+        self._runnables = {k: v for k, v in self._runnables.items() if k[0] != role}
+
+    def model(self, role: str) -> Any:
+        return self._models[role]
+
+    def _runnable(self, role: str, schema: Optional[Type[BaseModel]]) -> Any:
+        key = (role, schema)
+        if key not in self._runnables:
+            model = self._models[role]
+            self._runnables[key] = model.with_structured_output(schema) if schema else model
+        return self._runnables[key]
+
+    async def ainvoke(self, role: str, prompt: Any, user_id: str = "anonymous", schema: Optional[Type[BaseModel]] = None) -> Any:
+        """Invoke the `role` model (optionally with structured output) under the gateway's policies."""
+        key = _prompt_key(role, prompt, schema)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(role, prompt, user_id, schema))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.inc("arxivhub_llm_gateway_deduplicated_total", role=role)
+        # Shielded: one waiter giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _call(self, role: str, prompt: Any, user_id: str, schema: Optional[Type[BaseModel]]) -> Any:
+        limits = self._limits[role]
+        runnable = self._runnable(role, schema)
+        for attempt in range(limits.max_retries + 1):
+            queued = time.perf_counter()
+            await self._slots[role].acquire(user_id)
+            try:
+                await self._buckets[role].take()
+                metrics.observe("arxivhub_llm_gateway_wait_seconds", time.perf_counter() - queued, role=role)
+                return await runnable.ainvoke(prompt)
+            except Exception as e:
+                if attempt == limits.max_retries or not is_transient(e):
+                    raise
+                error = e
+            finally:
+                self._slots[role].release()
+            # Back off outside the slot so other users' calls can proceed
+            delay = random.uniform(0, limits.retry_base_s * 2 ** attempt)
+            metrics.inc("arxivhub_llm_gateway_retries_total", role=role)
+            logger.warning(f"LLM call to {role} failed ({error}); retry {attempt + 1}/{limits.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
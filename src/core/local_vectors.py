@@ -0,0 +1,615 @@
+import re
+import json
+import hashlib
+import asyncio
+import logging
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Union
+import numpy as np
+from qdrant_client.http import models
+from langchain_core.embeddings import Embeddings
+from core.executors import run_blocking
+logger = logging.getLogger(__name__)
+
+# Rows allocated for a new shard (the vector file doubles when full)
+INITIAL_CAPACITY = 1024
+# Deleted rows tolerated, as a fraction of the shard, before it is compacted
+COMPACT_RATIO = 0.5
+# Log entries tolerated, as a multiple of the shard's rows, before the shard file is rewritten
+LOG_RATIO = 1.0
+# Payload key sharding the points (one shard per user)
+USER_KEY = "metadata.user_id"
+# User IDs used as-is as shard directory names; others get a digest
+SAFE_NAME = re.compile(r"^[\w-]{1,64}$")
+
+SHARD_FILE = "shard.json"
+
+def _get(payload: Optional[Dict[str, Any]], key: str) -> Any:
+    """Value at a dotted payload path ("metadata.paper_id"), None when missing."""
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _project(payload: Dict[str, Any], with_payload: Union[bool, List[str]]) -> Optional[Dict[str, Any]]:
+    """Payload restricted like Qdrant's `with_payload` (True, False or a list of dotted paths)."""
+    if with_payload is True:
+        return payload
+    if not with_payload:
+        return None
+    projected: Dict[str, Any] = {}
+    for key in with_payload:
+        value = _get(payload, key)
+        if value is None:
+            continue
+        node = projected
+        *parents, leaf = key.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return projected
+
+def _as_list(conditions) -> list:
+    if conditions is None:
+        return []
+    return conditions if isinstance(conditions, list) else [conditions]
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit rows: cosine similarity becomes a dot product (Qdrant stores cosine vectors the same way)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def _shard_dir(root: Path, collection: str, user: str) -> Path:
+    """Directory of a user's shard: the user ID when it is a safe path component, its digest otherwise."""
+    name = user if SAFE_NAME.match(user) else "@" + hashlib.sha256(user.encode("utf-8")).hexdigest()[:32]
+    return root / collection / name
+
+class _Shard:
+    """
+    Points of one user: unit float32 vectors in a memory-mapped .npy file and
+    their IDs / payloads, aligned by row. Deleted rows are tombstoned (payload None).
+
+    On disk a shard is a generation: `shard.json` (user, generation, IDs and payloads)
+    plus `vectors.<gen>.npy` and an append-only `log.<gen>.jsonl` of row writes since.
+    Rows are append-only within a generation (an overwritten point gets a new row),
+    so persisted rows are never modified in place. Growing, compacting or folding a
+    long log writes the next generation and swaps `shard.json` last: a crash at any
+    point leaves the vectors aligned with the IDs and payloads that reference them.
+    """
+    def __init__(self, path: Path, user: str):
+        self.path = path
+        self.user = user
+        self.generation = 0
+        self.ids: List[str] = []
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.dead = 0
+        self.logged = 0 # entries in the current log file
+        self._log: List[Dict[str, Any]] = [] # entries not written to the log file yet
+        # Keyword columns used by filters: key -> (codes per row, value -> code)
+        self._columns: Dict[str, Tuple[np.ndarray, Dict[Any, int]]] = {}
+        self._alive: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.vectors is None else self.vectors.shape[0]
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self.path / f"vectors.{generation}.npy"
+
+    def _log_path(self, generation: int) -> Path:
+        return self.path / f"log.{generation}.jsonl"
+
+    # --- Disk (blocking: call from a worker thread) ---
+    def load(self) -> "_Shard":
+        with open(self.path / SHARD_FILE) as f:
+            state = json.load(f)
+        self.user, self.generation = state["user"], state["generation"]
+        self.ids, self.payloads = state["ids"], state["payloads"]
+        self.vectors = np.load(self._vectors_path(self.generation), mmap_mode="r+")
+        log_path = self._log_path(self.generation)
+        if log_path.exists():
+            valid = 0
+            with open(log_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break # torn last line of an interrupted append
+                    self._apply(entry)
+                    self.logged += 1
+                    valid += len(line)
+            if valid < log_path.stat().st_size:
+                with open(log_path, "r+b") as f:
+                    f.truncate(valid)
+        self.rows = {pid: row for row, (pid, payload) in enumerate(zip(self.ids, self.payloads)) if payload is not None}
+        self.dead = self.size - len(self.rows)
+        return self
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        row = entry["row"]
+        if row == self.size:
+            self.ids.append(entry["id"])
+            self.payloads.append(entry["payload"])
+        else:
+            self.payloads[row] = entry["payload"]
+
+    def write_generation(self, generation: int, keep: List[int], ids: List[str], payloads: List[Optional[Dict[str, Any]]], capacity: int, dim: int) -> np.ndarray:
+        """
+        Write generation `generation` from the `keep` rows: fresh vector file, empty log,
+        then the shard file (atomic replace). Returns the new vector map.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(self._vectors_path(generation), mode="w+", dtype=np.float32, shape=(capacity, dim))
+        if keep:
+            vectors[:len(keep)] = self.vectors[keep]
+        vectors.flush()
+        open(self._log_path(generation), "w").close()
+        tmp = self.path / (SHARD_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"user": self.user, "generation": generation, "ids": ids, "payloads": payloads}, f, separators=(",", ":"))
+        tmp.replace(self.path / SHARD_FILE)
+        return vectors
+
+    def remove_generation(self, generation: int) -> None:
+        self._vectors_path(generation).unlink(missing_ok=True)
+        self._log_path(generation).unlink(missing_ok=True)
+
+    def append_log(self, entries: List[Dict[str, Any]]) -> None:
+        """Flush the vectors, then append the row writes that reference them."""
+        self.vectors.flush()
+        with open(self._log_path(self.generation), "a") as f:
+            f.writelines(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+
+    # --- Rows (in memory, on the event loop) ---
+    def put(self, pid: str, vector: np.ndarray, payload: Dict[str, Any]) -> None:
+        """Write a point to a new row (capacity reserved by the caller); its previous row is tombstoned."""
+        previous = self.rows.get(pid)
+        if previous is not None:
+            self.remove(previous)
+        row = self.rows[pid] = self.size
+        self.vectors[row] = vector
+        self.ids.append(pid)
+        self.payloads.append(payload)
+        self._log.append({"row": row, "id": pid, "payload": payload})
+        self.invalidate()
+
+    def update(self, row: int, payload: Dict[str, Any]) -> None:
+        self.payloads[row] = payload
+        self._log.append({"row": row, "payload": payload})
+        self.invalidate()
+
+    def remove(self, row: int) -> None:
+        if self.payloads[row] is None:
+            return
+        del self.rows[self.ids[row]]
+        self.payloads[row] = None
+        self.dead += 1
+        self._log.append({"row": row, "payload": None})
+        self.invalidate()
+
+    def take_log(self) -> List[Dict[str, Any]]:
+        entries, self._log = self._log, []
+        return entries
+
+    def needs_rewrite(self) -> bool:
+        """Too many tombstones, or a log long enough to be worth folding into the shard file."""
+        return self.dead > COMPACT_RATIO * self.size or self.logged + len(self._log) > LOG_RATIO * max(self.size, INITIAL_CAPACITY)
+
+    def plan(self, compact: bool) -> Tuple[List[int], List[str], List[Optional[Dict[str, Any]]]]:
+        """Rows carried into the next generation (live ones only when compacting), with their IDs and payloads."""
+        keep = [row for row, payload in enumerate(self.payloads) if payload is not None] if compact else list(range(self.size))
+        return keep, [self.ids[row] for row in keep], [self.payloads[row] for row in keep]
+
+    def install(self, generation: int, vectors: np.ndarray, ids: List[str], payloads: List[Optional[Dict[str, Any]]]) -> None:
+        """Switch to a generation written by `write_generation` (row numbers may have changed)."""
+        self.generation, self.vectors = generation, vectors
+        self.ids, self.payloads = ids, payloads
+        self.rows = {pid: row for row, (pid, payload) in enumerate(zip(ids, payloads)) if payload is not None}
+        self.dead = self.size - len(self.rows)
+        self.logged = 0
+        self._log = []
+        self.invalidate()
+
+    def column(self, key: str) -> Tuple[np.ndarray, Dict[Any, int]]:
+        """Integer codes of a keyword payload field (-1 for missing or deleted), built on first use after a write."""
+        column = self._columns.get(key)
+        if column is None:
+            vocabulary: Dict[Any, int] = {}
+            codes = np.full(self.size, -1, dtype=np.int32)
+            for row, payload in enumerate(self.payloads):
+                value = _get(payload, key)
+                if isinstance(value, (str, int, bool)):
+                    codes[row] = vocabulary.setdefault(value, len(vocabulary))
+            column = self._columns[key] = (codes, vocabulary)
+        return column
+
+    def alive(self) -> np.ndarray:
+        if self._alive is None:
+            self._alive = np.fromiter((payload is not None for payload in self.payloads), dtype=bool, count=self.size)
+        return self._alive.copy()
+
+    def invalidate(self) -> None:
+        """Forget the cached columns and live-row mask after a write."""
+        self._columns.clear()
+        self._alive = None
+
+def _condition_mask(shard: _Shard, condition) -> np.ndarray:
+    if isinstance(condition, models.Filter):
+        return _filter_mask(shard, condition)
+    if isinstance(condition, models.HasIdCondition):
+        wanted = {str(pid) for pid in condition.has_id}
+        return np.fromiter((pid in wanted for pid in shard.ids), dtype=bool, count=shard.size)
+    if isinstance(condition, models.FieldCondition) and condition.match is not None:
+        codes, vocabulary = shard.column(condition.key)
+        if isinstance(condition.match, models.MatchValue):
+            return codes == vocabulary.get(condition.match.value, -2)
+        if isinstance(condition.match, models.MatchAny):
+            return np.isin(codes, [vocabulary[v] for v in condition.match.any if v in vocabulary])
+    raise NotImplementedError(f"Local vector backend does not support the filter condition {condition!r}")
+
+def _filter_mask(shard: _Shard, query_filter: models.Filter) -> np.ndarray:
+    mask = np.ones(shard.size, dtype=bool)
+    for condition in _as_list(query_filter.must):
+        mask &= _condition_mask(shard, condition)
+    should = _as_list(query_filter.should)
+    if should:
+        matched = np.zeros(shard.size, dtype=bool)
+        for condition in should:
+            matched |= _condition_mask(shard, condition)
+        mask &= matched
+    for condition in _as_list(query_filter.must_not):
+        mask &= ~_condition_mask(shard, condition)
+    return mask
+
+def _user_of(query_filter: Optional[models.Filter]) -> Optional[str]:
+    """User a filter is restricted to (top-level `must` on metadata.user_id), so only that shard is scanned."""
+    for condition in _as_list(getattr(query_filter, "must", None)):
+        if isinstance(condition, models.FieldCondition) and condition.key == USER_KEY and isinstance(condition.match, models.MatchValue):
+            return condition.match.value
+    return None
+
+def _selector_filter(selector) -> Tuple[Optional[models.Filter], Optional[List[str]]]:
+    """(filter, ids) of a Qdrant points selector: a Filter, FilterSelector, PointIdsList or list of IDs."""
+    if isinstance(selector, models.FilterSelector):
+        return selector.filter, None
+    if isinstance(selector, models.Filter):
+        return selector, None
+    if isinstance(selector, models.PointIdsList):
+        return None, [str(pid) for pid in selector.points]
+    return None, [str(pid) for pid in selector]
+
+class LocalVectorClient:
+    """
+    In-process vector backend implementing the AsyncQdrantClient calls used by the
+    app (query_points[_groups], retrieve, scroll, upsert, delete, set_payload, count)
+    with the same filter, grouping and score-threshold semantics.
+
+    Each user's points form a shard under `root/<collection>/<user_id>/` (a digest
+    for IDs that are not safe path components): a memory-mapped matrix of unit
+    vectors searched by brute force (one matrix-vector product), its IDs and payloads,
+    and an append-only log of row writes (see `_Shard`). Keyword filters are evaluated
+    as vectorized masks over per-field integer codes. Meant for small or offline
+    deployments run as a single process.
+    """
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._shards: Dict[str, Dict[str, _Shard]] = {}  # collection -> user -> shard
+        self._owners: Dict[str, Dict[str, str]] = {}     # collection -> point id -> user
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    # --- Shards ---
+    async def _collection(self, name: str) -> Dict[str, _Shard]:
+        shards = self._shards.get(name)
+        if shards is not None:
+            return shards
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if name not in self._shards:
+                def _load_all() -> Dict[str, _Shard]:
+                    base = self.root / name
+                    dirs = sorted(p for p in base.iterdir() if (p / SHARD_FILE).exists()) if base.exists() else []
+                    loaded = [_Shard(path, path.name).load() for path in dirs]
+                    return {shard.user: shard for shard in loaded}
+                shards = await run_blocking(_load_all)
+                self._owners[name] = {pid: user for user, shard in shards.items() for pid in shard.rows}
+                self._shards[name] = shards
+                logger.info(f"Local vector collection {name}: {len(shards)} shard(s), {len(self._owners[name])} points")
+        return self._shards[name]
+
+    def _targets(self, shards: Dict[str, _Shard], query_filter: Optional[models.Filter]) -> List[Tuple[str, _Shard]]:
+        user = _user_of(query_filter)
+        if user is not None:
+            return [(user, shards[user])] if user in shards else []
+        return sorted(shards.items())
+
+    def _matching(self, shards: Dict[str, _Shard], query_filter: Optional[models.Filter]) -> Iterator[Tuple[str, _Shard, np.ndarray]]:
+        """(user, shard, matching live rows) of every shard the filter can reach."""
+        for user, shard in self._targets(shards, query_filter):
+            if shard.size == 0:
+                continue
+            mask = shard.alive()
+            if query_filter is not None:
+                mask &= _filter_mask(shard, query_filter)
+            yield user, shard, np.flatnonzero(mask)
+
+    def _shard(self, shards: Dict[str, _Shard], collection_name: str, user: str) -> _Shard:
+        shard = shards.get(user)
+        if shard is None:
+            shard = shards[user] = _Shard(_shard_dir(self.root, collection_name, user), user)
+        return shard
+
+    async def _rewrite(self, shard: _Shard, capacity: int, dim: int, compact: bool) -> None:
+        """Write the shard's next generation (see `_Shard`) and drop the previous one."""
+        keep, ids, payloads = shard.plan(compact)
+        previous = shard.generation
+        vectors = await run_blocking(shard.write_generation, previous + 1, keep, ids, payloads, capacity, dim)
+        shard.install(previous + 1, vectors, ids, payloads)
+        await run_blocking(shard.remove_generation, previous)
+
+    async def _reserve(self, shard: _Shard, needed: int, dim: int) -> None:
+        """Make room for `needed` rows, doubling the vector file (rows keep their numbers)."""
+        if needed <= shard.capacity:
+            return
+        capacity = max(shard.capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        await self._rewrite(shard, capacity, dim, compact=False)
+
+    async def _persist(self, shards: List[_Shard]) -> None:
+        """Append each shard's pending row writes to its log, or fold everything into a new generation."""
+        for shard in shards:
+            if shard.needs_rewrite():
+                live = len(shard.rows)
+                await self._rewrite(shard, max(INITIAL_CAPACITY, 2 * live), shard.vectors.shape[1], compact=True)
+            else:
+                entries = shard.take_log()
+                if entries:
+                    await run_blocking(shard.append_log, entries)
+                    shard.logged += len(entries)
+
+    def _search(
+        self,
+        shards: Dict[str, _Shard],
+        query: List[float],
+        query_filter: Optional[models.Filter],
+        score_threshold: Optional[float],
+        limit: Optional[int] = None,
+        ) -> Iterator[Tuple[float, _Shard, int]]:
+        """Matching points ranked by cosine similarity (best first), above the threshold; the top `limit` if given."""
+        q = _normalize(np.asarray([query], dtype=np.float32))[0]
+        found: List[Tuple[_Shard, np.ndarray, np.ndarray]] = []
+        for _, shard, rows in self._matching(shards, query_filter):
+            if not len(rows):
+                continue
+            scores = shard.vectors[rows] @ q
+            if score_threshold is not None:
+                keep = scores >= score_threshold
+                rows, scores = rows[keep], scores[keep]
+            found.append((shard, rows, scores))
+        if not found:
+            return iter(())
+        scores = np.concatenate([f[2] for f in found])
+        owner = np.concatenate([np.full(len(f[1]), i) for i, f in enumerate(found)])
+        rows = np.concatenate([f[1] for f in found])
+        if limit is not None and limit < len(scores):
+            # Partial selection of the top `limit`, then sort only those
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            order = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            order = np.argsort(-scores, kind="stable")
+        return ((float(scores[i]), found[owner[i]][0], int(rows[i])) for i in order)
+
+    @staticmethod
+    def _point(score: float, shard: _Shard, row: int, with_payload) -> models.ScoredPoint:
+        return models.ScoredPoint(id=shard.ids[row], version=0, score=score, payload=_project(shard.payloads[row], with_payload))
+
+    # --- Queries ---
+    async def query_points(
+        self,
+        collection_name: str,
+        query: List[float],
+        query_filter: Optional[models.Filter] = None,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        with_payload: Union[bool, List[str]] = True,
+        **kwargs,
+        ) -> models.QueryResponse:
+        shards = await self._collection(collection_name)
+        hits = self._search(shards, query, query_filter, score_threshold, limit)
+        return models.QueryResponse(points=[self._point(score, shard, row, with_payload) for score, shard, row in hits])
+
+    async def query_points_groups(
+        self,
+        collection_name: str,
+        query: List[float],
+        group_by: str,
+        query_filter: Optional[models.Filter] = None,
+        limit: int = 10,
+        group_size: int = 3,
+        score_threshold: Optional[float] = None,
+        with_payload: Union[bool, List[str]] = True,
+        **kwargs,
+        ) -> models.GroupsResult:
+        """Best `limit` groups (by their best hit), each with up to `group_size` hits, like Qdrant's grouped search."""
+        shards = await self._collection(collection_name)
+        groups: Dict[Any, List[models.ScoredPoint]] = {}
+        full = 0
+        for score, shard, row in self._search(shards, query, query_filter, score_threshold):
+            if full == limit:
+                break
+            key = _get(shard.payloads[row], group_by)
+            if key is None:
+                continue
+            hits = groups.get(key)
+            if hits is None:
+                if len(groups) >= limit:
+                    continue
+                hits = groups[key] = []
+            if len(hits) < group_size:
+                hits.append(self._point(score, shard, row, with_payload))
+                full += len(hits) == group_size
+        return models.GroupsResult(groups=[models.PointGroup(id=key, hits=hits) for key, hits in groups.items()])
+
+    async def retrieve(
+        self,
+        collection_name: str,
+        ids: List[Union[str, int]],
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        **kwargs,
+        ) -> List[models.Record]:
+        shards = await self._collection(collection_name)
+        owners = self._owners[collection_name]
+        records = []
+        for pid in map(str, ids):
+            user = owners.get(pid)
+            if user is None:
+                continue
+            shard = shards[user]
+            row = shard.rows[pid]
+            vector = shard.vectors[row].tolist() if with_vectors else None
+            records.append(models.Record(id=pid, payload=_project(shard.payloads[row], with_payload), vector=vector))
+        return records
+
+    async def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Optional[models.Filter] = None,
+        limit: int = 10,
+        offset: Optional[Tuple[str, int]] = None,
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        **kwargs,
+        ) -> Tuple[List[models.Record], Optional[Tuple[str, int]]]:
+        """Matching points in (user, row) order; the returned offset is opaque, pass it back unchanged."""
+        shards = await self._collection(collection_name)
+        records: List[models.Record] = []
+        for user, shard, rows in self._matching(shards, scroll_filter):
+            if offset is not None:
+                if user < offset[0]:
+                    continue
+                if user == offset[0]:
+                    rows = rows[rows >= offset[1]]
+            for row in rows:
+                if len(records) == limit:
+                    return records, (user, int(row))
+                vector = shard.vectors[row].tolist() if with_vectors else None
+                records.append(models.Record(id=shard.ids[row], payload=_project(shard.payloads[row], with_payload), vector=vector))
+        return records, None
+
+    async def count(self, collection_name: str, count_filter: Optional[models.Filter] = None, exact: bool = True, **kwargs) -> models.CountResult:
+        # Always exact: a local count costs the same as an estimate
+        shards = await self._collection(collection_name)
+        return models.CountResult(count=sum(len(rows) for _, _, rows in self._matching(shards, count_filter)))
+
+    # --- Updates ---
+    async def upsert(self, collection_name: str, points: Union[List[models.PointStruct], models.Batch], **kwargs) -> None:
+        shards = await self._collection(collection_name)
+        owners = self._owners[collection_name]
+        if isinstance(points, models.Batch):
+            ids, vectors, payloads = points.ids, points.vectors, points.payloads or [{}] * len(points.ids)
+        else:
+            ids, vectors, payloads = [p.id for p in points], [p.vector for p in points], [p.payload or {} for p in points]
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        async with self._locks.setdefault(collection_name, asyncio.Lock()):
+            by_user: Dict[str, List[int]] = {}
+            for i, payload in enumerate(payloads):
+                by_user.setdefault(str(_get(payload, USER_KEY)), []).append(i)
+            touched = []
+            for user, items in by_user.items():
+                shard = self._shard(shards, collection_name, user)
+                await self._reserve(shard, shard.size + len(items), vectors.shape[1])
+                for i in items:
+                    pid = str(ids[i])
+                    previous = owners.get(pid)
+                    if previous is not None and previous != user:
+                        # Same point re-written for another user: it leaves the old shard
+                        shards[previous].remove(shards[previous].rows[pid])
+                        touched.append(shards[previous])
+                    shard.put(pid, vectors[i], payloads[i])
+                    owners[pid] = user
+                touched.append(shard)
+            await self._persist(list(dict.fromkeys(touched)))
+
+    async def delete(self, collection_name: str, points_selector, **kwargs) -> None:
+        shards = await self._collection(collection_name)
+        owners = self._owners[collection_name]
+        query_filter, ids = _selector_filter(points_selector)
+        async with self._locks.setdefault(collection_name, asyncio.Lock()):
+            touched = []
+            if ids is not None:
+                for pid in ids:
+                    user = owners.pop(pid, None)
+                    if user is not None:
+                        shards[user].remove(shards[user].rows[pid])
+                        touched.append(shards[user])
+            else:
+                for _, shard, rows in list(self._matching(shards, query_filter)):
+                    for row in rows:
+                        owners.pop(shard.ids[row], None)
+                        shard.remove(int(row))
+                    if len(rows):
+                        touched.append(shard)
+            await self._persist(list(dict.fromkeys(touched)))
+
+    async def set_payload(self, collection_name: str, payload: Dict[str, Any], points, key: Optional[str] = None, **kwargs) -> None:
+        """Merge `payload` into the points' payload (or into the object at `key`); points whose user changes move shard."""
+        shards = await self._collection(collection_name)
+        owners = self._owners[collection_name]
+        query_filter, ids = _selector_filter(points)
+        async with self._locks.setdefault(collection_name, asyncio.Lock()):
+            if ids is not None:
+                targets = [(owners[pid], shards[owners[pid]], [shards[owners[pid]].rows[pid]]) for pid in ids if pid in owners]
+            else:
+                targets = [(user, shard, rows.tolist()) for user, shard, rows in self._matching(shards, query_filter)]
+            touched = []
+            moves: Dict[str, List[Tuple[_Shard, int, Dict[str, Any]]]] = {}
+            for user, shard, rows in targets:
+                for row in rows:
+                    # Copy on write: persisted snapshots may still reference the old dicts
+                    old = shard.payloads[row]
+                    if key is None:
+                        new = {**old, **payload}
+                    else:
+                        new = dict(old)
+                        node = new
+                        *parents, leaf = key.split(".")
+                        for part in parents:
+                            node[part] = dict(node.get(part) or {})
+                            node = node[part]
+                        node[leaf] = {**(node.get(leaf) or {}), **payload}
+                    if str(_get(new, USER_KEY)) != user:
+                        moves.setdefault(str(_get(new, USER_KEY)), []).append((shard, row, new))
+                    else:
+                        shard.update(row, new)
+                if rows:
+                    touched.append(shard)
+            # Points re-assigned to another user (a library move) change shard
+            for target_user, items in moves.items():
+                target = self._shard(shards, collection_name, target_user)
+                await self._reserve(target, target.size + len(items), items[0][0].vectors.shape[1])
+                for shard, row, new in items:
+                    pid = shard.ids[row]
+                    target.put(pid, np.array(shard.vectors[row]), new)
+                    shard.remove(row)
+                    owners[pid] = target_user
+                touched.append(target)
+            await self._persist(list(dict.fromkeys(touched)))
+
+@dataclass
+class LocalVectorStore:
+    """Stand-in for `QdrantVectorStore`: the app only uses its client, collection name and embeddings."""
+    client: LocalVectorClient
+    collection_name: str
+    embeddings: Embeddings
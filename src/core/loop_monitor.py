@@ -0,0 +1,90 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Optional
+from config import LOOP_LAG_THRESHOLD_MS
+from core.telemetry import metrics
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """
+    Detects event-loop stalls and names the coroutine responsible.
+
+    A heartbeat coroutine ticks every `interval` seconds on the monitored loop.
+    A watchdog thread notices when the heartbeat goes stale and, while the loop
+    is still blocked, logs the running task and the loop thread's stack.
+    """
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD_MS / 1000, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._stall_reported = False
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop. Must be called from inside it."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._loop.create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        threading.Thread(target=self._watch, daemon=True, name="loop-lag-watchdog").start()
+        logger.info(f"Event-loop lag monitor started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def _heartbeat(self) -> None:
+        while not self._stopped.is_set():
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            metrics.observe("arxivhub_event_loop_lag_seconds", max(0.0, now - expected))
+            if self._stall_reported:
+                logger.warning(f"Event loop unblocked after {(now - self._last_beat) * 1000:.0f} ms")
+                self._stall_reported = False
+            self._last_beat = now
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if self._loop is None or self._loop.is_closed():
+                return
+            stalled = time.monotonic() - self._last_beat
+            if stalled > self.threshold + self.interval and not self._stall_reported:
+                self._stall_reported = True
+                metrics.inc("arxivhub_event_loop_stalls_total")
+                logger.warning(
+                    f"Event loop blocked for {stalled * 1000:.0f} ms by {self._describe_offender()}"
+                )
+
+    def _describe_offender(self) -> str:
+        """Name the task currently running on the loop and where it is blocked."""
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        name = "<no running task>"
+        if task is not None:
+            coro = task.get_coro()
+            name = f"task {task.get_name()!r} ({getattr(coro, '__qualname__', coro)})"
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return name
+        stack = "".join(traceback.format_stack(frame, limit=8))
+        return f"{name}\n{stack}"
+
+_monitor: Optional[LoopLagMonitor] = None
+
+def ensure_loop_monitor() -> LoopLagMonitor:
+    """Start a single process-wide monitor on the running loop (idempotent)."""
+    global _monitor
+    if _monitor is None or _monitor._loop is not asyncio.get_running_loop():
+        if _monitor is not None:
+            _monitor.stop()
+        _monitor = LoopLagMonitor()
+        _monitor.start()
+    return _monitor
@@ -0,0 +1,18 @@
+from typing import List
+from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
+from core.executors import run_blocking
+
+class NVIDIAQueryEmbeddings(NVIDIAEmbeddings):
+    """
+    NVIDIAEmbeddings with a batched query path: several queries embedded in one
+    request with input_type=query (the public API only embeds queries one by one,
+    and documents with input_type=passage, which is the wrong side for retrieval).
+    """
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.max_batch_size):
+            vectors.extend(self._embed(texts[i:i + self.max_batch_size], model_type="query"))
+        return vectors
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await run_blocking(self.embed_queries, texts)
@@ -0,0 +1,51 @@
+import base64
+import logging
+from typing import Dict, Any, Optional
+from config import COMPRESS_PAYLOADS
+
+try:  # Optional: zstd-compressed chunk texts when zstandard is installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Payload field of a chunk text: plain, or zstd + base64 (payloads are JSON)
+TEXT_FIELD = "page_content"
+COMPRESSED_FIELD = "page_content_z"
+# Projection fetching a chunk's text whatever its encoding
+TEXT_FIELDS = [TEXT_FIELD, COMPRESSED_FIELD]
+# Projection of search hits: ranking and pruning only need IDs, scores and metadata
+HIT_FIELDS = ["metadata"]
+
+ZSTD_LEVEL = 3
+# Shorter texts are stored plain: the frame and base64 overhead outweigh the gain
+MIN_COMPRESS_CHARS = 512
+
+_compressor = None
+_decompressor = None
+
+if COMPRESS_PAYLOADS and zstandard is None:
+    logger.warning("COMPRESS_PAYLOADS is set but zstandard is not installed: chunk texts are stored uncompressed")
+
+def encode_text(text: str, compress: bool = COMPRESS_PAYLOADS) -> Dict[str, str]:
+    """Payload fields holding a chunk text (`page_content`, or `page_content_z` when compressed)."""
+    global _compressor
+    if not compress or zstandard is None or len(text) < MIN_COMPRESS_CHARS:
+        return {TEXT_FIELD: text}
+    if _compressor is None:
+        _compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return {COMPRESSED_FIELD: base64.b64encode(_compressor.compress(text.encode("utf-8"))).decode("ascii")}
+
+def decode_text(payload: Optional[Dict[str, Any]]) -> str:
+    """Chunk text of a payload, whichever way it was stored ("" when the payload has none)."""
+    global _decompressor
+    if not payload:
+        return ""
+    if COMPRESSED_FIELD not in payload:
+        return payload.get(TEXT_FIELD, "")
+    if zstandard is None:
+        raise RuntimeError("Compressed chunk payloads need the zstandard package")
+    if _decompressor is None:
+        _decompressor = zstandard.ZstdDecompressor()
+    return _decompressor.decompress(base64.b64decode(payload[COMPRESSED_FIELD])).decode("utf-8")
@@ -0,0 +1,17 @@
+import uuid
+
+# Fixed namespace: point IDs are stable across processes and re-ingestions
+POINT_NAMESPACE = uuid.UUID("6f1c1e7a-3b9a-4d2e-9c4f-2a7d5e8b0c11")
+
+def make_doc_key(user_id: str, paper_id: str) -> str:
+    """
+    Key seeding a paper's point IDs. Stored in the payload (`metadata.doc_key`)
+    and kept when a paper's points are re-assigned to another user, so IDs
+    must always be derived from the payload value, never recomputed from user_id
+    (a later re-ingestion by the original user gets a suffixed key, see `claim_doc_key`).
+    """
+    return f"{user_id}:{paper_id}"
+
+def point_id(doc_key: str, level: str = "chunk", ordinal: int = 0) -> str:
+    """Deterministic Qdrant point ID of the `ordinal`-th point of a given level in a paper."""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{doc_key}:{level}:{ordinal}"))
@@ -63,6 +63,14 @@ def get_query_analysis_prompt() -> str:
               
         """
         
+def get_summary_and_analysis_prompt() -> str:
+    return get_query_analysis_prompt() + """
+        7. Write updatedSummary: summarize the conversation history (not the current user question) in a maximum of 4–6 concise sentences.
+        Include main topics, key facts or entities, key conclusions and unresolved questions. Exclude greetings, misunderstandings and off-topic content.
+        If no meaningful information exists, leave it empty.
+        For tasks 1-6, the conversation history is the conversation context: use it only as described in task 2.
+        """
+
 def get_generation_prompt(context_xml: str, summary: str) -> str:
     return f"""
     You are a world-class Research Scientist. 
@@ -5,6 +5,20 @@ from langgraph.graph import MessagesState
 from typing import Optional, Literal, List, Dict, Any
 from langchain_qdrant import QdrantVectorStore
 
+# Granularity of a point in the collection: one "paper" vector (title + abstract),
+# one "section" vector per section digest, and the "chunk" vectors used as context.
+# Points ingested before hierarchical indexing carry no level and are chunks.
+PointLevel = Literal["paper", "section", "chunk"]
+OUTLINE_LEVELS = ["paper", "section"]
+
+# Single source of the retrieval defaults (overridable per session via RuntimeContext.settings)
+DEFAULT_RETRIEVAL_SETTINGS: Dict[str, Any] = {
+    "retrieval_score_threshold": 0.45,
+    "retrieval_top_k": 5,
+    "adaptive_retrieval": True, # False: fixed group sizes/top-k, no score-based pruning
+    "neighbour_window": 1,      # ±k neighbouring chunks stitched around the top hits (0 disables)
+}
+
 class MetadataHints(BaseModel):
     titles: List[str] = Field(
         default_factory=list,
@@ -27,6 +41,7 @@ class State(MessagesState):
     """State for the workflow"""
     # messages: Annotated[Sequence[BaseMessage], add_messages]
     conversationSummary: str = ""
+    fastPath: Literal["casual", "research", "none"] = "none" # set by the local pre-classifier
     originalQuestion: str = ""
     intent: Literal["research", "casual"] = "research"
     questionIsClear: bool = True
@@ -47,10 +62,7 @@ class RuntimeContext:
     user_id: str
     vectorstore: QdrantVectorStore       
     metadata: Dict[str, Any]  
-    settings: Dict[str, Any] = field(default_factory=lambda: {
-        "retrieval_score_threshold": 0.45,
-        "retrieval_top_k": 5
-    })
+    settings: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_RETRIEVAL_SETTINGS))
 
 class QueryAnalysis(BaseModel):
     intent: Literal["research", "casual"] = Field(
@@ -73,6 +85,13 @@ class QueryAnalysis(BaseModel):
         description="metadata (titles, authors, topics, publication years) mentionned in the user query"
     )
 
+class QueryAnalysisWithSummary(QueryAnalysis):
+    """Query analysis and conversation summary produced by one LLM call."""
+    updatedSummary: str = Field(
+        default="",
+        description="Concise summary (4-6 sentences) of the conversation history before the current question. Empty if nothing meaningful was discussed."
+    )
+
 class DocRelevance(BaseModel):
     """Grade a single document's relevance to the question."""
     grade: Literal["relevant","fully answers the question", "partially answers the question", "completely irrelevant"]
@@ -0,0 +1,371 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.config import get_config
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Buckets for size histograms (tokens per turn, documents per retrieval)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 12, 20, 50)
+# Number of finished request traces kept in memory for export
+TRACE_BUFFER_SIZE = 200
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text format (backslash, double quote, line feed)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process store of counters and latency histograms.
+    Rendered in the Prometheus text exposition format.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._custom_buckets: Dict[str, Tuple[float, ...]] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = defaultdict(dict)
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + value
+
+    def set_buckets(self, name: str, buckets: Tuple[float, ...]) -> None:
+        """Use non-latency buckets for a histogram (must be called before its first observation)."""
+        self._custom_buckets[name] = buckets
+
+    def buckets_for(self, name: str) -> Tuple[float, ...]:
+        return self._custom_buckets.get(name, self.buckets)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._key(labels)
+        buckets = self.buckets_for(name)
+        with self._lock:
+            series = self._histograms[name]
+            # Layout: [bucket_0, ..., bucket_n, sum, count]
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = [0.0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of all series."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(k), "sum": h[-2], "count": h[-1]} for k, h in series.items()]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        def fmt(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(key) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in items) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    cumulative = 0.0
+                    for bound, n in zip(self.buckets_for(name), hist):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{fmt(key, ('le', str(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt(key, ('le', '+Inf'))} {hist[-1]}")
+                    lines.append(f"{name}_sum{fmt(key)} {hist[-2]}")
+                    lines.append(f"{name}_count{fmt(key)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+metrics = MetricsRegistry()
+metrics.set_buckets("arxivhub_request_prompt_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("arxivhub_retrieval_context_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("arxivhub_retrieval_docs", COUNT_BUCKETS)
+metrics.set_buckets("arxivhub_packed_context_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("arxivhub_generation_prompt_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("arxivhub_generation_completion_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("arxivhub_embedding_batch_size", COUNT_BUCKETS)
+_recent_traces: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+
+def export_traces(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Return the most recent finished request traces, newest last."""
+    traces = list(_recent_traces)
+    return traces[-limit:] if limit else traces
+
+def _token_usage(response) -> Tuple[int, int]:
+    """Extract (prompt, completion) token counts from an LLMResult."""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not (prompt_tokens or completion_tokens):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+class RequestTracer(BaseCallbackHandler):
+    """
+    Per-request LangChain callback handler.
+    Records wall time per graph node and LLM calls/tokens per model, both as
+    global metrics and as a trace exported once the graph run finishes.
+    """
+    run_inline = True  # cheap bookkeeping: stay on the event loop thread
+
+    def __init__(self, user_id: str = "", thread_id: str = ""):
+        self.trace_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.thread_id = thread_id
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.totals: Dict[str, float] = defaultdict(float) # per-turn sums (LLM tokens, context tokens, ...)
+        self._root_run = None
+        self._open: Dict[Any, Tuple[float, Dict[str, Any]]] = {}
+
+    def add_span(self, name: str, kind: str, start: float, duration: float, **attributes) -> None:
+        self.spans.append({
+            "name": name,
+            "kind": kind,
+            "offset_ms": round((start - self.started_at) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attributes,
+        })
+
+    # --- Graph nodes ---
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        if parent_run_id is None and self._root_run is None:
+            self._root_run = run_id
+            self._open[run_id] = (time.perf_counter(), {"name": "request", "kind": "request"})
+            return
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node runnable itself, not the chains nested inside it
+        if node and kwargs.get("name") == node:
+            self._open[run_id] = (time.perf_counter(), {"name": node, "kind": "node"})
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close_chain(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close_chain(run_id, "error")
+
+    def _close_chain(self, run_id, status: str) -> None:
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        start, info = opened
+        duration = time.perf_counter() - start
+        wall_start = time.time() - duration
+        if info["kind"] == "node":
+            metrics.observe("arxivhub_node_duration_seconds", duration, node=info["name"])
+            if status == "error":
+                metrics.inc("arxivhub_node_errors_total", node=info["name"])
+            self.add_span(info["name"], "node", wall_start, duration, status=status)
+        elif run_id == self._root_run:
+            metrics.observe("arxivhub_request_duration_seconds", duration)
+            metrics.inc("arxivhub_requests_total", status=status)
+            self._finish(duration, status)
+
+    # --- LLM calls ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata, kwargs)
+
+    def _start_llm(self, run_id, metadata: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("invocation_params", {}).get("model", "unknown")
+        self._open[run_id] = (time.perf_counter(), {
+            "name": "llm",
+            "kind": "llm",
+            "role": metadata.get("model_role", "unknown"),
+            "model": model,
+            "node": metadata.get("langgraph_node", ""),
+        })
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        start, info = opened
+        duration = time.perf_counter() - start
+        prompt_tokens, completion_tokens = _token_usage(response)
+        labels = {"role": info["role"], "model": info["model"]}
+        metrics.inc("arxivhub_llm_requests_total", status="ok", **labels)
+        metrics.observe("arxivhub_llm_duration_seconds", duration, **labels)
+        metrics.inc("arxivhub_llm_tokens_total", prompt_tokens, kind="prompt", **labels)
+        metrics.inc("arxivhub_llm_tokens_total", completion_tokens, kind="completion", **labels)
+        self.totals["prompt_tokens"] += prompt_tokens
+        self.totals["completion_tokens"] += completion_tokens
+        self.add_span(
+            info["role"], "llm", time.time() - duration, duration,
+            model=info["model"], node=info["node"],
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        _, info = opened
+        metrics.inc("arxivhub_llm_requests_total", status="error", role=info["role"], model=info["model"])
+
+    def _finish(self, duration: float, status: str) -> None:
+        metrics.observe("arxivhub_request_prompt_tokens", self.totals["prompt_tokens"])
+        trace = {
+            "trace_id": self.trace_id,
+            "user_id": self.user_id,
+            "thread_id": self.thread_id,
+            "started_at": self.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "status": status,
+            "totals": dict(self.totals),
+            "spans": self.spans,
+        }
+        _recent_traces.append(trace)
+        logger.debug(f"Trace {self.trace_id}: {json.dumps(trace)}")
+
+def _active_tracer() -> Optional[RequestTracer]:
+    """Return the tracer of the graph run currently executing, if any."""
+    try:
+        config = get_config()
+    except RuntimeError:  # Not inside a LangGraph node
+        return None
+    callbacks = config.get("callbacks")
+    handlers = getattr(callbacks, "handlers", callbacks) or []
+    for handler in handlers:
+        if isinstance(handler, RequestTracer):
+            return handler
+    return None
+
+def add_to_trace(**values: float) -> None:
+    """Accumulate per-turn totals (e.g. context tokens) on the active request trace."""
+    tracer = _active_tracer()
+    if tracer is not None:
+        for name, value in values.items():
+            tracer.totals[name] += value
+
+@contextmanager
+def timed(service: str, op: str, **attributes):
+    """
+    Time a call to an external service (qdrant, embedding, tavily, ...).
+    Feeds the `arxivhub_<service>_duration_seconds` histogram and, when called
+    from inside a traced graph node, adds a span to the request trace.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        metrics.inc(f"arxivhub_{service}_errors_total", op=op)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        metrics.observe(f"arxivhub_{service}_duration_seconds", duration, op=op)
+        tracer = _active_tracer()
+        if tracer is not None:
+            tracer.add_span(service, service, time.time() - duration, duration, op=op, status=status, **attributes)
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper counting calls, embedded texts and latency."""
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        metrics.inc("arxivhub_embedding_texts_total", len(texts), op="documents")
+        with timed("embedding", "documents", texts=len(texts)):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        metrics.inc("arxivhub_embedding_texts_total", op="query")
+        with timed("embedding", "query", texts=1):
+            return self.inner.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        metrics.inc("arxivhub_embedding_texts_total", len(texts), op="documents")
+        with timed("embedding", "documents", texts=len(texts)):
+            return await self.inner.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        metrics.inc("arxivhub_embedding_texts_total", op="query")
+        with timed("embedding", "query", texts=1):
+            return await self.inner.aembed_query(text)
+
+    @property
+    def batches_queries(self) -> bool:
+        """Whether the wrapped embedder can embed several queries in one request."""
+        return callable(getattr(self.inner, "aembed_queries", None))
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one request (only when `batches_queries`)."""
+        metrics.inc("arxivhub_embedding_texts_total", len(texts), op="query")
+        with timed("embedding", "query", texts=len(texts)):
+            return await self.inner.aembed_queries(texts)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body = metrics.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.startswith("/traces"):
+            body = json.dumps(export_traces()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # Silence per-scrape access logs
+        pass
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus) and /traces (JSON) from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    logger.info(f"Metrics server listening on {host}:{port}")
+    return server
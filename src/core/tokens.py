@@ -0,0 +1,23 @@
+import re
+from functools import lru_cache
+
+try:  # Optional: exact BPE counts when tiktoken is installed
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Sub-word tokenizers split long/rare words: ~1.3 tokens per word-or-symbol
+WORD_TO_TOKEN_RATIO = 1.3
+
+@lru_cache(maxsize=8)
+def _encoding(name: str):
+    return tiktoken.get_encoding(name)
+
+def count_tokens(text: str, encoding: str = "cl100k_base") -> int:
+    """Token count of `text`: exact with tiktoken, otherwise a word-based estimate."""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding(encoding).encode(text, disallowed_special=()))
+    return int(len(TOKEN_PATTERN.findall(text)) * WORD_TO_TOKEN_RATIO) + 1
@@ -1,9 +1,12 @@
+from config import PRE_CLASSIFIER, FUSED_ANALYSIS
 from core.schemas import State, RuntimeContext
 from langgraph.graph import START, END, StateGraph
 from langgraph.checkpoint.memory import InMemorySaver
 from rag import (
+    pre_classify,
     summarize_conversation_history,
     analyze_query,
+    summarize_and_analyze,
     fuzzy_match_papers,
     retrieve, 
     grade_docs, 
@@ -17,6 +20,10 @@ from rag import (
 checkpointer = InMemorySaver()
 
 # Routing functions
+def dispatch_fast_path(state: State):
+    """Skip the analysis LLM when the pre-classifier is confident"""
+    return state.get("fastPath", "none")
+
 def dispatch_query(state: State):
     """Decide on general talk vs RAG"""
     if not state.get("questionIsClear", True):
@@ -35,8 +42,14 @@ def route_by_knowledge_sufficiency(state: State):
 graph_builder = StateGraph(State, context_schema=RuntimeContext)
 
 # Nodes
-graph_builder.add_node("summarize_conv", summarize_conversation_history)
-graph_builder.add_node("analyze_query", analyze_query)
+if FUSED_ANALYSIS:
+    # One LLM call for both the conversation summary and the query analysis
+    graph_builder.add_node("summarize_and_analyze", summarize_and_analyze)
+    analysis_entry = analysis_exit = "summarize_and_analyze"
+else:
+    graph_builder.add_node("summarize_conv", summarize_conversation_history)
+    graph_builder.add_node("analyze_query", analyze_query)
+    analysis_entry, analysis_exit = "summarize_conv", "analyze_query"
 graph_builder.add_node("scope_context", fuzzy_match_papers)
 graph_builder.add_node("retrieve", retrieve)
 graph_builder.add_node("grade_docs", grade_docs)
@@ -46,10 +59,24 @@ graph_builder.add_node("generate", generate)
 graph_builder.add_node("handle_general_talk", handle_general_talk)
 
 # Edges
-graph_builder.add_edge(START, "summarize_conv")
-graph_builder.add_edge("summarize_conv", "analyze_query")
+if PRE_CLASSIFIER:
+    graph_builder.add_node("pre_classify", pre_classify)
+    graph_builder.add_edge(START, "pre_classify")
+    graph_builder.add_conditional_edges(
+        "pre_classify", # local fast path: small talk / self-contained questions skip query analysis
+        dispatch_fast_path,
+        {
+            "casual": "handle_general_talk",
+            "research": "scope_context",
+            "none": analysis_entry
+        }
+    )
+else:
+    graph_builder.add_edge(START, analysis_entry)
+if not FUSED_ANALYSIS:
+    graph_builder.add_edge("summarize_conv", "analyze_query")
 graph_builder.add_conditional_edges(
-    "analyze_query", # route to RAG or direct generation according to the user query 
+    analysis_exit, # route to RAG or direct generation according to the user query 
     dispatch_query,
     {   
         "clarify": END,
@@ -77,7 +104,9 @@ workflow = graph_builder.compile(
     checkpointer=checkpointer
 )
 
-img = workflow.get_graph(xray=True).draw_mermaid_png()
-with open("assets/workflow.png", "wb") as f:
-    f.write(img)
+if __name__ == "__main__":
+    # Regenerate the workflow diagram (requires network access to mermaid.ink)
+    img = workflow.get_graph(xray=True).draw_mermaid_png()
+    with open("assets/workflow.png", "wb") as f:
+        f.write(img)
 
@@ -1,20 +1,57 @@
 from .paperingestion import (
     load_paper_metadata, 
+    read_paper_metadata,
     save_paper_metadata,
     preprocess,
     update_paper_metadata,
     ingest_papers,
+    index_chunks,
     save_notes,
     delete_paper, 
-    get_num_vectors
+    get_num_vectors,
+    is_valid_user_id,
+    user_exists
 )
+from .arxiv_ids import validate_arxiv_id, parse_ids
+from .chunking import get_chunker, detect_sections
+from .bulk import bulk_ingest_papers
+from .library_ops import delete_papers, clear_library, transfer_papers
+from .inventory import InventoryIndex, inventories
+from .metadata_cache import MetadataCache, metadata_cache
+from .library_stats import LibraryStats, library_stats
+from .snapshots import export_library, import_library
+from .importer import import_reading_list, read_reading_list, parse_bibtex, ImportStats
 __all__ = [
     "load_paper_metadata", 
+    "read_paper_metadata",
     "save_paper_metadata",
     "preprocess",
     "update_paper_metadata",
     "ingest_papers",
+    "index_chunks",
     "save_notes",
     "delete_paper", 
-    "get_num_vectors"
+    "get_num_vectors",
+    "is_valid_user_id",
+    "user_exists",
+    "validate_arxiv_id",
+    "parse_ids",
+    "get_chunker",
+    "detect_sections",
+    "bulk_ingest_papers",
+    "delete_papers",
+    "clear_library",
+    "transfer_papers",
+    "import_reading_list",
+    "read_reading_list",
+    "parse_bibtex",
+    "ImportStats",
+    "InventoryIndex",
+    "inventories",
+    "MetadataCache",
+    "metadata_cache",
+    "LibraryStats",
+    "library_stats",
+    "export_library",
+    "import_library"
 ]
\ No newline at end of file
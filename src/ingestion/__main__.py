@@ -0,0 +1,62 @@
+"""
+Command-line bulk import of reading lists (arXiv ID lists or BibTeX files).
+
+    cd src && python -m ingestion --user demo_user reading_list.txt refs.bib [--workers 8]
+
+Imports are resumable: outcomes are journaled in user_data/<user>/import_journal.jsonl
+and papers already imported (or already in the library) are skipped on re-runs.
+"""
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from config import init_db, get_vectorstore
+from ingestion.importer import collect_ids, import_reading_list
+
+def print_progress(event) -> None:
+    chunks = f" ({event['chunks']} chunks)" if "chunks" in event else ""
+    print(f"[{event['done']}/{event['total']}] {event['id']}: {event['stage']}{chunks}", file=sys.stderr)
+
+async def run_import(args) -> int:
+    arxiv_ids = collect_ids(args.files)
+    if not arxiv_ids:
+        logging.error("No valid arXiv IDs found.")
+        return 1
+
+    await init_db()
+    vectorstore = await get_vectorstore()
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers else None
+    try:
+        stats = await import_reading_list(
+            args.user, vectorstore, arxiv_ids,
+            executor=executor,
+            retry_failed=args.retry_failed,
+            on_progress=None if args.quiet else print_progress,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(stats.summary())
+    for failure in stats.failures:
+        print(f"• {failure['id']}: {failure['reason']}")
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+    return 1 if stats.failed and not stats.ingested else 0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import arXiv papers into a user's library.")
+    parser.add_argument("files", nargs="+", help="arXiv ID lists (one per line or comma-separated) or .bib files")
+    parser.add_argument("--user", required=True, help="target user id")
+    parser.add_argument("--workers", type=int, default=0, help="parser processes (default: CPU_POOL_SIZE)")
+    parser.add_argument("--retry-failed", action="store_true", help="retry papers journaled as failed")
+    parser.add_argument("--stats-json", help="write import statistics to this file")
+    parser.add_argument("--quiet", action="store_true", help="no per-paper progress output")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run_import(args)))
+
+if __name__ == "__main__":
+    main()
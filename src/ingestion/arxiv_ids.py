@@ -0,0 +1,19 @@
+import re
+from typing import List, Tuple
+
+def validate_arxiv_id(arxiv_id: str) -> bool:
+    pattern = r'^(\d{4}\.\d{4,5}(v\d+)?|[a-z]+(-[a-z]+)*/\d{7}(v\d+)?)$'
+    return bool(re.match(pattern, arxiv_id))
+
+def parse_ids(text: str) -> Tuple[List[str], List[str]]:
+    if not text:
+        return [], []
+    raw = re.split(r"[,\n\s]+", text)
+    all_entries = [entry.strip(" '\"") for entry in raw if entry.strip(" '\"")]
+    valid_ids, invalid_entries = [], []
+    for entry in all_entries:
+        if validate_arxiv_id(entry):
+            valid_ids.append(entry)
+        else:
+            invalid_entries.append(entry)
+    return valid_ids, invalid_entries
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from core.executors import get_process_pool
+from ingestion import paperingestion
+from ingestion.paperingestion import (
+    preprocess,
+    iter_outline,
+    index_chunks,
+    claim_doc_key,
+    record_paper_metadata,
+    discard_partial_paper,
+    save_paper_metadata,
+    build_ingestion_report,
+    ProgressCallback,
+)
+from ingestion.inventory import inventories
+from ingestion.library_stats import library_stats, paper_vectors
+
+# Save the metadata file every N ingested papers rather than after each one
+METADATA_FLUSH_EVERY = 25
+
+def fetch_and_split(user_id: str, arxiv_id: str) -> Dict[str, Any]:
+    """
+    Worker-process task: download + parse the PDF and split it into chunks.
+    Returns only plain (picklable) data to the parent process.
+    """
+    docs = paperingestion.ArxivLoader(query=arxiv_id).load()
+    if not docs:
+        return {"id": arxiv_id, "error": "No content found on ArXiv"}
+    doc = docs[0]
+    doc_metadata = dict(doc.metadata)
+    chunks = preprocess(user_id, doc, arxiv_id)
+    return {
+        "id": arxiv_id,
+        "doc_metadata": doc_metadata,
+        "chunks": [(c.page_content, c.metadata) for c in chunks],
+        "outline": [(c.page_content, c.metadata) for c in iter_outline(user_id, doc, arxiv_id)],
+    }
+
+async def bulk_ingest_papers(
+    user_id: str,
+    paper_metadata: Dict[str, Any],
+    vectorstore: QdrantVectorStore,
+    arxiv_ids: List[str],
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Ingest many papers with download+parse+split fanned out to a process pool.
+    Papers are embedded and upserted as soon as their worker finishes, while
+    the remaining PDFs keep being parsed. Same return format as `ingest_papers`.
+    Papers are reported "indexed" once in Qdrant and "upserted" only after the
+    metadata flush covering them, so a resumed job redoes unsaved papers.
+    """
+    executor = executor or get_process_pool()
+    max_in_flight = max_in_flight or 2 * getattr(executor, "_max_workers", 4)
+    loop = asyncio.get_running_loop()
+
+    successful: List[str] = []
+    failed: List[Dict[str, str]] = []
+    queue = []
+    for arxiv_id in dict.fromkeys(arxiv_ids):  # dedupe, keep order
+        if arxiv_id in paper_metadata:
+            failed.append({"id": arxiv_id, "reason": "Paper already ingested"})
+        else:
+            queue.append(arxiv_id)
+    total = len(queue)
+    skipped = len(failed) # already ingested: not part of the progress count
+    unsaved: List[tuple] = [] # (arxiv_id, chunks) indexed but not yet in the metadata file
+
+    def report(arxiv_id: str, stage: str, **extra) -> None:
+        if on_progress is not None:
+            on_progress({"id": arxiv_id, "stage": stage, "done": len(successful) + len(failed) - skipped, "total": total, **extra})
+
+    async def flush() -> None:
+        # "upserted" is the resumable checkpoint: only report it once the metadata file lists the paper
+        await save_paper_metadata(user_id, paper_metadata)
+        for arxiv_id, num_chunks in unsaved:
+            report(arxiv_id, "upserted", chunks=num_chunks)
+        unsaved.clear()
+
+    in_flight: Dict[asyncio.Future, str] = {}
+    next_idx = 0
+    while in_flight or next_idx < len(queue):
+        # Keep the pool busy without materializing every paper at once
+        while next_idx < len(queue) and len(in_flight) < max_in_flight:
+            arxiv_id = queue[next_idx]
+            next_idx += 1
+            in_flight[loop.run_in_executor(executor, fetch_and_split, user_id, arxiv_id)] = arxiv_id
+
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            arxiv_id = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append({"id": arxiv_id, "reason": f"Ingestion failed: {e}"})
+                report(arxiv_id, "failed", reason=failed[-1]["reason"])
+                continue
+            if "error" in result:
+                failed.append({"id": arxiv_id, "reason": result["error"]})
+                report(arxiv_id, "failed", reason=failed[-1]["reason"])
+                continue
+
+            # Documents are rebuilt lazily, one embedding batch at a time
+            chunks = (Document(page_content=text, metadata=meta) for text, meta in result.pop("chunks"))
+            report(arxiv_id, "fetched")
+            try:
+                doc_key = await claim_doc_key(vectorstore, user_id, arxiv_id)
+                num_chunks = await index_chunks(vectorstore, chunks, on_batch=lambda stage, n: report(arxiv_id, stage, chunks=n), doc_key=doc_key)
+                outline = (Document(page_content=text, metadata=meta) for text, meta in result["outline"])
+                num_outline = await index_chunks(vectorstore, outline, doc_key=doc_key)
+            except Exception as e:
+                await discard_partial_paper(user_id, vectorstore, arxiv_id)
+                failed.append({"id": arxiv_id, "reason": f"Vector store update failed: {e}"})
+                report(arxiv_id, "failed", reason=failed[-1]["reason"])
+                continue
+            record_paper_metadata(paper_metadata, result["doc_metadata"], arxiv_id, num_chunks, num_chunks + num_outline)
+            inventories.upsert(user_id, arxiv_id, paper_metadata[arxiv_id])
+            library_stats.upsert(user_id, arxiv_id, paper_vectors(paper_metadata[arxiv_id]))
+            successful.append(arxiv_id)
+            unsaved.append((arxiv_id, num_chunks))
+            report(arxiv_id, "indexed", chunks=num_chunks)
+            logging.info(f"✅ Successfully ingested {arxiv_id} ({len(successful)}/{total})")
+
+            if len(unsaved) >= METADATA_FLUSH_EVERY:
+                await flush()
+
+    if unsaved:
+        await flush()
+    return build_ingestion_report(successful, failed)
@@ -0,0 +1,231 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Literal, Type, Iterator
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from core.tokens import count_tokens
+from core.point_ids import make_doc_key
+
+SEPARATORS = ["\n\n", "\n", ".", ";", ",", " "]
+
+# Sizing presets: (chunk_size, chunk_overlap, min_chunk_length) in the unit of the sizing mode
+SIZING_PRESETS = {
+    "chars": (1500, 200, 300),
+    "tokens": (380, 50, 75),
+}
+
+# Characters of a section's opening text embedded as its "section" level vector
+SECTION_DIGEST_CHARS = 1200
+
+SectionKind = Literal["front", "abstract", "body", "bibliography", "appendix"]
+
+KNOWN_HEADINGS = (
+    r"abstract|introduction|background|related work|preliminaries|method(?:s|ology)?|approach|model|"
+    r"experiments?(?: and results)?|experimental (?:setup|results)|evaluation|results|analysis|discussion|"
+    r"limitations|future work|conclusions?(?: and future work)?|acknowledge?ments?|references|bibliography|"
+    r"appendix(?:\s+[a-z0-9]+)?(?:[:.\s].*)?|supplementary material"
+)
+# "3 Method", "3.2. Training details", "IV. EXPERIMENTS"
+NUMBERED_HEADING = re.compile(r"^\s*((?:\d+(?:\.\d+)*|[IVX]+)\.?)\s+([A-Z][^\n]{1,80})$")
+# "Abstract", "RELATED WORK", "Appendix B: Proofs"
+NAMED_HEADING = re.compile(rf"^\s*(?:\d+\.?\s+)?({KNOWN_HEADINGS})\s*:?\s*$", re.IGNORECASE)
+# Appendix sections after the bibliography: "A Proof of Lemma 1", "B.2 Hyperparameters"
+LETTERED_HEADING = re.compile(r"^\s*([A-H](?:\.\d+)*)\.?\s+([A-Z][^\n]{1,80})$")
+BIBLIOGRAPHY = re.compile(r"^(references|bibliography)$", re.IGNORECASE)
+# Signals of a citation entry: "[12]", "Smith, J.", "et al.", "(2019)", "arXiv:"
+CITATION_SIGNALS = re.compile(r"^\s*\[\d+\]|et al\.|\(\d{4}[a-z]?\)|\b(?:19|20)\d{2}[a-z]?\.|arxiv:|doi", re.IGNORECASE | re.MULTILINE)
+
+@dataclass
+class Section:
+    name: str
+    kind: SectionKind
+    start: int # character offset in the paper text
+    text: str
+
+def _heading(line: str, after_bibliography: bool) -> Optional[str]:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 90 or stripped.endswith((".", ",")) and not NAMED_HEADING.match(stripped):
+        return None
+    match = NAMED_HEADING.match(stripped)
+    if match:
+        return match.group(1).strip()
+    match = NUMBERED_HEADING.match(stripped)
+    if match and len(match.group(2).split()) <= 10 and not re.search(r"\d{2,}", match.group(2)):
+        return f"{match.group(1)} {match.group(2).strip()}"
+    if after_bibliography:
+        match = LETTERED_HEADING.match(stripped)
+        if match and len(match.group(2).split()) <= 10:
+            return f"{match.group(1)} {match.group(2).strip()}"
+    return None
+
+def _looks_like_bibliography(text: str) -> bool:
+    lines = [l for l in text.splitlines() if l.strip()]
+    if not lines:
+        return False
+    return len(CITATION_SIGNALS.findall(text)) >= max(3, len(lines) // 4)
+
+def iter_sections(text: str) -> Iterator[Section]:
+    """
+    Lazily split paper text at detected section headings.
+    The bibliography is the last References/Bibliography heading in the second
+    half of the paper whose body reads like citations; lettered headings after
+    it (and any section following it) are treated as appendix sections.
+    """
+    heads = []
+    offset = 0
+    seen_bibliography = False
+    for line in text.splitlines(keepends=True):
+        name = _heading(line, seen_bibliography)
+        if name:
+            heads.append((offset, name))
+            if BIBLIOGRAPHY.match(name) and offset > len(text) * 0.5:
+                seen_bibliography = True
+        offset += len(line)
+
+    # Only the last qualifying References heading is the real bibliography
+    bibliography_start = None
+    for start, name in reversed(heads):
+        if BIBLIOGRAPHY.match(name) and start > len(text) * 0.5:
+            bibliography_start = start
+            break
+
+    boundaries = [(0, "Front matter")] + heads + [(len(text), "")]
+    after_bibliography = False
+    for i, ((start, name), (end, _)) in enumerate(zip(boundaries, boundaries[1:])):
+        body = text[start:end]
+        if i > 0:
+            body = body.split("\n", 1)[1] if "\n" in body else "" # drop the heading line
+        if not body.strip():
+            continue
+        lowered = name.lower()
+        kind: SectionKind = "body"
+        if i == 0:
+            kind = "front"
+        elif lowered == "abstract":
+            kind = "abstract"
+        elif start == bibliography_start and _looks_like_bibliography(body):
+            kind = "bibliography"
+            after_bibliography = True
+        elif lowered.startswith(("appendix", "supplementary")) or after_bibliography:
+            kind = "appendix"
+        yield Section(name=name, kind=kind, start=start, text=body)
+
+def detect_sections(text: str) -> List[Section]:
+    return list(iter_sections(text))
+
+class Chunker(ABC):
+    """Base class: turns a loaded paper into chunk Documents with minimal metadata."""
+    name = "base"
+
+    def __init__(self, sizing: Literal["chars", "tokens"] = "chars", chunk_size: Optional[int] = None,
+                 chunk_overlap: Optional[int] = None, min_chunk_length: Optional[int] = None):
+        default_size, default_overlap, default_min = SIZING_PRESETS[sizing]
+        self.sizing = sizing
+        self.length = count_tokens if sizing == "tokens" else len
+        self.min_chunk_length = default_min if min_chunk_length is None else min_chunk_length
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size or default_size,
+            chunk_overlap=default_overlap if chunk_overlap is None else chunk_overlap,
+            separators=SEPARATORS,
+            length_function=self.length,
+        )
+
+    @abstractmethod
+    def iter_split(self, user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+        """Yield chunks lazily, so callers can embed them in bounded batches."""
+
+    def split(self, user_id: str, doc: Document, arxiv_id: str) -> List[Document]:
+        return list(self.iter_split(user_id, doc, arxiv_id))
+
+    def iter_outline(self, user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+        """Coarse documents for hierarchical retrieval: one "paper" level doc (title + abstract)."""
+        title = doc.metadata.get("Title")
+        summary = doc.metadata.get("Summary", "")
+        text = f"{title or ''}\n\n{summary}".strip()
+        if text:
+            yield self._chunk(text, user_id, arxiv_id, title, level="paper")
+
+    def _chunk(self, text: str, user_id: str, arxiv_id: str, title: Optional[str], **extra) -> Document:
+        return Document(
+            page_content=text,
+            metadata={
+                "user_id": user_id,
+                "paper_id": arxiv_id,
+                "title": title,
+                "doc_key": make_doc_key(user_id, arxiv_id),
+                "level": "chunk",
+                **extra,
+            },
+        )
+
+    @staticmethod
+    def _locate(text: str, piece: str, cursor: int) -> int:
+        """Character offset of `piece` in the paper, searching forward from `cursor`."""
+        position = text.find(piece, cursor)
+        return position if position >= 0 else cursor
+
+class RecursiveChunker(Chunker):
+    """Legacy strategy: cut at the first 'References', then fixed-size recursive splitting."""
+    name = "recursive"
+
+    def iter_split(self, user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+        content = doc.page_content
+        if "References" in content:
+            content = content[:content.index("References")]
+        title = doc.metadata.get("Title")
+        index = cursor = 0
+        for piece in self.splitter.split_text(content):
+            cursor = self._locate(content, piece, cursor)
+            if self.length(piece) > self.min_chunk_length: # Filter out tiny chunks
+                yield self._chunk(piece, user_id, arxiv_id, title, chunk_index=index, start_offset=cursor)
+                index += 1
+
+class SectionChunker(Chunker):
+    """
+    Structure-preserving strategy: chunks never straddle a section boundary,
+    only the real bibliography is dropped, and each chunk records its section.
+    """
+    name = "section"
+
+    def iter_split(self, user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+        title = doc.metadata.get("Title")
+        index = 0
+        # One section in memory at a time, whatever the paper length
+        for section in iter_sections(doc.page_content):
+            if section.kind == "bibliography":
+                continue
+            cursor = section.start
+            pieces = self.splitter.split_text(section.text)
+            for piece in pieces:
+                cursor = self._locate(doc.page_content, piece, cursor)
+                # Keep short sections (e.g. a brief abstract) whole rather than dropping them
+                if self.length(piece) > self.min_chunk_length or len(pieces) == 1 and self.length(piece) > self.min_chunk_length // 3:
+                    yield self._chunk(piece, user_id, arxiv_id, title, section=section.name, section_kind=section.kind,
+                                      chunk_index=index, start_offset=cursor)
+                    index += 1
+
+    def iter_outline(self, user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+        """Paper level doc, then one "section" level digest (heading + opening text) per section."""
+        yield from super().iter_outline(user_id, doc, arxiv_id)
+        title = doc.metadata.get("Title")
+        index = 0
+        for section in iter_sections(doc.page_content):
+            if section.kind in ("front", "bibliography"):
+                continue
+            digest = section.text[:SECTION_DIGEST_CHARS].strip()
+            if digest:
+                yield self._chunk(f"{section.name}\n{digest}", user_id, arxiv_id, title, level="section",
+                                  section=section.name, section_kind=section.kind, section_index=index, start_offset=section.start)
+                index += 1
+
+CHUNKERS: Dict[str, Type[Chunker]] = {
+    RecursiveChunker.name: RecursiveChunker,
+    SectionChunker.name: SectionChunker,
+}
+
+def get_chunker(strategy: str = "section", **kwargs: Any) -> Chunker:
+    """Instantiate a registered chunking strategy."""
+    if strategy not in CHUNKERS:
+        raise ValueError(f"Unknown chunking strategy '{strategy}'. Available: {sorted(CHUNKERS)}")
+    return CHUNKERS[strategy](**kwargs)
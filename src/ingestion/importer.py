@@ -0,0 +1,191 @@
+import re
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Set, Iterable
+from concurrent.futures import Executor
+from langchain_qdrant import QdrantVectorStore
+from config import BASE_USER_DATA_DIR
+from core.executors import run_blocking
+from ingestion.arxiv_ids import parse_ids, validate_arxiv_id
+from ingestion.bulk import bulk_ingest_papers
+from ingestion.paperingestion import load_paper_metadata, ProgressCallback
+
+# Import papers in slices so the journal is checkpointed regularly
+IMPORT_BATCH_SIZE = 50
+
+BIBTEX_ENTRY = re.compile(r"@\w+\s*\{", re.IGNORECASE)
+BIBTEX_ARXIV_HINTS = [
+    re.compile(r"eprint\s*=\s*[{\"]\s*(?:arxiv:)?([^}\"\s]+)\s*[}\"]", re.IGNORECASE),
+    re.compile(r"arxiv\.org/(?:abs|pdf)/([^\s}\"]+?)(?:\.pdf)?[\s}\"]", re.IGNORECASE),
+    re.compile(r"arxiv[:\s]+(\d{4}\.\d{4,5}(?:v\d+)?|[a-z\-]+/\d{7}(?:v\d+)?)", re.IGNORECASE),
+]
+
+def parse_bibtex(text: str) -> List[str]:
+    """Extract arXiv IDs from BibTeX entries (eprint fields, arxiv.org URLs, 'arXiv:' notes)."""
+    ids = []
+    starts = [m.start() for m in BIBTEX_ENTRY.finditer(text)] + [len(text)]
+    for begin, end in zip(starts, starts[1:]):
+        entry = text[begin:end]
+        for pattern in BIBTEX_ARXIV_HINTS:
+            match = pattern.search(entry)
+            if match and validate_arxiv_id(match.group(1).lower()):
+                ids.append(match.group(1).lower())
+                break
+    return ids
+
+def read_reading_list(path: Path) -> List[str]:
+    """Read arXiv IDs from a plain ID list or a BibTeX file, deduplicated in order."""
+    text = path.read_text()
+    if path.suffix.lower() == ".bib" or BIBTEX_ENTRY.search(text):
+        ids = parse_bibtex(text)
+    else:
+        ids, invalid = parse_ids(text)
+        if invalid:
+            logging.warning(f"{path}: ignoring {len(invalid)} entries not matching arXiv ID format")
+    return list(dict.fromkeys(ids))
+
+def get_journal_path(user_id: str) -> Path:
+    return BASE_USER_DATA_DIR / user_id / "import_journal.jsonl"
+
+class ImportJournal:
+    """
+    Append-only JSONL record of per-paper import outcomes.
+    Re-running an import skips failed papers; done ones are skipped only while still in the library.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = asyncio.Lock() # appends run in worker threads: keep them ordered
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:  # torn write from an interrupted run
+                    continue
+                entries[entry["id"]] = entry
+        return entries
+
+    def _append(self, entries: List[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    async def load(self) -> Dict[str, Dict[str, Any]]:
+        return await run_blocking(self._read)
+
+    async def record(self, entries: List[Dict[str, Any]]) -> None:
+        if entries:
+            async with self._lock:
+                await run_blocking(self._append, entries)
+
+@dataclass
+class ImportStats:
+    requested: int = 0
+    already_in_library: int = 0
+    resumed_from_journal: int = 0
+    ingested: int = 0
+    failed: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    failures: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def papers_per_second(self) -> float:
+        return self.ingested / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "papers_per_second": round(self.papers_per_second, 3)}
+
+    def summary(self) -> str:
+        return (
+            f"requested {self.requested} | skipped {self.already_in_library} in library, "
+            f"{self.resumed_from_journal} from journal | ingested {self.ingested} ({self.chunks} chunks) | "
+            f"failed {self.failed} | {self.elapsed_s:.1f}s ({self.papers_per_second:.2f} papers/s)"
+        )
+
+async def import_reading_list(
+    user_id: str,
+    vectorstore: QdrantVectorStore,
+    arxiv_ids: Iterable[str],
+    paper_metadata: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None,
+    retry_failed: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+) -> ImportStats:
+    """
+    Resumable bulk import built on `bulk_ingest_papers`.
+    Dedupes against the user's library and the import journal, then ingests in
+    slices of IMPORT_BATCH_SIZE. Each paper is journaled as soon as it is
+    upserted (metadata saved) or failed, so an interrupted import only redoes
+    the papers still in flight.
+    """
+    start = time.perf_counter()
+    ids = list(dict.fromkeys(arxiv_ids))
+    stats = ImportStats(requested=len(ids))
+    if paper_metadata is None:
+        paper_metadata = await load_paper_metadata(user_id)
+    journal = ImportJournal(get_journal_path(user_id))
+    journaled = await journal.load()
+
+    pending = []
+    for arxiv_id in ids:
+        if arxiv_id in paper_metadata:
+            stats.already_in_library += 1
+        # A paper journaled as done but no longer in the library (deleted, moved, cleared) is imported again
+        elif arxiv_id in journaled and journaled[arxiv_id]["status"] == "failed" and not retry_failed:
+            stats.resumed_from_journal += 1
+        else:
+            pending.append(arxiv_id)
+
+    chunk_counts: Dict[str, int] = {}
+    writes: List[asyncio.Task] = []
+    def track(event: Dict[str, Any]) -> None:
+        if event["stage"] == "upserted":
+            chunk_counts[event["id"]] = event.get("chunks", 0)
+            entry = {"id": event["id"], "status": "done", "chunks": event.get("chunks", 0), "at": time.time()}
+        elif event["stage"] == "failed":
+            entry = {"id": event["id"], "status": "failed", "reason": event.get("reason", ""), "at": time.time()}
+        else:
+            entry = None
+        if entry is not None:
+            writes.append(asyncio.get_running_loop().create_task(journal.record([entry])))
+        if on_progress is not None:
+            on_progress(event)
+
+    for i in range(0, len(pending), IMPORT_BATCH_SIZE):
+        batch = pending[i:i + IMPORT_BATCH_SIZE]
+        try:
+            result = await bulk_ingest_papers(user_id, paper_metadata, vectorstore, batch, executor=executor, on_progress=track)
+        finally:
+            # Outcomes reported before an interruption still reach the journal
+            await asyncio.gather(*writes)
+            writes.clear()
+
+        stats.ingested += len(result["successful"])
+        stats.failed += len(result["failed"])
+        stats.failures.extend(result["failed"])
+        stats.chunks += sum(chunk_counts.get(pid, 0) for pid in result["successful"])
+        logging.info(f"Import progress for {user_id}: {min(i + IMPORT_BATCH_SIZE, len(pending))}/{len(pending)}")
+
+    stats.elapsed_s = time.perf_counter() - start
+    return stats
+
+def collect_ids(paths: Iterable[Path]) -> List[str]:
+    """Union of the arXiv IDs found in several reading-list files."""
+    seen: Set[str] = set()
+    ids = []
+    for path in paths:
+        for arxiv_id in read_reading_list(Path(path)):
+            if arxiv_id not in seen:
+                seen.add(arxiv_id)
+                ids.append(arxiv_id)
+    return ids
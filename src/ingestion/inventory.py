@@ -0,0 +1,170 @@
+import re
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Any, Set, Tuple, Optional
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Searches remembered per user: refining a query filters the previous match set
+SEARCH_CACHE_SIZE = 8
+
+@dataclass
+class InventoryEntry:
+    paper_id: str
+    title: str
+    year: str
+    ingested_at: str
+
+def _tokens(text: str) -> Set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+def _entry_tokens(paper_id: str, metadata: Dict[str, Any]) -> Set[str]:
+    authors = metadata.get("Authors", "")
+    if isinstance(authors, (list, tuple)):
+        authors = " ".join(authors)
+    fields = [paper_id, metadata.get("Title", ""), authors, str(metadata.get("Published", "")), metadata.get("notes", "")]
+    return _tokens(" ".join(str(f) for f in fields if f))
+
+class InventoryIndex:
+    """
+    Searchable paper inventory of one user.
+    Papers are kept sorted by `ingested_at` (newest first), with an inverted index over
+    title / author / year / notes tokens. A page costs O(page) and a search
+    O(matches); ingest and delete update the index incrementally.
+    """
+    def __init__(self, paper_metadata: Optional[Dict[str, Any]] = None):
+        self._entries: Dict[str, InventoryEntry] = {}
+        self._order: List[Tuple[str, str]] = []      # (ingested_at, paper_id), ascending
+        self._postings: Dict[str, Set[str]] = {}     # token -> paper ids
+        self._vocabulary: List[str] = []             # sorted tokens (prefix search)
+        self._paper_tokens: Dict[str, Set[str]] = {}
+        self._searches: Dict[Tuple[str, ...], Set[str]] = {}
+        for paper_id, metadata in (paper_metadata or {}).items():
+            self.upsert(paper_id, metadata)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._entries
+
+    # --- Updates ---
+    def upsert(self, paper_id: str, metadata: Dict[str, Any]) -> None:
+        if paper_id in self._entries:
+            self.remove(paper_id)
+        entry = InventoryEntry(
+            paper_id=paper_id,
+            title=metadata.get("Title", "Unknown"),
+            year=str(metadata.get("Published", "Unknown")),
+            ingested_at=metadata.get("ingested_at", ""),
+        )
+        self._entries[paper_id] = entry
+        bisect.insort(self._order, (entry.ingested_at, paper_id))
+        tokens = _entry_tokens(paper_id, metadata)
+        self._paper_tokens[paper_id] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            postings.add(paper_id)
+        self._searches.clear()
+
+    def remove(self, paper_id: str) -> None:
+        entry = self._entries.pop(paper_id, None)
+        if entry is None:
+            return
+        i = bisect.bisect_left(self._order, (entry.ingested_at, paper_id))
+        if i < len(self._order) and self._order[i] == (entry.ingested_at, paper_id):
+            del self._order[i]
+        for token in self._paper_tokens.pop(paper_id, ()):
+            postings = self._postings[token]
+            postings.discard(paper_id)
+            if not postings:
+                del self._postings[token]
+                j = bisect.bisect_left(self._vocabulary, token)
+                del self._vocabulary[j]
+        self._searches.clear()
+
+    # --- Queries ---
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        matches: Set[str] = set()
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            matches |= self._postings[self._vocabulary[i]]
+            i += 1
+        return matches
+
+    def _match(self, terms: Tuple[str, ...]) -> Set[str]:
+        """Papers matching every term (as a token prefix), reusing the closest earlier search."""
+        if terms in self._searches:
+            return self._searches[terms]
+        # Incremental: a refined query ("trans" -> "transf", or an extra term)
+        # only narrows the matches of the query it extends
+        base: Optional[Set[str]] = None
+        for previous, matches in self._searches.items():
+            if len(previous) <= len(terms) and all(terms[k].startswith(t) for k, t in enumerate(previous)):
+                if base is None or len(matches) < len(base):
+                    base = matches
+        result: Optional[Set[str]] = None
+        for term in terms:
+            if base is not None:
+                candidates = {pid for pid in (result if result is not None else base) if any(t.startswith(term) for t in self._paper_tokens[pid])}
+            else:
+                hits = self._prefix_matches(term)
+                candidates = hits if result is None else result & hits
+            result = candidates
+            if not result:
+                break
+        result = result if result is not None else set()
+        if len(self._searches) >= SEARCH_CACHE_SIZE:
+            self._searches.pop(next(iter(self._searches)))
+        self._searches[terms] = result
+        return result
+
+    def page(self, page: int = 0, page_size: int = 10, query: str = "") -> Tuple[List[InventoryEntry], int]:
+        """Entries of one page (newest first) among the papers matching `query`, and the number of matches."""
+        start = max(page, 0) * page_size
+        terms = tuple(TOKEN_PATTERN.findall(query.lower()))
+        if not terms:
+            # Walk the sorted order from the newest end: O(page)
+            stop = len(self._order) - start
+            keys = self._order[max(stop - page_size, 0):max(stop, 0)]
+            return [self._entries[pid] for _, pid in reversed(keys)], len(self._order)
+        matches = self._match(terms)
+        ranked = sorted(matches, key=lambda pid: (self._entries[pid].ingested_at, pid), reverse=True)
+        return [self._entries[pid] for pid in ranked[start:start + page_size]], len(ranked)
+
+class InventoryRegistry:
+    """Process-wide inventory indexes, built lazily per user and updated on ingest, notes and delete."""
+    def __init__(self):
+        self._indexes: Dict[str, InventoryIndex] = {}
+
+    def get(self, user_id: str, paper_metadata: Dict[str, Any]) -> InventoryIndex:
+        index = self._indexes.get(user_id)
+        if index is None:
+            index = self._indexes[user_id] = InventoryIndex(paper_metadata)
+            logger.info(f"Built inventory index for {user_id} ({len(index)} papers)")
+        return index
+
+    def upsert(self, user_id: str, paper_id: str, metadata: Dict[str, Any]) -> None:
+        # Users without an index yet get it built from their metadata on first read
+        if user_id in self._indexes:
+            self._indexes[user_id].upsert(paper_id, metadata)
+
+    def remove(self, user_id: str, paper_id: str) -> None:
+        if user_id in self._indexes:
+            self._indexes[user_id].remove(paper_id)
+
+    def on_metadata_change(self, user_id: str, paper_metadata: Dict[str, Any], version: int) -> None:
+        """Safety net for writers that bypass the incremental updates: rebuild lazily when counts diverge."""
+        index = self._indexes.get(user_id)
+        if index is not None and len(index) != len(paper_metadata):
+            logger.info(f"Inventory index of {user_id} out of date (v{version}), rebuilding on next read")
+            self.drop(user_id)
+
+    def drop(self, user_id: str) -> None:
+        self._indexes.pop(user_id, None)
+
+inventories = InventoryRegistry()
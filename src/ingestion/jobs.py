@@ -0,0 +1,268 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Deque, Literal
+from config import BASE_USER_DATA_DIR, JOB_WORKERS, JOB_MAX_PER_USER, get_vectorstore
+from core.executors import run_blocking
+from ingestion.bulk import bulk_ingest_papers
+from ingestion.paperingestion import ingest_papers, load_paper_metadata
+from ingestion.library_ops import delete_papers, clear_library, transfer_papers
+from ingestion.library_stats import library_stats
+
+# Jobs with at least this many papers parse PDFs in the process pool
+BULK_JOB_THRESHOLD = 5
+# Finished jobs kept per user (persisted history)
+JOB_HISTORY = 20
+# Progress events kept per job for UI streaming
+JOB_EVENT_BUFFER = 200
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+JobKind = Literal["ingest", "delete", "clear", "move", "copy"]
+
+VERBS = {"ingest": "Ingesting", "delete": "Deleting", "clear": "Clearing", "move": "Moving", "copy": "Copying"}
+# Per-paper stages after which a paper needs no more work
+FINISHED_STAGES = ("upserted", "deleted", "moved", "copied", "failed")
+
+@dataclass
+class Job:
+    job_id: str
+    user_id: str
+    kind: JobKind
+    paper_ids: List[str]
+    target_user_id: Optional[str] = None # move / copy destination
+    status: JobStatus = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, str] = field(default_factory=dict) # paper_id -> last stage
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    message: str = ""
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def describe(self) -> str:
+        """One-line human-readable status for the UI."""
+        finished = sum(stage in FINISHED_STAGES for stage in self.progress.values())
+        verb = VERBS[self.kind]
+        if self.status == "queued":
+            return f"⏳ {verb} {len(self.paper_ids)} paper(s): queued"
+        if self.status == "running":
+            last = self.events[-1] if self.events else None
+            current = f" — {last['id']}: {last['stage']}" if last else ""
+            return f"🔄 {verb} {len(self.paper_ids)} paper(s): {finished}/{len(self.paper_ids)} done{current}"
+        return self.message
+
+def _jobs_path(user_id: str):
+    return BASE_USER_DATA_DIR / user_id / "jobs.json"
+
+class JobQueue:
+    """
+    Persistent background queue for ingestion and library (delete / clear / move / copy) jobs.
+
+    Jobs are scheduled round-robin across users (fair share), with at most
+    `per_user_limit` running jobs per user and `workers` jobs overall. Job state
+    is persisted per user, so a restart re-queues unfinished jobs and a browser
+    refresh can re-attach to them.
+    """
+    def __init__(self, workers: int = JOB_WORKERS, per_user_limit: int = JOB_MAX_PER_USER):
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self._jobs: Dict[str, Job] = {}
+        self._pending: Dict[str, Deque[str]] = {} # user_id -> queued job ids (FIFO)
+        self._running: Dict[str, int] = {}
+        self._turn: Deque[str] = deque() # round-robin order of users
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._persist_locks: Dict[str, asyncio.Lock] = {}
+
+    # --- Lifecycle ---
+    async def start(self) -> None:
+        """Restore persisted jobs and start the workers (idempotent)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Condition()
+        for job in await run_blocking(self._load_all):
+            self._jobs[job.job_id] = job
+            if job.active:
+                job.status = "queued" # interrupted jobs restart (ingestion skips finished papers)
+                self._enqueue(job)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+        logging.info(f"Job queue started with {self.workers} workers ({len(self._jobs)} jobs restored)")
+
+    # --- Public API ---
+    async def submit(self, user_id: str, kind: JobKind, paper_ids: List[str], target_user_id: Optional[str] = None) -> Job:
+        await self.start()
+        job = Job(
+            job_id=uuid.uuid4().hex[:12],
+            user_id=user_id,
+            kind=kind,
+            paper_ids=list(dict.fromkeys(paper_ids)),
+            target_user_id=target_user_id,
+        )
+        self._jobs[job.job_id] = job
+        await self._persist(user_id)
+        async with self._wakeup:
+            self._enqueue(job)
+            self._wakeup.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs_for(self, user_id: str, active_only: bool = False) -> List[Job]:
+        jobs = [j for j in self._jobs.values() if j.user_id == user_id and (j.active or not active_only)]
+        return sorted(jobs, key=lambda j: j.created_at)
+
+    def writing(self, user_id: str) -> bool:
+        """Whether an active job writes to the user's library (as owner or move / copy target)."""
+        return any(j.active and user_id in (j.user_id, j.target_user_id) for j in self._jobs.values())
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """Queue receiving every progress event of the user's jobs."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=JOB_EVENT_BUFFER)
+        self._subscribers.setdefault(user_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(user_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+
+    # --- Scheduling ---
+    def _enqueue(self, job: Job) -> None:
+        self._pending.setdefault(job.user_id, deque()).append(job.job_id)
+        if job.user_id not in self._turn:
+            self._turn.append(job.user_id)
+
+    def _next_job(self) -> Optional[Job]:
+        """Round-robin over users with queued jobs and spare concurrency."""
+        for _ in range(len(self._turn)):
+            user_id = self._turn[0]
+            self._turn.rotate(-1)
+            pending = self._pending.get(user_id)
+            if pending and self._running.get(user_id, 0) < self.per_user_limit:
+                job = self._jobs[pending.popleft()]
+                if not pending:
+                    self._turn.remove(user_id)
+                return job
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._wakeup:
+                job = self._next_job()
+                while job is None:
+                    await self._wakeup.wait()
+                    job = self._next_job()
+                self._running[job.user_id] = self._running.get(job.user_id, 0) + 1
+            try:
+                await self._run(job)
+            finally:
+                async with self._wakeup:
+                    self._running[job.user_id] -= 1
+                    if job.user_id in self._pending and self._pending[job.user_id] and job.user_id not in self._turn:
+                        self._turn.append(job.user_id)
+                    self._wakeup.notify_all()
+
+    # --- Execution ---
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        await self._persist(job.user_id)
+        try:
+            vectorstore = await get_vectorstore()
+            metadata = await load_paper_metadata(job.user_id)
+            if job.kind == "ingest":
+                ingest = bulk_ingest_papers if len(job.paper_ids) >= BULK_JOB_THRESHOLD else ingest_papers
+                # "upserted" is only reported once the paper is in the metadata file (see bulk_ingest_papers);
+                # an "indexed" paper already listed there was saved just before an interruption
+                pending = [
+                    pid for pid in job.paper_ids
+                    if job.progress.get(pid) != "upserted" and not (job.progress.get(pid) == "indexed" and pid in metadata)
+                ]
+                result = await ingest(job.user_id, metadata, vectorstore, pending, on_progress=lambda e: self._on_progress(job, e))
+                job.message = result["message"]
+                job.status = "done" if result["successful"] or not result["failed"] else "failed"
+            else:
+                on_progress = lambda e: self._on_progress(job, e)
+                if job.kind == "delete":
+                    result = await delete_papers(job.user_id, metadata, vectorstore, job.paper_ids, on_progress=on_progress)
+                elif job.kind == "clear":
+                    result = await clear_library(job.user_id, metadata, vectorstore, on_progress=on_progress)
+                else:
+                    # Papers already handed over before a restart are no longer in the source library
+                    pending = [pid for pid in job.paper_ids if job.progress.get(pid) not in ("moved", "copied")]
+                    result = await transfer_papers(
+                        job.user_id, job.target_user_id, vectorstore, pending,
+                        move=job.kind == "move", on_progress=on_progress,
+                    )
+                job.message = result["message"]
+                job.status = "done" if result["successful"] or not result["failed"] else "failed"
+        except Exception as e:
+            logging.error(f"❌ Job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.message = f"❌ Job failed: {e}"
+        job.finished_at = time.time()
+        self._publish(job, {"id": job.job_id, "stage": job.status, "job_id": job.job_id})
+        await self._persist(job.user_id)
+
+    def _on_progress(self, job: Job, event: Dict[str, Any]) -> None:
+        job.progress[event["id"]] = event["stage"]
+        self._publish(job, event)
+        if event["stage"] in FINISHED_STAGES:
+            # Checkpoint per finished paper so restarts resume where we stopped
+            asyncio.get_running_loop().create_task(self._persist(job.user_id))
+
+    def _publish(self, job: Job, event: Dict[str, Any]) -> None:
+        event = {**event, "job_id": job.job_id, "at": time.time()}
+        job.events.append(event)
+        del job.events[:-JOB_EVENT_BUFFER]
+        for queue in self._subscribers.get(job.user_id, []):
+            if queue.full(): # slow consumer: drop its oldest event
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    # --- Persistence ---
+    async def _persist(self, user_id: str) -> None:
+        jobs = self.jobs_for(user_id)
+        finished = [j for j in jobs if not j.active][-JOB_HISTORY:]
+        keep = [j for j in jobs if j.active] + finished
+        for job in jobs:
+            if job not in keep:
+                self._jobs.pop(job.job_id, None)
+        snapshot = [asdict(j) for j in keep]
+
+        def _write():
+            path = _jobs_path(user_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            tmp.replace(path)
+
+        async with self._persist_locks.setdefault(user_id, asyncio.Lock()):
+            await run_blocking(_write)
+
+    @staticmethod
+    def _load_all() -> List[Job]:
+        jobs = []
+        if not BASE_USER_DATA_DIR.exists():
+            return jobs
+        for path in BASE_USER_DATA_DIR.glob("*/jobs.json"):
+            try:
+                with open(path) as f:
+                    jobs.extend(Job(**data) for data in json.load(f))
+            except (json.JSONDecodeError, TypeError) as e:
+                logging.warning(f"Ignoring unreadable job file {path}: {e}")
+        return jobs
+
+job_queue = JobQueue()
+# Jobs write to Qdrant ahead of the library stats: no drift correction while one is active
+library_stats.skip_while(job_queue.writing)
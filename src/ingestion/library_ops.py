@@ -0,0 +1,228 @@
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from qdrant_client import models
+from langchain_qdrant import QdrantVectorStore
+from core.telemetry import timed
+from core.chunk_cache import chunk_cache
+from ingestion.inventory import inventories
+from ingestion.library_stats import library_stats, paper_vectors
+from ingestion.paperingestion import (
+    save_paper_metadata,
+    load_paper_metadata,
+    claim_doc_key,
+    chunk_point_id,
+    user_exists,
+    ProgressCallback,
+)
+
+# Paper IDs per MatchAny filter (one Qdrant call each)
+PAPERS_PER_CALL = 500
+# Points per scroll page / upsert when copying papers
+COPY_BATCH_SIZE = 256
+
+def papers_filter(user_id: str, paper_ids: Optional[List[str]] = None) -> models.Filter:
+    """Qdrant filter matching every point of the given papers (all papers if None) of a user's library."""
+    must = [models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id))]
+    if paper_ids is not None:
+        must.append(models.FieldCondition(key="metadata.paper_id", match=models.MatchAny(any=list(paper_ids))))
+    return models.Filter(must=must)
+
+def _batches(items: List[str], size: int = PAPERS_PER_CALL) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _report(on_progress: Optional[ProgressCallback], paper_ids: List[str], stage: str, done: int, total: int) -> None:
+    if on_progress is None:
+        return
+    for i, paper_id in enumerate(paper_ids):
+        on_progress({"id": paper_id, "stage": stage, "done": done - len(paper_ids) + i + 1, "total": total})
+
+def _result(action: str, done: List[str], failed: List[Dict[str, str]]) -> Dict[str, Any]:
+    message = f"{action} {len(done)} paper(s)"
+    if failed:
+        message += f", ❌ {len(failed)} skipped:\n" + "\n".join(f"• {f['id']}: {f['reason']}" for f in failed[:10])
+    return {"successful": done, "failed": failed, "message": message}
+
+async def delete_papers(
+    user_id: str,
+    paper_metadata: Dict[str, Any],
+    vectorstore: QdrantVectorStore,
+    paper_ids: List[str],
+    on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+    """
+    Delete many papers: one MatchAny-filtered Qdrant delete per PAPERS_PER_CALL
+    papers and a single metadata save at the end.
+    """
+    targets = [pid for pid in dict.fromkeys(paper_ids) if pid in paper_metadata]
+    failed = [{"id": pid, "reason": "Paper not in library"} for pid in paper_ids if pid not in paper_metadata]
+    deleted: List[str] = []
+    try:
+        for batch in _batches(targets):
+            with timed("qdrant", "delete"):
+                await vectorstore.client.delete(
+                    collection_name=vectorstore.collection_name,
+                    points_selector=papers_filter(user_id, batch),
+                )
+            deleted.extend(batch)
+            _report(on_progress, batch, "deleted", len(deleted), len(targets))
+    except Exception as e:
+        logging.error(f"❌ Bulk delete failed after {len(deleted)}/{len(targets)} papers: {e}")
+        failed.extend({"id": pid, "reason": f"Vector store delete failed: {e}"} for pid in targets[len(deleted):])
+    finally:
+        # Commit whatever was removed from Qdrant in one metadata write
+        if deleted:
+            for pid in deleted:
+                del paper_metadata[pid]
+                chunk_cache.invalidate(pid)
+                inventories.remove(user_id, pid)
+                library_stats.remove(user_id, pid)
+            await save_paper_metadata(user_id, paper_metadata)
+    logging.info(f"🗑️ Deleted {len(deleted)} paper(s) of {user_id}")
+    return _result("🗑️ Deleted", deleted, failed)
+
+async def clear_library(
+    user_id: str,
+    paper_metadata: Dict[str, Any],
+    vectorstore: QdrantVectorStore,
+    on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+    """Remove every point and metadata entry of a user's library (one Qdrant delete, one metadata save)."""
+    paper_ids = list(paper_metadata)
+    with timed("qdrant", "delete"):
+        await vectorstore.client.delete(collection_name=vectorstore.collection_name, points_selector=papers_filter(user_id))
+    paper_metadata.clear()
+    for pid in paper_ids:
+        chunk_cache.invalidate(pid)
+    inventories.drop(user_id)
+    library_stats.drop(user_id)
+    await save_paper_metadata(user_id, paper_metadata)
+    _report(on_progress, paper_ids, "deleted", len(paper_ids), len(paper_ids))
+    logging.info(f"🗑️ Cleared library of {user_id} ({len(paper_ids)} papers)")
+    return _result("🗑️ Cleared library:", paper_ids, [])
+
+async def _copy_points(source_user: str, target_user: str, vectorstore: QdrantVectorStore, paper_ids: List[str]) -> None:
+    """
+    Duplicate the papers' points (vectors included) under the target user, with their own doc_key and IDs.
+    Re-running it overwrites the same points (the target's doc_key is reclaimed). On failure, the points
+    already copied are deleted so that no orphans are left in the target library.
+    """
+    doc_keys = {pid: await claim_doc_key(vectorstore, target_user, pid) for pid in paper_ids}
+    offset = None
+    try:
+        while True:
+            with timed("qdrant", "scroll"):
+                records, offset = await vectorstore.client.scroll(
+                    collection_name=vectorstore.collection_name,
+                    scroll_filter=papers_filter(source_user, paper_ids),
+                    limit=COPY_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+            points = []
+            for record in records:
+                payload = dict(record.payload or {})
+                metadata = dict(payload.get("metadata", {}))
+                metadata["user_id"] = target_user
+                metadata["doc_key"] = doc_keys[metadata["paper_id"]]
+                payload["metadata"] = metadata
+                points.append(models.PointStruct(id=chunk_point_id(metadata), vector=record.vector, payload=payload))
+            if points:
+                with timed("qdrant", "upsert"):
+                    await vectorstore.client.upsert(collection_name=vectorstore.collection_name, points=points)
+            if offset is None:
+                return
+    except Exception:
+        # The papers are not in the target library (checked by the caller): all their target points are partial copies
+        try:
+            with timed("qdrant", "delete"):
+                await vectorstore.client.delete(collection_name=vectorstore.collection_name, points_selector=papers_filter(target_user, paper_ids))
+        except Exception as e:
+            logging.warning(f"Could not clean up partial copies for {target_user}: {e}")
+        raise
+
+async def _owns_no_points(vectorstore: QdrantVectorStore, user_id: str, paper_id: str) -> bool:
+    with timed("qdrant", "count"):
+        result = await vectorstore.client.count(
+            collection_name=vectorstore.collection_name, count_filter=papers_filter(user_id, [paper_id]), exact=True,
+        )
+    return result.count == 0
+
+async def transfer_papers(
+    source_user: str,
+    target_user: str,
+    vectorstore: QdrantVectorStore,
+    paper_ids: List[str],
+    move: bool = True,
+    on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+    """
+    Move (or copy) papers to another user's library.
+    A move re-assigns the points in place with one filtered set_payload per
+    PAPERS_PER_CALL papers (point IDs and doc_key are kept). A copy duplicates the points.
+    Each library's metadata is saved once. A move interrupted between the two saves
+    (paper listed in both libraries, points owned by the target) is completed.
+    """
+    if source_user == target_user:
+        return _result("Nothing to transfer:", [], [{"id": pid, "reason": "Same library"} for pid in dict.fromkeys(paper_ids)])
+    if not await user_exists(target_user):
+        return _result("Nothing to transfer:", [], [{"id": pid, "reason": f"Unknown user {target_user!r}"} for pid in dict.fromkeys(paper_ids)])
+    source_metadata = await load_paper_metadata(source_user)
+    target_metadata = await load_paper_metadata(target_user)
+    failed: List[Dict[str, str]] = []
+    targets: List[str] = []
+    handed_over: List[str] = [] # moved by an interrupted run: only the source entry is left
+    for pid in dict.fromkeys(paper_ids):
+        if pid not in source_metadata:
+            failed.append({"id": pid, "reason": "Paper not in library"})
+        elif pid in target_metadata:
+            if move and await _owns_no_points(vectorstore, source_user, pid):
+                handed_over.append(pid)
+            else:
+                failed.append({"id": pid, "reason": f"Already in {target_user}'s library"})
+        else:
+            targets.append(pid)
+
+    transferred: List[str] = []
+    stage = "moved" if move else "copied"
+    try:
+        for batch in _batches(targets):
+            if move:
+                with timed("qdrant", "set_payload"):
+                    await vectorstore.client.set_payload(
+                        collection_name=vectorstore.collection_name,
+                        payload={"user_id": target_user},
+                        key="metadata",
+                        points=papers_filter(source_user, batch),
+                    )
+            else:
+                await _copy_points(source_user, target_user, vectorstore, batch)
+            transferred.extend(batch)
+    except Exception as e:
+        logging.error(f"❌ Transfer to {target_user} failed after {len(transferred)}/{len(targets)} papers: {e}")
+        failed.extend({"id": pid, "reason": f"Vector store update failed: {e}"} for pid in targets[len(transferred):])
+    finally:
+        if transferred:
+            # Target first: after a crash between the two saves, papers are listed twice, never lost
+            # (a resumed move finds them with the target owning the points and completes it)
+            for pid in transferred:
+                entry = dict(source_metadata[pid])
+                if not move:
+                    entry["ingested_at"] = datetime.now().isoformat()
+                target_metadata[pid] = entry
+                inventories.upsert(target_user, pid, entry)
+                library_stats.upsert(target_user, pid, paper_vectors(entry))
+            await save_paper_metadata(target_user, target_metadata)
+        transferred = handed_over + transferred
+        if move and transferred:
+            for pid in transferred:
+                del source_metadata[pid]
+                inventories.remove(source_user, pid)
+                library_stats.remove(source_user, pid)
+            await save_paper_metadata(source_user, source_metadata)
+        # Reported (and checkpointed by the job queue) only once both libraries are saved:
+        # a resumed job redoes the rest, which is idempotent (see `_copy_points`)
+        _report(on_progress, transferred, stage, len(transferred), len(handed_over) + len(targets))
+    logging.info(f"📦 {stage.capitalize()} {len(transferred)} paper(s) from {source_user} to {target_user}")
+    return _result(f"📦 {stage.capitalize()}", transferred, failed)
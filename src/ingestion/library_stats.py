@@ -0,0 +1,155 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Callable
+from qdrant_client import models
+from langchain_qdrant import QdrantVectorStore
+from config import STATS_DRIFT_CHECK_S, STATS_DRIFT_TOLERANCE
+from core.telemetry import metrics, timed
+logger = logging.getLogger(__name__)
+
+@dataclass
+class LibraryStatsSnapshot:
+    papers: int
+    vectors: int
+    checked_at: Optional[float] = None # last drift check (monotonic), None if never
+    drifted: bool = False              # Qdrant disagreed at the last check
+
+def paper_vectors(metadata: Dict[str, Any]) -> int:
+    """Points a paper owns: `num_vectors` (chunks + outline) or, for older entries, `total_chunks`."""
+    return int(metadata.get("num_vectors", metadata.get("total_chunks", 0)) or 0)
+
+class UserLibraryStats:
+    """Per-paper vector counts of one user and their running total."""
+    def __init__(self, paper_metadata: Optional[Dict[str, Any]] = None):
+        self.per_paper: Dict[str, int] = {}
+        self.vectors = 0
+        self.checked_at: Optional[float] = None
+        self.drifted = False
+        self.epoch = 0 # bumped by every update: a drift check spanning one is discarded
+        for paper_id, metadata in (paper_metadata or {}).items():
+            self.upsert(paper_id, paper_vectors(metadata))
+
+    def upsert(self, paper_id: str, vectors: int) -> None:
+        self.vectors += vectors - self.per_paper.get(paper_id, 0)
+        self.per_paper[paper_id] = vectors
+        self.epoch += 1
+
+    def remove(self, paper_id: str) -> None:
+        self.vectors -= self.per_paper.pop(paper_id, 0)
+        self.epoch += 1
+
+class LibraryStats:
+    """
+    Process-wide library statistics, built lazily per user from the metadata and
+    updated on ingest, delete and transfer, so reads never hit Qdrant.
+    Every STATS_DRIFT_CHECK_S a background check compares the total with an
+    approximate (`exact=False`) Qdrant count; only drift beyond
+    STATS_DRIFT_TOLERANCE is confirmed with an exact count and corrected.
+    Writers update Qdrant before the stats, so no check runs while a library is
+    being written (see `skip_while`), and a check overlapping an update is discarded.
+    """
+    def __init__(self, check_interval_s: float = STATS_DRIFT_CHECK_S, tolerance: float = STATS_DRIFT_TOLERANCE):
+        self.check_interval_s = check_interval_s
+        self.tolerance = tolerance
+        self._users: Dict[str, UserLibraryStats] = {}
+        self._checks: Dict[str, asyncio.Task] = {}
+        self._busy: List[Callable[[str], bool]] = []
+
+    def _stats(self, user_id: str, paper_metadata: Dict[str, Any]) -> UserLibraryStats:
+        stats = self._users.get(user_id)
+        if stats is None:
+            stats = self._users[user_id] = UserLibraryStats(paper_metadata)
+        return stats
+
+    # --- Reads ---
+    def get(self, user_id: str, paper_metadata: Dict[str, Any]) -> LibraryStatsSnapshot:
+        stats = self._stats(user_id, paper_metadata)
+        return LibraryStatsSnapshot(len(stats.per_paper), stats.vectors, stats.checked_at, stats.drifted)
+
+    def paper_vectors(self, user_id: str, paper_metadata: Dict[str, Any], paper_id: str) -> int:
+        return self._stats(user_id, paper_metadata).per_paper.get(paper_id, 0)
+
+    # --- Updates ---
+    def upsert(self, user_id: str, paper_id: str, vectors: int) -> None:
+        # Users without stats yet get them built from their metadata on first read
+        if user_id in self._users:
+            self._users[user_id].upsert(paper_id, vectors)
+
+    def remove(self, user_id: str, paper_id: str) -> None:
+        if user_id in self._users:
+            self._users[user_id].remove(paper_id)
+
+    def drop(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+
+    def on_metadata_change(self, user_id: str, paper_metadata: Dict[str, Any], version: int) -> None:
+        """Safety net for writers that bypass the incremental updates: rebuild lazily when paper counts diverge."""
+        stats = self._users.get(user_id)
+        if stats is not None and len(stats.per_paper) != len(paper_metadata):
+            logger.info(f"Library stats of {user_id} out of date (v{version}), rebuilding on next read")
+            self.drop(user_id)
+
+    # --- Drift check ---
+    def skip_while(self, predicate: Callable[[str], bool]) -> None:
+        """Register a predicate telling whether a user's library is being written (e.g. by a background job)."""
+        self._busy.append(predicate)
+
+    def _is_busy(self, user_id: str) -> bool:
+        return any(predicate(user_id) for predicate in self._busy)
+
+    def schedule_drift_check(self, user_id: str, vectorstore: QdrantVectorStore) -> None:
+        """Start a background drift check if the user's last one is older than the check interval (cheap no-op otherwise)."""
+        stats = self._users.get(user_id)
+        if stats is None or user_id in self._checks or self._is_busy(user_id):
+            return
+        if stats.checked_at is not None and time.monotonic() - stats.checked_at < self.check_interval_s:
+            return
+        task = asyncio.get_running_loop().create_task(self.check_drift(user_id, vectorstore))
+        self._checks[user_id] = task
+        task.add_done_callback(lambda _: self._checks.pop(user_id, None))
+
+    async def check_drift(self, user_id: str, vectorstore: QdrantVectorStore) -> Optional[int]:
+        """Compare the cached total with Qdrant; returns the (signed) drift corrected, None if the check failed or was discarded."""
+        stats = self._users.get(user_id)
+        if stats is None:
+            return None
+        expected, epoch = stats.vectors, stats.epoch
+        try:
+            counted = await self._count(user_id, vectorstore, exact=False)
+            if abs(counted - expected) > self.tolerance * max(expected, 1):
+                # Approximate counts can be off on filtered queries: confirm before correcting
+                counted = await self._count(user_id, vectorstore, exact=True)
+        except Exception as e:
+            logger.warning(f"Library stats drift check failed for {user_id}: {e}")
+            metrics.inc("arxivhub_library_stats_checks_total", result="error")
+            return None
+
+        if self._users.get(user_id) is not stats or stats.epoch != epoch or self._is_busy(user_id):
+            # The library changed while counting: Qdrant may hold points the stats do not have yet
+            metrics.inc("arxivhub_library_stats_checks_total", result="discarded")
+            return None
+        stats.checked_at = time.monotonic()
+        drift = counted - expected
+        stats.drifted = abs(drift) > self.tolerance * max(expected, 1)
+        if stats.drifted:
+            logger.warning(f"Library stats of {user_id} drifted: {expected} cached vs {counted} in Qdrant")
+            # Per-paper counts stay as recorded; the total follows Qdrant
+            stats.vectors = counted
+        metrics.inc("arxivhub_library_stats_checks_total", result="drift" if stats.drifted else "ok")
+        return drift if stats.drifted else 0
+
+    @staticmethod
+    async def _count(user_id: str, vectorstore: QdrantVectorStore, exact: bool) -> int:
+        with timed("qdrant", "count"):
+            result = await vectorstore.client.count(
+                collection_name=vectorstore.collection_name,
+                count_filter=models.Filter(
+                    must=[models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id))]
+                ),
+                exact=exact,
+            )
+        return result.count
+
+library_stats = LibraryStats()
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Dict, Any, List, Callable, Awaitable
+logger = logging.getLogger(__name__)
+
+# Called with (user_id, metadata, version) after every saved change
+ChangeListener = Callable[[str, Dict[str, Any], int], None]
+
+class MetadataCache:
+    """
+    Process-wide, read-through cache of each user's paper metadata.
+    Every session, job and chat turn of a user shares one dict (no per-session
+    copies); each save bumps the user's version and notifies listeners, so
+    readers can tell when the library changed without re-reading the file.
+    """
+    def __init__(self):
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._listeners: List[ChangeListener] = []
+
+    async def get(self, user_id: str, load: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """The user's shared metadata dict, read with `load` on first access (concurrent misses share one read)."""
+        metadata = self._metadata.get(user_id)
+        if metadata is not None:
+            return metadata
+        future = self._loading.get(user_id)
+        if future is None:
+            future = self._loading[user_id] = asyncio.ensure_future(self._load(user_id, load))
+        # Shielded: one caller giving up does not cancel the read for the others
+        return await asyncio.shield(future)
+
+    async def _load(self, user_id: str, load: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            metadata = await load(user_id)
+            # A save may have published a newer dict while the file was being read
+            return self._metadata.setdefault(user_id, metadata)
+        finally:
+            self._loading.pop(user_id, None)
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def publish(self, user_id: str, metadata: Dict[str, Any]) -> int:
+        """Record a saved change: `metadata` becomes the shared dict and the version is bumped."""
+        self._metadata[user_id] = metadata
+        version = self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        for listener in list(self._listeners):
+            try:
+                listener(user_id, metadata, version)
+            except Exception as e:
+                logger.warning(f"Metadata change listener failed for {user_id}: {e}")
+        return version
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        """Register a change listener; returns a function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget the cached dict (e.g. after an out-of-process edit of the file)."""
+        self._metadata.pop(user_id, None)
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+metadata_cache = MetadataCache()
@@ -1,47 +1,68 @@
 import os
+import re
 import json
-import logging
+import uuid
 import asyncio
+import logging
+import itertools
 from pathlib import Path
 from filelock import FileLock
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator
 from datetime import datetime
 from qdrant_client import models
 from langchain_core.documents import Document
 from langchain_qdrant import QdrantVectorStore
-from config import BASE_USER_DATA_DIR
+from config import BASE_USER_DATA_DIR, CHUNK_STRATEGY, CHUNK_SIZING, EMBED_BATCH_SIZE, HIERARCHICAL_INDEX
+from core.telemetry import timed
+from core.executors import run_blocking
+from core.point_ids import point_id, make_doc_key
+from core.chunk_cache import chunk_cache
+from core.payload_codec import encode_text
 from langchain_community.document_loaders import ArxivLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from ingestion.chunking import get_chunker
+from ingestion.inventory import inventories
+from ingestion.metadata_cache import metadata_cache
+from ingestion.library_stats import library_stats, paper_vectors
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-# TEXT SPLITTER
-CHUNK_SIZE = 1500
-CHUNK_OVERLAP = 200
-MIN_CHUNK_LENGTH = 300
-SEPARATORS = ["\n\n", "\n", ".", ";", ",", " "]
+# Keep the sidebar inventory indexes consistent with every saved change
+metadata_cache.subscribe(inventories.on_metadata_change)
+metadata_cache.subscribe(library_stats.on_metadata_change)
+
+# Per-user locks serializing metadata saves (see save_paper_metadata)
+_save_locks: Dict[str, asyncio.Lock] = {}
+
+# Suffixed doc_keys tried before falling back to a random one (see claim_doc_key)
+MAX_DOC_KEY_ATTEMPTS = 8
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    separators=SEPARATORS,
-)
+# User IDs are path components (user_data/<user_id>/) and payload values: word characters and dashes only
+USER_ID_PATTERN = re.compile(r"^[\w-]+$")
 
-# Helper to get lock path for a user
+# CHUNKING (see ingestion/chunking.py for the available strategies)
+chunker = get_chunker(CHUNK_STRATEGY, sizing=CHUNK_SIZING)
+
+def is_valid_user_id(user_id: str) -> bool:
+    return bool(user_id) and USER_ID_PATTERN.match(user_id) is not None
+
+async def user_exists(user_id: str) -> bool:
+    """Whether `user_id` is a valid ID with a library on disk."""
+    if not is_valid_user_id(user_id):
+        return False
+    return await run_blocking((BASE_USER_DATA_DIR / user_id / "paper_metadata.json").exists)
+
+# Helper to get lock path for a user (blocking: call from a worker thread)
 def get_lock_path(user_id: str) -> Path:
     """Get the lock file path for a specific user"""
     user_dir = BASE_USER_DATA_DIR / user_id
     user_dir.mkdir(parents=True, exist_ok=True)
     return user_dir / "paper_metadata.json.lock"
 
-async def load_paper_metadata(user_id: str) -> Dict[str, Any]:
-    """Load paper metadata from JSON file with file locking."""
-    user_dir = BASE_USER_DATA_DIR / user_id
-    user_dir.mkdir(parents=True, exist_ok=True)
-    paper_metadata_path = user_dir / "paper_metadata.json"
-    lock_path = get_lock_path(user_id)
+async def read_paper_metadata(user_id: str) -> Dict[str, Any]:
+    """Read paper metadata from JSON file with file locking."""
+    paper_metadata_path = BASE_USER_DATA_DIR / user_id / "paper_metadata.json"
     
     def _read():
-        with FileLock(lock_path, timeout=10):
+        with FileLock(get_lock_path(user_id), timeout=10):
             if paper_metadata_path.exists():
                 try:
                     with open(paper_metadata_path, "r") as f:
@@ -51,23 +72,41 @@ async def load_paper_metadata(user_id: str) -> Dict[str, Any]:
                     return {}
             return {}
     
-    return await asyncio.to_thread(_read)
+    return await run_blocking(_read)
+
+async def load_paper_metadata(user_id: str) -> Dict[str, Any]:
+    """
+    The user's paper metadata, shared process-wide (see ingestion/metadata_cache.py):
+    read from disk once, then the same dict is returned to every session and job.
+    """
+    return await metadata_cache.get(user_id, read_paper_metadata)
 
 async def save_paper_metadata(user_id: str, paper_metadata: Dict[str, Any]) -> None:
-    """Save paper metadata to JSON file with file locking."""
-    user_dir = BASE_USER_DATA_DIR / user_id
-    user_dir.mkdir(parents=True, exist_ok=True)
-    paper_metadata_path = user_dir / "paper_metadata.json"
-    lock_path = get_lock_path(user_id)
-    
-    def _write():
-        with FileLock(lock_path, timeout=10):
-            with open(paper_metadata_path, "w") as f:
-                json.dump(paper_metadata, f, indent=2)
-    
-    await asyncio.to_thread(_write)
+    """Save paper metadata to JSON file with file locking, and publish the change to the shared cache."""
+    paper_metadata_path = BASE_USER_DATA_DIR / user_id / "paper_metadata.json"
 
-async def update_paper_metadata(user_id: str, paper_metadata: Dict[str, Any], doc_metadata: Dict[str, Any], arxiv_id: str, len_chunks: int) -> None:   
+    # One save at a time per user, snapshot included: overlapping writes could otherwise
+    # finish out of order and leave an older snapshot on disk
+    async with _save_locks.setdefault(user_id, asyncio.Lock()):
+        # Snapshot on the event loop: the shared dict may change while the file is written
+        snapshot = {paper_id: dict(entry) for paper_id, entry in paper_metadata.items()}
+
+        def _write():
+            with FileLock(get_lock_path(user_id), timeout=10):
+                with open(paper_metadata_path, "w") as f:
+                    json.dump(snapshot, f, indent=2)
+
+        await run_blocking(_write)
+        metadata_cache.publish(user_id, paper_metadata)
+
+def record_paper_metadata(
+    paper_metadata: Dict[str, Any],
+    doc_metadata: Dict[str, Any],
+    arxiv_id: str,
+    len_chunks: int,
+    num_vectors: Optional[int] = None
+    ) -> None:
+    """Add a paper's inventory entry in memory (without saving the metadata file)."""
     paper_metadata[arxiv_id] = {
         'Title': doc_metadata.get('Title', 'Unknown'),
         'Authors': doc_metadata.get('Authors', []),
@@ -75,39 +114,65 @@ async def update_paper_metadata(user_id: str, paper_metadata: Dict[str, Any], do
         'Summary': doc_metadata.get('Summary', ''),
         'pdf_url': f"https://arxiv.org/pdf/{arxiv_id}.pdf",
         'total_chunks': len_chunks,
+        'num_vectors': len_chunks if num_vectors is None else num_vectors, # chunks + outline points
         'ingested_at': datetime.now().isoformat()
     }
+
+async def update_paper_metadata(
+    user_id: str,
+    paper_metadata: Dict[str, Any],
+    doc_metadata: Dict[str, Any],
+    arxiv_id: str,
+    len_chunks: int,
+    num_vectors: Optional[int] = None
+    ) -> None:
+    record_paper_metadata(paper_metadata, doc_metadata, arxiv_id, len_chunks, num_vectors)
+    inventories.upsert(user_id, arxiv_id, paper_metadata[arxiv_id])
+    library_stats.upsert(user_id, arxiv_id, paper_vectors(paper_metadata[arxiv_id]))
     await save_paper_metadata(user_id, paper_metadata)
 
 async def save_notes(user_id: str, paper_metadata: Dict[str, Any], paper_id: str, text: str) -> bool:
     if paper_id not in paper_metadata:
         return False
     paper_metadata[paper_id]["notes"] = text
+    inventories.upsert(user_id, paper_id, paper_metadata[paper_id])
     await save_paper_metadata(user_id, paper_metadata)  
     return True
 
 def preprocess(user_id: str, doc: Document, arxiv_id: str) -> List[Document]:
     """
-    Clean a document by removing references and splitting into chunks.
+    Clean a document (bibliography removal) and split it into chunks
+    with the configured chunking strategy.
     Returns a list of Document objects (chunks).
     """
-    content = doc.page_content
-    if "References" in content:
-        content = content[:content.index("References")]
-    doc.page_content = content
-    chunks = []
-    for c in text_splitter.split_documents([doc]):
-        if len(c.page_content) > MIN_CHUNK_LENGTH: # Filter out tiny chunks
-            # assign minimal metadata
-            c.metadata = {
-            "user_id": user_id,
-            "paper_id": arxiv_id,
-            "title": c.metadata.get("Title"),
-        }
-            chunks.append(c)
-    return chunks
-
-async def ingest_papers(user_id: str, paper_metadata: Dict[str, Any], vectorstore: QdrantVectorStore, arxiv_ids: List[str]) -> Dict[str, Any]:
+    return chunker.split(user_id, doc, arxiv_id)
+
+def iter_preprocess(user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+    """Lazy variant of `preprocess`: chunks are produced section by section."""
+    return chunker.iter_split(user_id, doc, arxiv_id)
+
+def iter_outline(user_id: str, doc: Document, arxiv_id: str) -> Iterator[Document]:
+    """Paper and section level documents of the hierarchical index (empty when disabled)."""
+    if not HIERARCHICAL_INDEX:
+        return iter(())
+    return chunker.iter_outline(user_id, doc, arxiv_id)
+
+# Progress events: {"id", "stage", "done", "total", ...} with stage in
+# fetched / chunked / embedded / indexed / upserted / failed
+# ("indexed": vectors written, metadata not saved yet; "upserted": both saved)
+# (chunked and embedded are reported once per batch, with a running "chunks" count)
+# (failed carries the "reason" also listed in the final report)
+ProgressCallback = Callable[[Dict[str, Any]], None]
+# Called by `index_chunks` with (stage, chunks so far) after each batch
+BatchCallback = Callable[[str, int], None]
+
+async def ingest_papers(
+    user_id: str, 
+    paper_metadata: Dict[str, Any], 
+    vectorstore: QdrantVectorStore, 
+    arxiv_ids: List[str],
+    on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
     """
     Ingest multiple ArXiv papers, one by one.
     Each paper's chunks are added to Qdrant individually, and metadata is updated only if the add succeeds.
@@ -116,55 +181,152 @@ async def ingest_papers(user_id: str, paper_metadata: Dict[str, Any], vectorstor
     successful = []
     failed = []
 
+    def report(arxiv_id: str, stage: str, **extra) -> None:
+        if on_progress is not None:
+            on_progress({"id": arxiv_id, "stage": stage, "done": len(successful) + len(failed), "total": len(arxiv_ids), **extra})
+
     for arxiv_id in arxiv_ids:
         # Paper already in inventory --> Ignore
         if arxiv_id in paper_metadata: 
             failed.append({"id": arxiv_id, "reason": "Paper already ingested"})
+            report(arxiv_id, "failed", reason=failed[-1]["reason"])
             continue
 
         try:
             logging.info(f"📥 Loading paper {arxiv_id} from ArXiv")
-            docs = await ArxivLoader(query=arxiv_id).aload()
+            # Download + PDF parsing are blocking: run them in the dedicated pool
+            docs = await run_blocking(ArxivLoader(query=arxiv_id).load)
             if not docs:
                 failed.append({"id": arxiv_id, "reason": "No content found on ArXiv"})
+                report(arxiv_id, "failed", reason=failed[-1]["reason"])
                 continue
+            report(arxiv_id, "fetched")
 
             doc = docs[0]
-            chunks = preprocess(user_id, doc, arxiv_id)
+            # Chunks are generated, embedded and upserted batch by batch
+            chunks = iter_preprocess(user_id, doc, arxiv_id)
 
             try:
-                # await vectorstore.aadd_documents(chunks)
-                # 1. Generate embeddings for the chunks
-                texts = [c.page_content for c in chunks]
-                embeddings = await vectorstore.embeddings.aembed_documents(texts)
-                # 2. Build Qdrant points
-                import uuid
-                points = [
-                    models.PointStruct(
-                        id=str(uuid.uuid4()),
-                        vector=emb,
-                        payload={
-                            "page_content": chunk.page_content,
-                            "metadata": chunk.metadata
-                        }
-                    )
-                    for chunk, emb in zip(chunks, embeddings)
-                ]
-                # 3. Upsert
-                await vectorstore.client.upsert(
-                    collection_name=vectorstore.collection_name,
-                    points=points
-                )
+                doc_key = await claim_doc_key(vectorstore, user_id, arxiv_id)
+                num_chunks = await index_chunks(vectorstore, chunks, on_batch=lambda stage, n: report(arxiv_id, stage, chunks=n), doc_key=doc_key)
+                # Coarse paper/section vectors used by coarse-to-fine retrieval
+                num_outline = await index_chunks(vectorstore, iter_outline(user_id, doc, arxiv_id), doc_key=doc_key)
                 # Only update metadata if add succeeds
-                await update_paper_metadata(user_id, paper_metadata, doc.metadata, arxiv_id, len(chunks))
+                await update_paper_metadata(user_id, paper_metadata, doc.metadata, arxiv_id, num_chunks, num_chunks + num_outline)
                 successful.append(arxiv_id)
+                report(arxiv_id, "upserted", chunks=num_chunks)
                 logging.info(f"✅ Successfully ingested {arxiv_id}")
             except Exception as e:
+                await discard_partial_paper(user_id, vectorstore, arxiv_id)
                 failed.append({"id": arxiv_id, "reason": f"Vector store update failed: {e}"})
+                report(arxiv_id, "failed", reason=failed[-1]["reason"])
 
         except Exception as e:
             failed.append({"id": arxiv_id, "reason": f"Ingestion failed: {e}"})
+            report(arxiv_id, "failed", reason=failed[-1]["reason"])
+
+    return build_ingestion_report(successful, failed)
+
+def _take(iterator: Iterator[Document], n: int) -> List[Document]:
+    return list(itertools.islice(iterator, n))
+
+async def claim_doc_key(vectorstore: QdrantVectorStore, user_id: str, paper_id: str) -> str:
+    """
+    doc_key for a new ingestion of a paper: normally `make_doc_key(user_id, paper_id)`.
+    Papers moved to another user keep their points and doc_key, so when that key
+    is already owned by someone else a suffixed one is used (one retrieve-by-ID per try).
+    The key's point IDs are about to be rewritten: cached texts of the paper are dropped.
+    """
+    chunk_cache.invalidate(paper_id)
+    base = make_doc_key(user_id, paper_id)
+    for n in range(MAX_DOC_KEY_ATTEMPTS):
+        key = base if n == 0 else f"{base}#{n}"
+        with timed("qdrant", "retrieve"):
+            found = await vectorstore.client.retrieve(
+                collection_name=vectorstore.collection_name,
+                ids=[point_id(key, "chunk", 0)],
+                with_payload=["metadata.user_id"],
+                with_vectors=False,
+            )
+        if not found or (found[0].payload or {}).get("metadata", {}).get("user_id") == user_id:
+            return key
+    return f"{base}#{uuid.uuid4().hex[:8]}"
+
+def chunk_point_id(metadata: Dict[str, Any]) -> str:
+    """Deterministic ID from the payload's doc_key and ordinal (re-ingestion overwrites instead of duplicating)."""
+    if "doc_key" not in metadata:
+        return str(uuid.uuid4())
+    level = metadata.get("level", "chunk")
+    return point_id(metadata["doc_key"], level, metadata.get("chunk_index", metadata.get("section_index", 0)))
+
+async def index_chunks(
+    vectorstore: QdrantVectorStore,
+    chunks: Iterable[Document],
+    on_batch: Optional[BatchCallback] = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    doc_key: Optional[str] = None,
+    ) -> int:
+    """
+    Embed chunks and upsert them into Qdrant in batches of `batch_size`.
+    `chunks` may be a lazy generator: at most one batch of texts, embeddings
+    and points is held in memory at a time. Returns the number of points written.
+    `doc_key` (see `claim_doc_key`) overrides the key set by the chunker.
+    """
+    iterator = iter(chunks)
+    written = 0
+    while True:
+        # 1. Pull the next batch (splitting is CPU work: keep it off the event loop)
+        batch = await run_blocking(_take, iterator, batch_size)
+        if not batch:
+            break
+        if on_batch is not None:
+            on_batch("chunked", written + len(batch))
+        # 2. Generate embeddings for the batch
+        embeddings = await vectorstore.embeddings.aembed_documents([c.page_content for c in batch])
+        if on_batch is not None:
+            on_batch("embedded", written + len(batch))
+        # 3. Build Qdrant points and upsert
+        if doc_key is not None:
+            for chunk in batch:
+                chunk.metadata["doc_key"] = doc_key
+        points = [
+            models.PointStruct(
+                id=chunk_point_id(chunk.metadata),
+                vector=emb,
+                payload={
+                    **encode_text(chunk.page_content),
+                    "metadata": chunk.metadata
+                }
+            )
+            for chunk, emb in zip(batch, embeddings)
+        ]
+        with timed("qdrant", "upsert", points=len(points)):
+            await vectorstore.client.upsert(
+                collection_name=vectorstore.collection_name,
+                points=points
+            )
+        written += len(points)
+    return written
+
+def paper_filter(user_id: str, paper_id: str) -> models.Filter:
+    """Qdrant filter matching every point of one paper in a user's library."""
+    return models.Filter(
+        must=[
+            models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id)),
+            models.FieldCondition(key="metadata.paper_id", match=models.MatchValue(value=paper_id)),
+        ]
+    )
+
+async def discard_partial_paper(user_id: str, vectorstore: QdrantVectorStore, paper_id: str) -> None:
+    """Best-effort removal of batches already upserted for a paper whose ingestion failed."""
+    try:
+        with timed("qdrant", "delete"):
+            await vectorstore.client.delete(collection_name=vectorstore.collection_name, points_selector=paper_filter(user_id, paper_id))
+    except Exception as e:
+        logging.warning(f"Could not clean up partial chunks of {paper_id}: {e}")
 
+def build_ingestion_report(successful: List[str], failed: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Summarize an ingestion run into the dict returned to callers/UI."""
     total = len(successful) + len(failed)
     message = (
         f"✅ Ingested {len(successful)} paper(s), ❌ failed {len(failed)} paper(s)"
@@ -188,18 +350,17 @@ async def delete_paper(user_id: str, paper_metadata: Dict[str, Any], vectorstore
         return False
     try:
         # Create a filter to match user_id and paper_id
-        delete_filter = models.Filter(
-            must=[
-                models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id)),
-                models.FieldCondition(key="metadata.paper_id", match=models.MatchValue(value=paper_id)),
-            ]
-        )
-        await vectorstore.client.delete(
-            collection_name=vectorstore.collection_name,
-            points_selector=delete_filter
-        )        
+        delete_filter = paper_filter(user_id, paper_id)
+        with timed("qdrant", "delete"):
+            await vectorstore.client.delete(
+                collection_name=vectorstore.collection_name,
+                points_selector=delete_filter
+            )        
         # Remove metadata
         del paper_metadata[paper_id]
+        chunk_cache.invalidate(paper_id)
+        inventories.remove(user_id, paper_id)
+        library_stats.remove(user_id, paper_id)
         await save_paper_metadata(user_id, paper_metadata)
         logging.info(f"✅ Successfully deleted paper {paper_id} and its chunks.")
         return True
@@ -209,14 +370,9 @@ async def delete_paper(user_id: str, paper_metadata: Dict[str, Any], vectorstore
         return False
 
 async def get_num_vectors(user_id: str, vectorstore: QdrantVectorStore) -> int:
-    """Return total number of vectors belonging to the user."""
-    try:  
-        result = await vectorstore.client.count(
-            collection_name=vectorstore.collection_name,
-            count_filter=models.Filter(
-                must=[models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id))]
-            )
-        )
-        return result.count
-    except Exception as e:
-        return 0
\ No newline at end of file
+    """
+    Return total number of vectors belonging to the user, from the cached
+    library stats (see ingestion/library_stats.py) rather than a filtered count.
+    """
+    library_stats.schedule_drift_check(user_id, vectorstore)
+    return library_stats.get(user_id, await load_paper_metadata(user_id)).vectors
\ No newline at end of file
@@ -0,0 +1,327 @@
+"""
+Portable library snapshots: export a user's library (metadata, payloads and
+vectors) and restore it into any collection without downloading or re-embedding.
+
+    cd src && python -m ingestion.snapshots export --user demo_user snapshots/demo_user [--dtype float32]
+    cd src && python -m ingestion.snapshots import snapshots/demo_user [--user other_user]
+
+A snapshot is a directory holding:
+- `manifest.json`: format version, source user, embedding model, vector dtype / dimension and point count
+- `metadata.json`: the user's paper metadata
+- `vectors.bin`: raw row-major (count, dim) float16 / float32 array, memory-mapped on import
+  (only the batch being upserted is read, and converted to the lists the client serializes)
+- `records.jsonl`: one compact `{"id", "payload"}` line per point, in the same order as the vectors
+"""
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import itertools
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional
+import numpy as np
+from qdrant_client import models
+from langchain_qdrant import QdrantVectorStore
+from config import EMBEDDING_MODEL
+from core.telemetry import timed
+from core.chunk_cache import chunk_cache
+from core.executors import run_blocking
+from ingestion.inventory import inventories
+from ingestion.library_stats import library_stats, paper_vectors
+from ingestion.library_ops import papers_filter, PAPERS_PER_CALL
+from ingestion.paperingestion import (
+    load_paper_metadata,
+    save_paper_metadata,
+    is_valid_user_id,
+    claim_doc_key,
+    chunk_point_id,
+    ProgressCallback,
+)
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DTYPES = ("float16", "float32")
+# Points per scroll page (export) and per upsert (import)
+SNAPSHOT_BATCH_SIZE = 256
+
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.json"
+VECTORS_FILE = "vectors.bin"
+RECORDS_FILE = "records.jsonl"
+
+@dataclass
+class SnapshotManifest:
+    version: int
+    user_id: str
+    dtype: str
+    dim: int
+    count: int
+    papers: int
+    created_at: str
+    embedding_model: Optional[str] = None # None in snapshots written before it was recorded
+
+def read_manifest(path: Path) -> SnapshotManifest:
+    with open(Path(path) / MANIFEST_FILE) as f:
+        manifest = SnapshotManifest(**json.load(f))
+    if manifest.version != SNAPSHOT_VERSION or manifest.dtype not in SNAPSHOT_DTYPES:
+        raise ValueError(f"Unsupported snapshot (version {manifest.version}, dtype {manifest.dtype})")
+    return manifest
+
+async def check_compatible(manifest: SnapshotManifest, vectorstore: QdrantVectorStore) -> None:
+    """
+    Refuse snapshots embedded with another model or dimension than the collection's:
+    their vectors would fail mid-import or silently mix incompatible vector spaces.
+    """
+    if manifest.embedding_model is None:
+        logging.warning("Snapshot does not record its embedding model: only the dimension is checked")
+    elif manifest.embedding_model != EMBEDDING_MODEL:
+        raise ValueError(f"Snapshot embedded with {manifest.embedding_model}, this deployment uses {EMBEDDING_MODEL}")
+    if manifest.count == 0:
+        return
+    # Dimension of a stored point; an empty collection takes the embedder's (the init_db probe)
+    with timed("qdrant", "scroll"):
+        records, _ = await vectorstore.client.scroll(
+            collection_name=vectorstore.collection_name, limit=1, with_payload=False, with_vectors=True,
+        )
+    dim = len(records[0].vector) if records else len(await vectorstore.embeddings.aembed_query("health check"))
+    if manifest.dim != dim:
+        raise ValueError(f"Snapshot vectors have dimension {manifest.dim}, the collection expects {dim}")
+
+def map_vectors(path: Path, manifest: SnapshotManifest) -> np.ndarray:
+    """Read-only memory map of the snapshot vectors: pages are loaded on access, never the whole file."""
+    if manifest.count == 0:
+        return np.empty((0, manifest.dim), dtype=manifest.dtype)
+    return np.memmap(Path(path) / VECTORS_FILE, dtype=manifest.dtype, mode="r", shape=(manifest.count, manifest.dim))
+
+async def export_library(
+    user_id: str,
+    vectorstore: QdrantVectorStore,
+    path: Path,
+    dtype: str = "float16",
+    on_progress: Optional[ProgressCallback] = None
+    ) -> SnapshotManifest:
+    """
+    Write a snapshot of the user's library to `path`: the points are scrolled
+    with their vectors and appended batch by batch, so memory use is bounded by one page.
+    Only points of papers listed in the metadata are exported (leftovers of failed ingestions are not).
+    """
+    if dtype not in SNAPSHOT_DTYPES:
+        raise ValueError(f"dtype must be one of {SNAPSHOT_DTYPES}")
+    path = Path(path)
+    # Snapshot the entries on the loop, the shared dict may change while we export
+    paper_metadata = {pid: dict(entry) for pid, entry in (await load_paper_metadata(user_id)).items()}
+
+    def _open():
+        path.mkdir(parents=True, exist_ok=True)
+        return open(path / VECTORS_FILE, "wb"), open(path / RECORDS_FILE, "w")
+
+    def _append(block: np.ndarray, lines: List[str]):
+        block.tofile(vectors_file)
+        records_file.writelines(lines)
+
+    vectors_file, records_file = await run_blocking(_open)
+    expected = library_stats.get(user_id, paper_metadata).vectors
+    count, dim, offset = 0, 0, None
+    try:
+        while True:
+            with timed("qdrant", "scroll"):
+                records, offset = await vectorstore.client.scroll(
+                    collection_name=vectorstore.collection_name,
+                    scroll_filter=papers_filter(user_id),
+                    limit=SNAPSHOT_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+            records = [r for r in records if (r.payload or {}).get("metadata", {}).get("paper_id") in paper_metadata]
+            if records:
+                block = np.asarray([r.vector for r in records], dtype=dtype)
+                dim = block.shape[1]
+                lines = [json.dumps({"id": str(r.id), "payload": r.payload}, separators=(",", ":")) + "\n" for r in records]
+                await run_blocking(_append, block, lines)
+                count += len(records)
+                if on_progress is not None:
+                    on_progress({"id": user_id, "stage": "exported", "done": count, "total": max(expected, count)})
+            if offset is None:
+                break
+    finally:
+        await run_blocking(vectors_file.close)
+        await run_blocking(records_file.close)
+
+    manifest = SnapshotManifest(
+        version=SNAPSHOT_VERSION,
+        user_id=user_id,
+        dtype=dtype,
+        dim=dim,
+        count=count,
+        papers=len(paper_metadata),
+        created_at=datetime.now().isoformat(),
+        embedding_model=EMBEDDING_MODEL,
+    )
+
+    def _finish():
+        with open(path / METADATA_FILE, "w") as f:
+            json.dump(paper_metadata, f)
+        # Written last: a directory without a manifest is an incomplete export
+        with open(path / MANIFEST_FILE, "w") as f:
+            json.dump(asdict(manifest), f, indent=2)
+
+    await run_blocking(_finish)
+    logging.info(f"📦 Exported {manifest.papers} paper(s) / {count} vectors of {user_id} to {path}")
+    return manifest
+
+async def _delete_points(vectorstore: QdrantVectorStore, user_id: str, paper_ids: List[str]) -> None:
+    for i in range(0, len(paper_ids), PAPERS_PER_CALL):
+        with timed("qdrant", "delete"):
+            await vectorstore.client.delete(
+                collection_name=vectorstore.collection_name,
+                points_selector=papers_filter(user_id, paper_ids[i:i + PAPERS_PER_CALL]),
+            )
+
+async def import_library(
+    path: Path,
+    vectorstore: QdrantVectorStore,
+    user_id: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+    """
+    Restore a snapshot into the library of `user_id` (default: the snapshot's user).
+    Vectors are read from the memory-mapped file one batch at a time, so memory use is
+    bounded by one batch. The embedding model and dimension are checked first.
+    A restore into the same user keeps point IDs (re-running it is idempotent) and
+    replaces existing entries, current points included; into another user, points
+    get that user's doc_keys and papers already in the library are skipped. If the
+    import fails, the points written for papers that were not in the library are
+    deleted again (on a restore, the replaced papers leave the library: re-run it).
+    """
+    path = Path(path)
+    manifest = await run_blocking(read_manifest, path)
+    target_user = user_id or manifest.user_id
+    if not is_valid_user_id(target_user):
+        raise ValueError(f"Invalid user ID: {target_user!r}")
+    await check_compatible(manifest, vectorstore)
+    restore = target_user == manifest.user_id
+
+    def _read_metadata():
+        with open(path / METADATA_FILE) as f:
+            return json.load(f)
+
+    snapshot_metadata: Dict[str, Any] = await run_blocking(_read_metadata)
+    paper_metadata = await load_paper_metadata(target_user)
+    skipped = [] if restore else [pid for pid in snapshot_metadata if pid in paper_metadata]
+    papers = [pid for pid in snapshot_metadata if restore or pid not in paper_metadata]
+    wanted = set(papers)
+    new_papers = [pid for pid in papers if pid not in paper_metadata]
+    doc_keys = {} if restore else {pid: await claim_doc_key(vectorstore, target_user, pid) for pid in papers}
+    if restore:
+        # Same point IDs, possibly other texts: drop what the chunk cache holds for them
+        for pid in papers:
+            chunk_cache.invalidate(pid)
+        # Replaced papers may have points the snapshot does not overwrite (random IDs of older
+        # ingestions, another doc_key or chunk count after a re-ingest): start from none
+        await _delete_points(vectorstore, target_user, papers)
+
+    vectors = map_vectors(path, manifest)
+    records_file = await run_blocking(open, path / RECORDS_FILE)
+    written = row = 0
+    try:
+        while True:
+            lines = await run_blocking(lambda: list(itertools.islice(records_file, SNAPSHOT_BATCH_SIZE)))
+            if not lines:
+                break
+            rows, ids, payloads = [], [], []
+            for i, line in enumerate(lines):
+                record = json.loads(line)
+                payload = record["payload"]
+                metadata = payload.get("metadata", {})
+                if metadata.get("paper_id") not in wanted:
+                    continue
+                if not restore:
+                    metadata = {**metadata, "user_id": target_user, "doc_key": doc_keys[metadata["paper_id"]]}
+                    payload = {**payload, "metadata": metadata}
+                rows.append(row + i)
+                ids.append(record["id"] if restore else chunk_point_id(metadata))
+                payloads.append(payload)
+            if ids:
+                # Only this batch's pages of the map are read; the client serializes Python lists,
+                # so the batch is converted once (float32 then tolist)
+                contiguous = rows[-1] - rows[0] + 1 == len(rows)
+                block = vectors[rows[0]:rows[-1] + 1] if contiguous else vectors[rows]
+                with timed("qdrant", "upsert", points=len(ids)):
+                    await vectorstore.client.upsert(
+                        collection_name=vectorstore.collection_name,
+                        points=models.Batch(ids=ids, vectors=block.astype(np.float32, copy=False).tolist(), payloads=payloads),
+                    )
+                written += len(ids)
+                if on_progress is not None:
+                    on_progress({"id": target_user, "stage": "upserted", "done": written, "total": manifest.count})
+            row += len(lines)
+    except Exception:
+        # Papers new to the library are not in its metadata yet: their points would be orphans.
+        # A restore already deleted the points of the papers it replaces: they leave the library too
+        partial = papers if restore else new_papers
+        try:
+            if partial:
+                await _delete_points(vectorstore, target_user, partial)
+        except Exception as e:
+            logging.warning(f"Could not clean up a failed import into {target_user}: {e}")
+        replaced = [pid for pid in papers if restore and pid in paper_metadata]
+        if replaced:
+            for pid in replaced:
+                del paper_metadata[pid]
+                inventories.remove(target_user, pid)
+                library_stats.remove(target_user, pid)
+            await save_paper_metadata(target_user, paper_metadata)
+        raise
+    finally:
+        await run_blocking(records_file.close)
+
+    # One metadata commit once every point is in place
+    for pid in papers:
+        paper_metadata[pid] = dict(snapshot_metadata[pid])
+        inventories.upsert(target_user, pid, paper_metadata[pid])
+        library_stats.upsert(target_user, pid, paper_vectors(paper_metadata[pid]))
+    if papers:
+        await save_paper_metadata(target_user, paper_metadata)
+
+    message = f"📦 Imported {len(papers)} paper(s) ({written} vectors) into {target_user}'s library"
+    if skipped:
+        message += f", {len(skipped)} already in the library were skipped"
+    logging.info(message)
+    return {"successful": papers, "failed": [{"id": pid, "reason": "Already in library"} for pid in skipped], "message": message}
+
+def print_progress(event) -> None:
+    print(f"{event['id']}: {event['stage']} {event['done']}/{event['total']} vectors", file=sys.stderr)
+
+async def run(args) -> int:
+    from config import init_db, get_vectorstore
+    await init_db()
+    vectorstore = await get_vectorstore()
+    on_progress = None if args.quiet else print_progress
+    if args.command == "export":
+        manifest = await export_library(args.user, vectorstore, Path(args.path), dtype=args.dtype, on_progress=on_progress)
+        print(f"Exported {manifest.papers} paper(s), {manifest.count} vectors ({manifest.embedding_model}, {manifest.dtype}, dim {manifest.dim}) to {args.path}")
+        return 0
+    result = await import_library(Path(args.path), vectorstore, user_id=args.user, on_progress=on_progress)
+    print(result["message"])
+    return 0 if result["successful"] or not result["failed"] else 1
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export / import a user's library without re-embedding.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write a snapshot of a user's library")
+    export.add_argument("path", help="snapshot directory")
+    export.add_argument("--user", required=True, help="user whose library is exported")
+    export.add_argument("--dtype", choices=SNAPSHOT_DTYPES, default="float16", help="stored vector precision")
+    restore = sub.add_parser("import", help="restore a snapshot")
+    restore.add_argument("path", help="snapshot directory")
+    restore.add_argument("--user", help="target user (default: the snapshot's user)")
+    for p in (export, restore):
+        p.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
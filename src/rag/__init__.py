@@ -1,5 +1,6 @@
+from .pre_classifier import pre_classify
 from .conversation_summary import summarize_conversation_history
-from .query_analysis import analyze_query
+from .query_analysis import analyze_query, summarize_and_analyze
 from .scoping import fuzzy_match_papers
 from .retrieval import retrieve
 from .document_grading import grade_docs
@@ -9,8 +10,10 @@ from .generation import generate
 from .casual_generation import handle_general_talk
 
 __all__ = [
+    "pre_classify",
     "summarize_conversation_history",
     "analyze_query",
+    "summarize_and_analyze",
     "fuzzy_match_papers",
     "retrieve", 
     "grade_docs", 
@@ -1,17 +1,18 @@
-from config import llm
-from core.schemas import State
+from config import gateway
+from core.schemas import State, RuntimeContext
+from langgraph.runtime import Runtime
 from core.prompts import get_casual_generation_prompt
 from langchain_core.messages import HumanMessage, SystemMessage
 
-async def handle_general_talk(state: State):
+async def handle_general_talk(state: State, runtime: Runtime[RuntimeContext]):
     
     conversation_summary = state.get("conversationSummary", "")
     system_prompt = get_casual_generation_prompt(conversation_summary)
     user_query = state.get("rewrittenQuestion") or state.get("originalQuestion")
-    response = await llm.ainvoke([
+    response = await gateway.ainvoke("llm", [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_query)
-    ])
+    ], user_id=runtime.context.user_id)
 
     return {
         "messages": [response],          
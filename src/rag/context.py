@@ -0,0 +1,113 @@
+import logging
+from typing import List, Dict, Optional, Tuple
+from langchain_core.documents import Document
+from core.telemetry import metrics
+from core.tokens import count_tokens
+logger = logging.getLogger(__name__)
+
+# Tokenizer used to estimate prompt size per model role (neither NVIDIA model
+# ships a tiktoken encoding; cl100k is a close, slightly conservative proxy)
+MODEL_ENCODINGS: Dict[str, str] = {
+    "llm": "cl100k_base",
+    "research_llm": "cl100k_base",
+}
+# Shortest text overlap treated as two adjacent chunks of the same paper
+MIN_OVERLAP_CHARS = 40
+# Longest overlap searched for (chunk overlap is 200 chars / 50 tokens, plus splitter slack)
+MAX_OVERLAP_CHARS = 600
+
+def context_tokens(text: str, model_role: str = "research_llm") -> int:
+    return count_tokens(text, MODEL_ENCODINGS.get(model_role, "cl100k_base"))
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is also a prefix of `b`."""
+    for n in range(min(len(a), len(b), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+def stitch(texts: List[str]) -> str:
+    """Join consecutive chunks of one paper, dropping the text they overlap on."""
+    joined = ""
+    for text in texts:
+        if not joined:
+            joined = text
+        elif n := _overlap(joined, text):
+            joined += text[n:]
+        else:
+            joined += f"\n{text}"
+    return joined
+
+def _merge_adjacent(items: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+    """
+    Collapse duplicates and chunks contained in another one, and stitch
+    together chunks of the same paper whose texts overlap (consecutive chunks).
+    The merged passage keeps the best score of its parts.
+    """
+    merged: List[Tuple[Document, float]] = []
+    for doc, score in items:
+        text = doc.page_content.strip()
+        key = doc.metadata.get("paper_id")
+        for i, (other, other_score) in enumerate(merged):
+            if other.metadata.get("paper_id") != key:
+                continue
+            existing = other.page_content
+            if text in existing:
+                combined = existing
+            elif existing in text:
+                combined = text
+            elif key == "web_search":
+                continue
+            elif n := _overlap(existing, text):
+                combined = existing + text[n:]
+            elif n := _overlap(text, existing):
+                combined = text + existing[n:]
+            else:
+                continue
+            merged[i] = (Document(page_content=combined, metadata=other.metadata), max(score, other_score))
+            break
+        else:
+            merged.append((Document(page_content=text, metadata=doc.metadata), score))
+    # A stitched passage may now overlap another one: repeat until stable
+    return merged if len(merged) == len(items) else _merge_adjacent(merged)
+
+def assemble_context(
+    docs: List[Document],
+    scores: Optional[List[float]],
+    token_budget: int,
+    model_role: str = "research_llm",
+    consumer: str = "generate",
+    ) -> Tuple[List[Document], List[float]]:
+    """
+    Dedupe and merge overlapping chunks, then pack passages by relevance
+    until `token_budget` (counted for `model_role`) is reached.
+    Returns the packed passages, most relevant first, and their scores
+    (a merged passage has the best score of its parts).
+    """
+    if not docs:
+        return [], []
+    scores = list(scores or [])
+    scores += [0.0] * (len(docs) - len(scores)) # docs without a score rank last
+    passages = sorted(_merge_adjacent(list(zip(docs, scores))), key=lambda p: p[1], reverse=True)
+
+    packed: List[Document] = []
+    packed_scores: List[float] = []
+    used = 0
+    for doc, score in passages:
+        tokens = context_tokens(doc.page_content, model_role)
+        if used + tokens > token_budget:
+            if not packed:
+                # Even the best passage is too long: keep its proportional head
+                keep_chars = int(len(doc.page_content) * token_budget / tokens)
+                packed.append(Document(page_content=doc.page_content[:keep_chars], metadata=doc.metadata))
+                packed_scores.append(score)
+                used = token_budget
+            continue # a shorter, less relevant passage may still fit
+        packed.append(doc)
+        packed_scores.append(score)
+        used += tokens
+
+    metrics.observe("arxivhub_packed_context_tokens", used, consumer=consumer)
+    metrics.inc("arxivhub_context_passages_dropped_total", len(passages) - len(packed), consumer=consumer)
+    logger.info(f"Context for {consumer}: {len(docs)} docs -> {len(passages)} passages -> {len(packed)} packed ({used}/{token_budget} tokens)")
+    return packed, packed_scores
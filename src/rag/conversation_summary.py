@@ -1,31 +1,39 @@
-from config import llm
-from core.schemas import State 
+from config import gateway
+from core.schemas import State, RuntimeContext
+from langgraph.runtime import Runtime
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from core.prompts import get_conversation_summary_prompt
 
-async def summarize_conversation_history(state: State):
-    """
-    Summarize conversation history.
-    """
-    if len(state["messages"]) < 4:  
-        return {"conversationSummary": ""}
+def recent_conversation(messages) -> str:
+    """Last turns before the current query, formatted for the LLM ("" if too short to summarize)."""
+    if len(messages) < 4:
+        return ""
 
     # Exclude current query and system messages
     relevant_msgs = [
-        msg for msg in state["messages"][:-1]  
+        msg for msg in messages[:-1]
         if isinstance(msg, (HumanMessage, AIMessage))
     ]
 
     if not relevant_msgs:
-        return {"conversationSummary": ""}
+        return ""
 
     conversation = "Conversation history:\n"
     for msg in relevant_msgs[-6:]:
         role = "User" if isinstance(msg, HumanMessage) else "Assistant"
         conversation += f"{role}: {msg.content}\n"
+    return conversation
+
+async def summarize_conversation_history(state: State, runtime: Runtime[RuntimeContext]):
+    """
+    Summarize conversation history.
+    """
+    conversation = recent_conversation(state["messages"])
+    if not conversation:
+        return {"conversationSummary": ""}
 
-    summary = await llm.ainvoke([
+    summary = await gateway.ainvoke("llm", [
         SystemMessage(content=get_conversation_summary_prompt()),
         HumanMessage(content=conversation),
-    ])
+    ], user_id=runtime.context.user_id)
     return {"conversationSummary": summary.content}
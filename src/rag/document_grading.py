@@ -1,22 +1,21 @@
 import asyncio
 import logging
-from config import llm
-from core.schemas import State, DocRelevance
+from config import gateway
+from core.schemas import State, DocRelevance, RuntimeContext
+from langgraph.runtime import Runtime
 logger = logging.getLogger(__name__)
 
-async def grade_docs(state: State):
+async def grade_docs(state: State, runtime: Runtime[RuntimeContext]):
     logger.info("Launching parallel workers for individual document grading...")
     
     docs = state.get("retrievedDocs", [])
-    scores = state.get("confidenceScores", []) # Assumes scores are in state
+    scores = state.get("confidenceScores", []) # aligned with docs
     question = state.get("rewrittenQuestion") or state.get("originalQuestion")
     relevance_threshold = 0.8 # threshold above which we automatically consider the document as relevant 
 
     if not docs:
         return {"relevancePassed": False}
 
-    grader_llm = llm.with_structured_output(DocRelevance)
-
     async def check_doc(doc, score):
         # If score is high, we don't call the LLM
         if score >= relevance_threshold:
@@ -24,16 +23,16 @@ async def grade_docs(state: State):
         
         # Else run the LLM grader
         prompt = f"Question: {question}\n\nDocument: {doc.page_content}"
-        result = await grader_llm.ainvoke(prompt)
+        result = await gateway.ainvoke("llm", prompt, user_id=runtime.context.user_id, schema=DocRelevance)
         return doc, result
 
     tasks = [check_doc(d, s) for d, s in zip(docs, scores)]
     results = await asyncio.gather(*tasks)
 
-    # Filter out only those the LLM (or the bypass) deemed irrelevant
-    filtered_docs = [
-        doc for doc, report in results 
+    # Filter out only those the LLM (or the bypass) deemed irrelevant (keeping scores aligned)
+    kept = [
+        (doc, score) for (doc, report), score in zip(results, scores)
         if report.grade != "completely irrelevant"
     ]
     
-    return {"retrievedDocs": filtered_docs}
\ No newline at end of file
+    return {"retrievedDocs": [doc for doc, _ in kept], "confidenceScores": [score for _, score in kept]}
\ No newline at end of file
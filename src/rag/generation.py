@@ -1,7 +1,12 @@
 import re
+import time
 import logging
-from config import research_llm
-from core.schemas import State
+from config import gateway, GENERATION_CONTEXT_TOKENS, GENERATION_CASCADE
+from core.schemas import State, RuntimeContext
+from core.telemetry import metrics
+from langgraph.runtime import Runtime
+from rag.context import assemble_context, context_tokens
+from rag.model_cascade import GenerationRoute, choose_generation_model, STRONG_ROLE
 from core.prompts import get_generation_prompt
 from langchain_core.messages import HumanMessage, SystemMessage
 logger = logging.getLogger(__name__)
@@ -23,9 +28,21 @@ def extract_clean_answer(content: str) -> str:
     # 4. Fallback: If no <answer> tag, remove <thinking> block
     return re.sub(r"<thinking>.*?</thinking>", "", content, flags=re.DOTALL | re.IGNORECASE).strip()
 
-async def generate(state: State):
-    # Context with XML markers
-    docs = state["retrievedDocs"]
+async def _answer(route: GenerationRoute, prompt: list, user_id: str):
+    """Call the routed model and record its latency and token cost."""
+    start = time.perf_counter()
+    response = await gateway.ainvoke(route.role, prompt, user_id=user_id)
+    metrics.observe("arxivhub_generation_seconds", time.perf_counter() - start, role=route.role)
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or sum(context_tokens(m.content, route.role) for m in prompt)
+    completion_tokens = usage.get("output_tokens") or context_tokens(response.content, route.role)
+    metrics.observe("arxivhub_generation_prompt_tokens", prompt_tokens, role=route.role)
+    metrics.observe("arxivhub_generation_completion_tokens", completion_tokens, role=route.role)
+    return response
+
+async def generate(state: State, runtime: Runtime[RuntimeContext]):
+    # Context with XML markers (deduped, merged and packed to the budget)
+    docs, scores = assemble_context(state["retrievedDocs"], state.get("confidenceScores", []), GENERATION_CONTEXT_TOKENS)
     context_blocks = []
     for i, doc in enumerate(docs):
         paper_id = doc.metadata.get("paper_id", f"Unknown_{i}")
@@ -48,14 +65,28 @@ async def generate(state: State):
 
     system_prompt = get_generation_prompt(context_xml, conversation_summary)
     user_question = state.get("rewrittenQuestion") or state.get("originalQuestion")
-    response = await research_llm.ainvoke([
+    prompt = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_question)
-    ])
+    ]
+
+    # Cascade: simple single-paper lookups go to the fast model (judged on the passages actually sent)
+    if GENERATION_CASCADE:
+        route = choose_generation_model(state.get("paperScope", "multiple"), docs, scores, state.get("relevancePassed", True))
+    else:
+        route = GenerationRoute(STRONG_ROLE, "cascade_disabled")
+    metrics.inc("arxivhub_generation_route_total", role=route.role, reason=route.reason)
+    response = await _answer(route, prompt, runtime.context.user_id)
     # Extract the clean answer (without <thinking>)
     clean_answer = extract_clean_answer(response.content)
+    if not clean_answer and route.role != STRONG_ROLE:
+        # Escalate: the fast model produced no usable answer
+        logger.info(f"Empty answer from {route.role}, escalating to {STRONG_ROLE}")
+        metrics.inc("arxivhub_generation_escalations_total", reason=route.reason)
+        response = await _answer(GenerationRoute(STRONG_ROLE, "escalation"), prompt, runtime.context.user_id)
+        clean_answer = extract_clean_answer(response.content)
     if not clean_answer:
-        response.content
+        clean_answer = response.content.strip()
 
     return {
         "messages": [response],          
@@ -1,9 +1,11 @@
 import logging
-from config import llm
-from core.schemas import State, CollectiveAudit
+from config import gateway, AUDIT_CONTEXT_TOKENS
+from core.schemas import State, CollectiveAudit, RuntimeContext
+from langgraph.runtime import Runtime
+from rag.context import assemble_context
 logger = logging.getLogger(__name__)
 
-async def audit_collective_knowledge(state: State):
+async def audit_collective_knowledge(state: State, runtime: Runtime[RuntimeContext]):
     logger.info("Auditing collective knowledge for gaps...")
     
     docs = state.get("retrievedDocs", [])
@@ -13,10 +15,9 @@ async def audit_collective_knowledge(state: State):
         logger.warning("No relevant documents found in local library.")
         return {"relevancePassed": False, "unanswered": question}
 
-    # Concatenate the relevant documents
-    full_context = "\n\n".join([f"Doc: {d.page_content}" for d in docs])
-    
-    auditor_llm = llm.with_structured_output(CollectiveAudit)
+    # Concatenate the relevant documents (deduped, merged and packed to the budget)
+    packed, _ = assemble_context(docs, state.get("confidenceScores", []), AUDIT_CONTEXT_TOKENS, model_role="llm", consumer="audit")
+    full_context = "\n\n".join([f"Doc: {d.page_content}" for d in packed])
     
     prompt = f"""
     Does this set of information contain the answer to ALL aspects of the question?
@@ -26,7 +27,7 @@ async def audit_collective_knowledge(state: State):
     If any aspect is missing, formulate a concise question to find that specific info.
     """
     
-    report = await auditor_llm.ainvoke(prompt)
+    report = await gateway.ainvoke("llm", prompt, user_id=runtime.context.user_id, schema=CollectiveAudit)
     
     logger.info(f"Corrective RAG report: {report}")
     
@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from typing import List
+from langchain_core.documents import Document
+
+# Role of the fast model (simple lookups) and of the reasoning model
+FAST_ROLE = "llm"
+STRONG_ROLE = "research_llm"
+# A simple question is answered by at most this many passages ...
+SIMPLE_MAX_PASSAGES = 2
+# ... at least one of them graded this confident (same bar as the grading bypass)
+SIMPLE_MIN_CONFIDENCE = 0.8
+
+@dataclass
+class GenerationRoute:
+    role: str    # gateway role answering the question
+    reason: str  # why (metric label)
+
+def choose_generation_model(paper_scope: str, passages: List[Document], scores: List[float], relevance_passed: bool) -> GenerationRoute:
+    """
+    Cascade policy: single-paper lookups grounded in a few high-confidence
+    passages that passed the audit go to the fast model; everything else
+    (multi-paper synthesis, web results, weak or missing context) to research_llm.
+    """
+    if paper_scope != "single":
+        return GenerationRoute(STRONG_ROLE, "multi_paper")
+    if not relevance_passed:
+        return GenerationRoute(STRONG_ROLE, "audit_failed")
+    if not passages:
+        return GenerationRoute(STRONG_ROLE, "no_context")
+    if any(doc.metadata.get("paper_id") == "web_search" for doc in passages):
+        return GenerationRoute(STRONG_ROLE, "web_context")
+    if len(passages) > SIMPLE_MAX_PASSAGES:
+        return GenerationRoute(STRONG_ROLE, "many_passages")
+    if max(scores, default=0.0) < SIMPLE_MIN_CONFIDENCE:
+        return GenerationRoute(STRONG_ROLE, "low_confidence")
+    return GenerationRoute(FAST_ROLE, "simple_lookup")
@@ -0,0 +1,88 @@
+import logging
+from typing import List, Dict, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from core.point_ids import point_id
+from core.chunk_cache import chunk_cache
+from core.payload_codec import TEXT_FIELDS, decode_text
+from core.telemetry import metrics, timed
+from rag.context import stitch
+logger = logging.getLogger(__name__)
+
+# Top hits (by score) expanded with their neighbours
+NEIGHBOUR_TOP_HITS = 3
+# Payload path recorded with cached texts (the cache is invalidated per paper)
+PAPER_FIELD = "metadata.paper_id"
+
+async def fetch_chunk_texts(vectorstore: QdrantVectorStore, ids: List[str], cached: bool = True) -> Dict[str, Optional[str]]:
+    """
+    Texts of the given points (None when a point does not exist): cached ones
+    from `chunk_cache`, the rest with one retrieve-by-ID projected to the text fields.
+    With `cached=False` every text is read from the vector store (and the cache refreshed).
+    """
+    texts: Dict[str, Optional[str]] = {}
+    for pid in ids if cached else ():
+        text = chunk_cache.get(pid)
+        if text is not None:
+            texts[pid] = text
+    missing = list(dict.fromkeys(pid for pid in ids if pid not in texts))
+    if cached:
+        metrics.inc("arxivhub_neighbour_cache_total", len(ids) - len(missing), result="hit")
+        metrics.inc("arxivhub_neighbour_cache_total", len(missing), result="miss")
+    if missing:
+        generation = chunk_cache.generation
+        with timed("qdrant", "retrieve", points=len(missing)):
+            points = await vectorstore.client.retrieve(
+                collection_name=vectorstore.collection_name,
+                ids=missing,
+                with_payload=TEXT_FIELDS + [PAPER_FIELD],
+                with_vectors=False,
+            )
+        for p in points:
+            pid, text = str(p.id), decode_text(p.payload)
+            texts[pid] = text
+            chunk_cache.put(pid, text, (p.payload or {}).get("metadata", {}).get("paper_id", ""), generation)
+        for pid in missing:
+            texts.setdefault(pid, None)
+    return texts
+
+def _window_ids(metadata: Dict, window: int) -> List[Tuple[int, str]]:
+    index = metadata["chunk_index"]
+    return [
+        (i, point_id(metadata["doc_key"], "chunk", i))
+        for i in range(max(0, index - window), index + window + 1)
+    ]
+
+async def expand_neighbours(
+    vectorstore: QdrantVectorStore,
+    docs: List[Document],
+    scores: List[float],
+    window: int = 1,
+    top_hits: int = NEIGHBOUR_TOP_HITS,
+    ) -> List[Document]:
+    """
+    Replace the best hits with a window of ±`window` neighbouring chunks,
+    stitched into one passage. All missing neighbours are fetched in a single
+    retrieve-by-ID call. Hits ingested without ordinals are left unchanged.
+    """
+    ranked = sorted(range(len(docs)), key=lambda i: scores[i] if i < len(scores) else 0.0, reverse=True)
+    targets = [i for i in ranked[:top_hits] if "chunk_index" in docs[i].metadata and "doc_key" in docs[i].metadata]
+    if window <= 0 or not targets:
+        return docs
+
+    windows = {i: _window_ids(docs[i].metadata, window) for i in targets}
+    for i in targets:
+        metadata = docs[i].metadata
+        chunk_cache.put(point_id(metadata["doc_key"], "chunk", metadata["chunk_index"]), docs[i].page_content, metadata.get("paper_id", ""))
+    texts_by_id = await fetch_chunk_texts(vectorstore, [pid for ids in windows.values() for _, pid in ids])
+
+    expanded = list(docs)
+    for i, ids in windows.items():
+        texts = [texts_by_id[pid] for _, pid in ids]
+        present = [(ordinal, text) for (ordinal, _), text in zip(ids, texts) if text]
+        expanded[i] = Document(
+            page_content=stitch([text for _, text in present]),
+            metadata={**docs[i].metadata, "window": [present[0][0], present[-1][0]]},
+        )
+    logger.info(f"Expanded {len(windows)} hits with ±{window} neighbours ({len(texts_by_id)} chunks)")
+    return expanded
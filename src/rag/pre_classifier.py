@@ -0,0 +1,157 @@
+import re
+import math
+import logging
+from collections import Counter
+from typing import List, Dict, Tuple, Literal
+from langchain_core.messages import HumanMessage, AIMessage
+from core.schemas import State, MetadataHints
+from core.telemetry import metrics
+from rag.scoping import get_explicit_ids
+logger = logging.getLogger(__name__)
+
+FastPath = Literal["casual", "research", "none"]
+
+# Minimum classifier confidence to skip the analysis LLM
+CASUAL_CONFIDENCE = 0.9
+RESEARCH_CONFIDENCE = 0.9
+# Small talk is short; longer messages always go through analysis
+MAX_CASUAL_WORDS = 8
+
+# Greetings / acknowledgements, and the only words allowed around them in a rule-matched message
+ACK = (
+    r"(hi|hello|hey|yo|hiya|good (morning|afternoon|evening|night)|thanks?( you)?( so much| a lot)?|thx|ty|"
+    r"cheers|great|cool|nice|awesome|perfect|ok(ay)?|got it|bye|goodbye|see you( later)?|cya|"
+    r"there|again|mate|all|everyone|very much|much|so)"
+)
+CASUAL_RULE = re.compile(rf"^\s*{ACK}\b([\s!.,:)]*{ACK}\b)*[\s!.,:)]*$", re.IGNORECASE)
+# References to earlier turns: such questions need the summary + rewrite
+ANAPHORA = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|above|previous(ly)?|earlier|former|latter|"
+    r"same|again|more|further|elaborate|continue|also|else|other one)\b",
+    re.IGNORECASE,
+)
+# Anything that looks like a request for content is never small talk
+RESEARCH_CUE = re.compile(
+    r"\b(what|which|why|how|who|where|when|explain|summari[sz]e|compare|describe|list|show|give|tell|find|now|next|"
+    r"paper|papers|method|results?|more|and|or|but|about|vs)\b",
+    re.IGNORECASE,
+)
+# Titles, authors and years need the LLM-extracted metadata hints for scoping
+METADATA_CUE = re.compile(r"\b(19|20)\d{2}\b|[\"“”']|\b(by|from|titled|called|author|authors|wrote)\b", re.IGNORECASE)
+QUESTION_START = re.compile(
+    r"^\s*(what|which|who|how|why|when|where|does|do|is|are|can|could|compare|summari[sz]e|explain|list|describe|give)\b",
+    re.IGNORECASE,
+)
+
+# Tiny labelled corpus for the on-CPU Naive Bayes intent model
+TRAINING_DATA: List[Tuple[str, str]] = [(text, "casual") for text in (
+    "hi", "hello there", "hey how are you", "good morning", "thanks", "thank you so much", "thanks a lot that helps",
+    "great thanks", "cool", "awesome", "perfect thank you", "ok got it", "bye", "see you later", "goodbye",
+    "nice one", "you are great", "how are you doing today", "what's up", "who are you", "what can you do",
+    "lol", "haha nice", "cheers mate", "have a nice day", "that was helpful", "appreciate it", "no worries",
+    "sounds good", "ok thanks bye", "hello again", "good night", "i am fine", "nice to meet you",
+)] + [(text, "research") for text in (
+    "what is the main contribution of the paper", "summarize the method proposed in 2401.12345",
+    "how does the model handle long context", "compare the training objectives of these papers",
+    "which datasets are used for evaluation", "what are the limitations of the approach",
+    "explain the attention mechanism used", "what results do they report on imagenet",
+    "how is reinforcement learning used for reasoning", "what loss function is optimized",
+    "describe the architecture of the transformer encoder", "what baselines do they compare against",
+    "how many parameters does the model have", "what is retrieval augmented generation",
+    "list the ablation studies in the paper", "what are the key findings about scaling laws",
+    "how do diffusion models generate images", "what optimizer and learning rate were used",
+    "give an overview of graph neural networks in my library", "which papers discuss llm alignment",
+    "what benchmark scores does the method achieve", "how does the proposed method compare to bert",
+    "what future work do the authors suggest", "explain the theoretical guarantees of the algorithm",
+    "what hardware was used to train the model", "what is the difference between lora and full finetuning",
+    "how do they evaluate hallucination", "what is the role of the reward model",
+)]
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+|\?", text.lower())
+
+class NaiveBayesIntent:
+    """Multinomial Naive Bayes (Laplace smoothing) over word unigrams: microseconds per message."""
+    def __init__(self, examples: List[Tuple[str, str]]):
+        self.counts: Dict[str, Counter] = {}
+        self.priors: Dict[str, float] = {}
+        labels = Counter(label for _, label in examples)
+        for label in labels:
+            self.counts[label] = Counter(t for text, l in examples if l == label for t in _tokens(text))
+            self.priors[label] = math.log(labels[label] / len(examples))
+        self.vocabulary = set().union(*self.counts.values())
+        self.totals = {label: sum(c.values()) for label, c in self.counts.items()}
+
+    def only_known(self, text: str, label: str) -> bool:
+        """Whether every word of `text` occurs in the `label` training examples."""
+        return all(t in self.counts[label] for t in _tokens(text) if t != "?")
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        tokens = [t for t in _tokens(text) if t in self.vocabulary]
+        log_probs = {
+            label: self.priors[label] + sum(
+                math.log((self.counts[label][t] + 1) / (self.totals[label] + len(self.vocabulary))) for t in tokens
+            )
+            for label in self.counts
+        }
+        top = max(log_probs.values())
+        exp = {label: math.exp(lp - top) for label, lp in log_probs.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+intent_model = NaiveBayesIntent(TRAINING_DATA)
+
+def classify(message: str, has_history: bool) -> Tuple[FastPath, str]:
+    """Return the fast path for a message (or "none" when unsure) and the reason."""
+    words = len(message.split())
+    if not message.strip():
+        return "none", "empty"
+    small_talk = words <= MAX_CASUAL_WORDS and not RESEARCH_CUE.search(message)
+    if small_talk and CASUAL_RULE.match(message):
+        return "casual", "rule"
+
+    # Explicit IDs scope the question on their own, unless it refers back to earlier turns
+    if get_explicit_ids(message) and not (has_history and ANAPHORA.search(message)):
+        return "research", "arxiv_id"
+
+    proba = intent_model.predict_proba(message)
+    # Words never seen in small talk ("datasets", "limitations") are content: leave those to the analysis LLM
+    if small_talk and proba["casual"] >= CASUAL_CONFIDENCE and intent_model.only_known(message, "casual"):
+        return "casual", "model"
+    # Only first turns: later ones are often elliptical ("and the limitations?")
+    if (
+        not has_history and words >= 4 and proba["research"] >= RESEARCH_CONFIDENCE
+        and QUESTION_START.match(message) and not ANAPHORA.search(message) and not METADATA_CUE.search(message)
+    ):
+        return "research", "model"
+    return "none", "unsure"
+
+async def pre_classify(state: State) -> Dict:
+    """
+    Local pre-classifier ahead of summarize_conv/analyze_query. Small talk goes
+    straight to handle_general_talk; self-contained research questions (e.g.
+    with explicit arXiv IDs) go straight to scoping; anything else gets the full analysis.
+    """
+    message = state["messages"][-1].content
+    has_history = any(isinstance(m, (HumanMessage, AIMessage)) for m in state["messages"][:-1])
+    route, reason = classify(message, has_history)
+    metrics.inc("arxivhub_preclassifier_total", route=route, reason=reason)
+    logger.info(f"Pre-classifier: {route} ({reason})")
+
+    if route == "casual":
+        return {"fastPath": route, "intent": "casual", "questionIsClear": True, "rewrittenQuestion": message}
+    if route == "research":
+        explicit_ids = get_explicit_ids(message)
+        return {
+            "fastPath": route,
+            "intent": "research",
+            "questionIsClear": True,
+            "rewrittenQuestion": message,
+            "originalQuestion": message,
+            "paperScope": "single" if len(explicit_ids) == 1 else "multiple",
+            "metadataHintPresent": False,
+            "metadataHints": MetadataHints(),
+            # summarize_conv is skipped: the question stands alone, don't answer it with an earlier turn's summary
+            "conversationSummary": "",
+        }
+    return {"fastPath": "none"}
@@ -1,32 +1,11 @@
-import os
-from config import llm
-from core.schemas import State, QueryAnalysis
-from core.prompts import get_query_analysis_prompt
+from config import gateway
+from core.schemas import State, QueryAnalysis, QueryAnalysisWithSummary, RuntimeContext
+from langgraph.runtime import Runtime
+from core.prompts import get_query_analysis_prompt, get_summary_and_analysis_prompt
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from rag.conversation_summary import recent_conversation
 
-llm_structured = (
-    llm
-    .with_config(temperature=0.1)
-    .with_structured_output(QueryAnalysis)
-)
-
-async def analyze_query(state: State) -> dict:
-    last_user_msg = state["messages"][-1].content
-    summary = state.get("conversationSummary", "")
-
-    context = f"""
-    Conversation summary:
-    {summary}
-
-    User question:
-    {last_user_msg}
-    """.strip()
-
-    analysis: QueryAnalysis = await llm_structured.ainvoke([
-        SystemMessage(content=get_query_analysis_prompt()),
-        HumanMessage(content=context)
-    ])
-
+def _analysis_update(analysis: QueryAnalysis, state: State, last_user_msg: str) -> dict:
     # Case 1: question is NOT clear → ask for clarification
     if not analysis.is_clear:
         return {
@@ -50,3 +29,44 @@ async def analyze_query(state: State) -> dict:
         "originalQuestion": state.get("originalQuestion") or last_user_msg
     }
 
+async def analyze_query(state: State, runtime: Runtime[RuntimeContext]) -> dict:
+    last_user_msg = state["messages"][-1].content
+    summary = state.get("conversationSummary", "")
+
+    context = f"""
+    Conversation summary:
+    {summary}
+
+    User question:
+    {last_user_msg}
+    """.strip()
+
+    analysis: QueryAnalysis = await gateway.ainvoke("llm", [
+        SystemMessage(content=get_query_analysis_prompt()),
+        HumanMessage(content=context)
+    ], user_id=runtime.context.user_id, schema=QueryAnalysis)
+    return _analysis_update(analysis, state, last_user_msg)
+
+async def summarize_and_analyze(state: State, runtime: Runtime[RuntimeContext]) -> dict:
+    """
+    summarize_conversation_history + analyze_query in a single LLM call
+    (one structured output carrying both the analysis and the updated summary).
+    """
+    last_user_msg = state["messages"][-1].content
+    conversation = recent_conversation(state["messages"])
+    if not conversation:
+        # Nothing to summarize yet: plain analysis
+        update = await analyze_query({**state, "conversationSummary": ""}, runtime)
+        return {**update, "conversationSummary": ""}
+
+    context = f"""
+    {conversation}
+    User question:
+    {last_user_msg}
+    """.strip()
+
+    analysis: QueryAnalysisWithSummary = await gateway.ainvoke("llm", [
+        SystemMessage(content=get_summary_and_analysis_prompt()),
+        HumanMessage(content=context)
+    ], user_id=runtime.context.user_id, schema=QueryAnalysisWithSummary)
+    return {**_analysis_update(analysis, state, last_user_msg), "conversationSummary": analysis.updatedSummary.strip()}
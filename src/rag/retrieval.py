@@ -1,91 +1,228 @@
 import logging
-from typing import List, Dict
-from core.schemas import State, RuntimeContext
-from langgraph.runtime import Runtime 
+from typing import List, Dict, Any
+from config import HIERARCHICAL_INDEX
+from core.schemas import State, RuntimeContext, OUTLINE_LEVELS, DEFAULT_RETRIEVAL_SETTINGS
+from core.telemetry import timed, metrics, add_to_trace
+from core.tokens import count_tokens
+from rag.retrieval_budget import RetrievalBudget, plan_budget, select_hits
+from rag.neighbours import expand_neighbours, fetch_chunk_texts
+from core.payload_codec import HIT_FIELDS
+from langgraph.runtime import Runtime
 from langchain_core.documents import Document
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny, ScoredPoint
 
 logger = logging.getLogger(__name__)
 
+# Coarse stage of hierarchical retrieval
+PAPER_CANDIDATES = 4     # papers picked from "paper" vectors when the query is unscoped
+SECTIONS_PER_PAPER = 2   # sections kept per paper before searching its chunks
+
+# Paper and section points, excluded from chunk searches (legacy points have no level)
+OUTLINE_POINTS = FieldCondition(key="metadata.level", match=MatchAny(any=OUTLINE_LEVELS))
+
+def _level(level: str) -> FieldCondition:
+    return FieldCondition(key="metadata.level", match=MatchValue(value=level))
+
+def unindexed_papers(paper_metadata: Dict[str, Any]) -> List[str]:
+    """Papers without outline vectors (ingested before hierarchical indexing): num_vectors counts chunks only."""
+    return [
+        paper_id for paper_id, entry in paper_metadata.items()
+        if entry.get("num_vectors", 0) <= entry.get("total_chunks", 0)
+    ]
+
+def _to_document(hit, text: str) -> Document:
+    # Map native Qdrant point (projected to its metadata) and its fetched text back to LangChain Document
+    return Document(page_content=text, metadata=hit.payload.get("metadata", {}))
+
+async def select_papers(vectorstore: QdrantVectorStore, query_vector: List[float], user_id: str) -> List[str]:
+    """Coarse stage for unscoped queries: best matching papers by their title + abstract vector."""
+    with timed("qdrant", "query_points", level="paper"):
+        result = await vectorstore.client.query_points(
+            collection_name=vectorstore.collection_name,
+            query=query_vector,
+            query_filter=Filter(must=[FieldCondition(key="metadata.user_id", match=MatchValue(value=user_id)), _level("paper")]),
+            limit=PAPER_CANDIDATES,
+            with_payload=["metadata.paper_id"],
+        )
+    return [hit.payload["metadata"]["paper_id"] for hit in result.points]
+
+async def select_sections(vectorstore: QdrantVectorStore, query_vector: List[float], user_id: str, paper_ids: List[str]) -> Dict[str, List[str]]:
+    """Coarse stage: the best sections of each paper. Papers without section vectors map to []."""
+    with timed("qdrant", "query_points_groups", level="section"):
+        result = await vectorstore.client.query_points_groups(
+            collection_name=vectorstore.collection_name,
+            query=query_vector,
+            group_by="metadata.paper_id",
+            limit=len(paper_ids),
+            group_size=SECTIONS_PER_PAPER,
+            query_filter=Filter(must=[
+                FieldCondition(key="metadata.user_id", match=MatchValue(value=user_id)),
+                FieldCondition(key="metadata.paper_id", match=MatchAny(any=paper_ids)),
+                _level("section"),
+            ]),
+            with_payload=["metadata.section"],
+        )
+    sections = {paper_id: [] for paper_id in paper_ids}
+    for group in result.groups:
+        sections[group.id] = [hit.payload["metadata"]["section"] for hit in group.hits]
+    return sections
+
+async def coarse_to_fine(
+    vectorstore: QdrantVectorStore,
+    query_vector: List[float],
+    user_id: str,
+    arxiv_ids: List[str],
+    budget: RetrievalBudget,
+    paper_metadata: Dict[str, Any],
+    ) -> List[List[ScoredPoint]]:
+    """
+    Hierarchical retrieval: select papers (when unscoped) and their best sections
+    first, then search chunks only inside those sections. Unscoped queries also
+    search every chunk of the papers without paper vectors (legacy ingestion), which
+    `select_papers` cannot pick. Returns hits grouped by paper; empty when the
+    library has no paper/section vectors at all.
+    """
+    paper_ids = arxiv_ids or await select_papers(vectorstore, query_vector, user_id)
+    # Unscoped: papers that select_papers cannot see are searched whole, next to the selected ones
+    legacy = [] if arxiv_ids else [pid for pid in unindexed_papers(paper_metadata) if pid not in paper_ids]
+    if not paper_ids:
+        return []
+    sections = await select_sections(vectorstore, query_vector, user_id, paper_ids)
+
+    # One clause per paper: its selected sections, or the whole paper if it has none
+    per_paper = []
+    for paper_id, names in sections.items():
+        must = [FieldCondition(key="metadata.paper_id", match=MatchValue(value=paper_id))]
+        if names:
+            must.append(FieldCondition(key="metadata.section", match=MatchAny(any=names)))
+        per_paper.append(Filter(must=must))
+    if legacy:
+        per_paper.append(Filter(must=[FieldCondition(key="metadata.paper_id", match=MatchAny(any=legacy))]))
+    chunk_filter = Filter(
+        must=[FieldCondition(key="metadata.user_id", match=MatchValue(value=user_id)), Filter(should=per_paper)],
+        must_not=[OUTLINE_POINTS],
+    )
+
+    if arxiv_ids:
+        # Scoped: keep paper representativity
+        with timed("qdrant", "query_points_groups", level="chunk"):
+            result = await vectorstore.client.query_points_groups(
+                collection_name=vectorstore.collection_name,
+                query=query_vector,
+                group_by="metadata.paper_id",
+                limit=len(paper_ids),
+                group_size=budget.group_size,
+                query_filter=chunk_filter,
+                score_threshold=budget.score_threshold,
+                with_payload=HIT_FIELDS,
+            )
+        groups = [group.hits for group in result.groups]
+    else:
+        with timed("qdrant", "query_points", level="chunk"):
+            result = await vectorstore.client.query_points(
+                collection_name=vectorstore.collection_name,
+                query=query_vector,
+                query_filter=chunk_filter,
+                limit=budget.top_k,
+                score_threshold=budget.score_threshold,
+                with_payload=HIT_FIELDS,
+            )
+        groups = [result.points] if result.points else []
+    logger.info(f"Coarse-to-fine: papers {list(sections)} + {len(legacy)} unindexed | sections {sections} -> {sum(map(len, groups))} chunks")
+    return groups
+
 async def retrieve(state: State, runtime: Runtime[RuntimeContext]) -> Dict[str, List]:
     """
-    Retrieve relevant chunks. Uses Grouped Search for diversity if IDs are known,
-    otherwise falls back to standard similarity search using native Qdrant calls.
+    Retrieve relevant chunks. Routes coarse-to-fine through paper and section
+    vectors when available, then falls back to Grouped Search for diversity if
+    IDs are known, otherwise to standard similarity search using native Qdrant calls.
+    The retrieval budget adapts to the query scope and the hits' score distribution.
+    Searches return IDs, scores and metadata only; texts are fetched for the hits kept.
     """
     user_id = runtime.context.user_id
     vectorstore = runtime.context.vectorstore
-    settings = runtime.context.settings
-    
-    score_threshold = settings.get("retrieval_score_threshold", 0.4)
-    total_top_k = settings.get("retrieval_top_k", 5)
-    
+    settings = {**DEFAULT_RETRIEVAL_SETTINGS, **runtime.context.settings}
+
     query = state.get("rewrittenQuestion", "")
     arxiv_ids = state.get("arxivIDs", [])
-    
-    logger.info(f"Retrieval Query: {query} | Scoping to Papers: {arxiv_ids}")
-    
+    budget = plan_budget(state.get("paperScope", "multiple"), len(arxiv_ids), settings)
+
+    logger.info(f"Retrieval Query: {query} | Scoping to Papers: {arxiv_ids} | Budget: {budget}")
+
     if not query or len(query) < 2:
         return {"retrievedDocs": [], "confidenceScores": []}
 
     # 1. Base Filters
     conditions = [FieldCondition(key="metadata.user_id", match=MatchValue(value=user_id))]
-    retrieved_docs = []
-    confidence_scores = []
+    groups: List[List[ScoredPoint]] = []
 
     query_vector = await vectorstore.embeddings.aembed_query(query)
 
-    # 2. Branching Logic
-    if arxiv_ids:
+    # 2. Hierarchical routing (papers -> sections -> chunks)
+    if HIERARCHICAL_INDEX:
+        groups = await coarse_to_fine(vectorstore, query_vector, user_id, arxiv_ids, budget, runtime.context.metadata)
+
+    # 3. Branching Logic
+    if arxiv_ids and not groups:
 
         # --- Grouped search: ensure paper representativity ---
         conditions.append(FieldCondition(key="metadata.paper_id", match=MatchAny(any=arxiv_ids)))
-        group_limit = 3 if len(arxiv_ids) > 1 else total_top_k
 
-        search_result = await vectorstore.client.query_points_groups(
-            collection_name=vectorstore.collection_name, 
-            query=query_vector,
-            group_by="metadata.paper_id",
-            limit=len(arxiv_ids),   # nb of distinct groups (papers)
-            group_size=group_limit, # nb of chunks per group
-            query_filter=Filter(must=conditions),
-            score_threshold=score_threshold,
-            with_payload=True
-        )
-        for group in search_result.groups:
-            for hit in group.hits:
-                # Map native Qdrant point back to LangChain Document
-                payload = hit.payload #page content and metadata 
-                retrieved_docs.append(Document(
-                    page_content=payload.get("page_content", ""),
-                    metadata=payload.get("metadata", {})
-                ))
-                confidence_scores.append(hit.score)
-    
-    if not retrieved_docs:
+        with timed("qdrant", "query_points_groups"):
+            search_result = await vectorstore.client.query_points_groups(
+                collection_name=vectorstore.collection_name,
+                query=query_vector,
+                group_by="metadata.paper_id",
+                limit=len(arxiv_ids),         # nb of distinct groups (papers)
+                group_size=budget.group_size, # nb of chunks per group
+                query_filter=Filter(must=conditions, must_not=[OUTLINE_POINTS]),
+                score_threshold=budget.score_threshold,
+                with_payload=HIT_FIELDS
+            )
+        groups = [group.hits for group in search_result.groups]
+
+    if not groups:
         if arxiv_ids:
             logger.info("Grouped search yielded no results. Falling back to global search.")
         else:
             logger.info("No specific papers scoped. Performing standard similarity search.")
-        
+
         # --- Standard similarity search ---
-        search_result = await vectorstore.client.query_points(
-            collection_name=vectorstore.collection_name,
-            query=query_vector,
-            query_filter=Filter(must=conditions),
-            limit=total_top_k,
-            score_threshold=score_threshold,
-            with_payload=True
-        )
-        for hit in search_result.points:
-            payload = hit.payload
-            retrieved_docs.append(Document(
-                page_content=payload.get("page_content", ""),
-                metadata=payload.get("metadata", {})
-            ))
-            confidence_scores.append(hit.score)
-    
-    logger.info(f"Retrieved {len(retrieved_docs)} docs with confidence scores {confidence_scores}")
+        with timed("qdrant", "query_points"):
+            search_result = await vectorstore.client.query_points(
+                collection_name=vectorstore.collection_name,
+                query=query_vector,
+                query_filter=Filter(must=conditions, must_not=[OUTLINE_POINTS]),
+                limit=budget.top_k,
+                score_threshold=budget.score_threshold,
+                with_payload=HIT_FIELDS
+            )
+        groups = [search_result.points] if search_result.points else []
+
+    # 4. Score-based pruning (gap / confidence margin / overall cap), on IDs, scores and metadata only
+    fetched = sum(map(len, groups))
+    hits = select_hits(groups, budget)
+
+    # 5. Texts of the surviving hits only, with one projected retrieve-by-ID.
+    # Read from the vector store, not the chunk cache: the search just returned these points,
+    # and a hit whose point was deleted in the meantime is dropped
+    texts = await fetch_chunk_texts(vectorstore, [str(hit.id) for hit in hits], cached=False)
+    hits = [hit for hit in hits if texts[str(hit.id)] is not None]
+    retrieved_docs = [_to_document(hit, texts[str(hit.id)]) for hit in hits]
+    confidence_scores = [hit.score for hit in hits]
+
+    # 6. Windowed context: stitch neighbouring chunks around the best hits
+    if settings["neighbour_window"] > 0:
+        retrieved_docs = await expand_neighbours(vectorstore, retrieved_docs, confidence_scores, settings["neighbour_window"])
+
+    context_tokens = sum(count_tokens(doc.page_content) for doc in retrieved_docs)
+    metrics.observe("arxivhub_retrieval_docs", len(retrieved_docs), adaptive=budget.adaptive)
+    metrics.observe("arxivhub_retrieval_context_tokens", context_tokens, adaptive=budget.adaptive)
+    add_to_trace(retrieved_docs=len(retrieved_docs), context_tokens=context_tokens)
+
+    logger.info(f"Retrieved {len(retrieved_docs)}/{fetched} docs ({context_tokens} tokens) with confidence scores {confidence_scores}")
     return {
         "retrievedDocs": retrieved_docs,
         "confidenceScores": confidence_scores,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,86 @@
+import math
+from dataclasses import dataclass
+from typing import List, Dict, Any, Sequence, TypeVar
+
+Hit = TypeVar("Hit") # any scored point (exposes `.score`)
+
+# Hard cap on chunks handed to grading/generation per turn
+MAX_CONTEXT_CHUNKS = 12
+# Never prune a paper's hits below this many
+MIN_HITS_PER_GROUP = 1
+# Stop when the score drops by more than this between consecutive hits
+SCORE_GAP = 0.08
+# ... or falls this far below the paper's best hit
+RELATIVE_DROP = 0.15
+# Hits at least this far above the threshold are confident: once the best hit
+# clears it, weaker hits below the margin are not needed
+CONFIDENCE_MARGIN = 0.2
+
+@dataclass
+class RetrievalBudget:
+    group_size: int       # chunks fetched per paper (grouped search)
+    top_k: int            # chunks fetched for unscoped search
+    max_docs: int         # chunks kept after score-based pruning
+    score_threshold: float
+    adaptive: bool = True
+
+def plan_budget(paper_scope: str, num_papers: int, settings: Dict[str, Any]) -> RetrievalBudget:
+    """
+    Size retrieval from the query scope: one scoped paper gets a deep
+    top-k, several papers share a per-paper budget, and broad unscoped
+    questions get a wider net (pruned afterwards by score).
+    """
+    top_k = settings["retrieval_top_k"]
+    threshold = settings["retrieval_score_threshold"]
+    if not settings.get("adaptive_retrieval", True):
+        # Fixed legacy parameters
+        group_size = 3 if num_papers > 1 else top_k
+        return RetrievalBudget(group_size, top_k, max(top_k, group_size * num_papers), threshold, adaptive=False)
+
+    if num_papers == 1:
+        return RetrievalBudget(top_k, top_k, top_k, threshold)
+    if num_papers > 1:
+        # Share roughly two papers' worth of depth across the scoped papers
+        group_size = max(2, min(top_k, math.ceil(2 * top_k / num_papers)))
+        return RetrievalBudget(group_size, top_k, min(MAX_CONTEXT_CHUNKS, group_size * num_papers), threshold)
+    if paper_scope == "single":
+        # Unscoped but about one paper: a few strong hits are enough
+        k = max(3, top_k - 2)
+        return RetrievalBudget(k, k, k, threshold)
+    k = min(MAX_CONTEXT_CHUNKS, top_k + 3)
+    return RetrievalBudget(k, k, k, threshold)
+
+def _prune(hits: Sequence[Hit], budget: RetrievalBudget, min_keep: int) -> List[Hit]:
+    ranked = sorted(hits, key=lambda h: h.score, reverse=True)
+    if not ranked:
+        return []
+    best = ranked[0].score
+    confident = best >= budget.score_threshold + CONFIDENCE_MARGIN
+    kept = [ranked[0]]
+    for hit in ranked[1:]:
+        if len(kept) >= min_keep:
+            if confident and hit.score < budget.score_threshold + CONFIDENCE_MARGIN:
+                break # early stop: the confident hits already answer
+            if kept[-1].score - hit.score > SCORE_GAP or best - hit.score > RELATIVE_DROP:
+                break
+        kept.append(hit)
+    return kept
+
+def select_hits(groups: List[List[Hit]], budget: RetrievalBudget) -> List[Hit]:
+    """
+    Score-gap pruning of retrieved hits, per paper group, then capped at
+    `budget.max_docs` overall. Group (paper) order is preserved.
+    """
+    if not budget.adaptive:
+        return [hit for group in groups for hit in group]
+    pruned = [_prune(group, budget, MIN_HITS_PER_GROUP if len(groups) > 1 else 2) for group in groups]
+    flat = [hit for group in pruned for hit in group]
+    if len(flat) <= budget.max_docs:
+        return flat
+    # Keep every paper's best hit, then the strongest remaining ones
+    keep = {id(group[0]) for group in pruned if group}
+    for hit in sorted(flat, key=lambda h: h.score, reverse=True):
+        if len(keep) >= budget.max_docs:
+            break
+        keep.add(id(hit))
+    return [hit for hit in flat if id(hit) in keep]
@@ -1,10 +1,11 @@
 import re
 import logging
 from core.schemas import State, RuntimeContext
+from core.executors import run_blocking
 from rapidfuzz import fuzz
 from statistics import mean
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple, Any
 from langgraph.runtime import Runtime 
 logger = logging.getLogger(__name__)
 
@@ -34,32 +35,12 @@ def normalize_query_years(q_years: List[str], recent_window: int = 3) -> Set[int
             )
     return normalized_q_years 
 
-async def fuzzy_match_papers(state: State, runtime: Runtime[RuntimeContext]) -> Dict[str, List[str]]:
+def score_papers(papers: List[Tuple[str, Dict[str, Any]]], explicit_ids: Set[str], query_hints, top_n: int) -> List[Tuple[str, float]]:
     """
-    Select top-N paper IDs based on fuzzy matching between query hints and paper metadata.
-    Args:
-        LangGraph state to retrieve query_hints: {'titles': [...], 'authors': [...], 'topics': [...], 'publicationYears': [...]}
-        Runtime Context to retrieve user's metadata: {paper_id: {Title, Authors, Summary, Published, ...}}
-    Returns:
-        top-N paper IDs ranked by fuzzy matching score
+    CPU-bound fuzzy scoring of the whole library against the query hints.
+    Runs in the blocking pool: `papers` is a snapshot of the metadata items.
+    Returns (paper_id, total score) pairs, best first.
     """
-    user_query = state.get("originalQuestion", "")
-    query_hints = state.get("metadataHints")
-    metadata = runtime.context.metadata
-    scope = state.get("paperScope", "multiple") 
-    top_n = 2 if scope == "single" else 4 
-    
-    # Arxiv ids mentionned explicitly in the user's query
-    explicit_ids = get_explicit_ids(user_query)
-    if len(explicit_ids) >= top_n:
-        return {"arxivIDs": list(explicit_ids)}
-
-    # Return explicit ids (or empty) if no hints provided
-    if query_hints is None or not any([
-        query_hints.titles, query_hints.authors, query_hints.topics, query_hints.publicationYears
-    ]):
-        return {"arxivIDs": list(explicit_ids)}
-
     # Weights for each field
     weights = {
         "titles": 5.0,
@@ -78,7 +59,7 @@ async def fuzzy_match_papers(state: State, runtime: Runtime[RuntimeContext]) ->
     MIN_THRESHOLD = 1
     primary_scores = {} # Preselecting papers based on title and topics 
     scores = {} # Ordering based on total score 
-    for paper_id, paper_data in metadata.items():
+    for paper_id, paper_data in papers:
         # Assign max score if the paper is explicitly mentionned 
         if paper_id.lower() in explicit_ids:
             primary_scores[paper_id] = 10.0
@@ -132,15 +113,47 @@ async def fuzzy_match_papers(state: State, runtime: Runtime[RuntimeContext]) ->
         
     # Fallback if no matches
     if not primary_scores:
-        return {"arxivIDs": []} 
+        return []
     preselected_papers = sorted(primary_scores, key=lambda pid: primary_scores[pid], reverse=True)[:top_n]
     # Sort by score descending and return top_n
     top_papers = sorted(preselected_papers, key=lambda pid: scores[pid], reverse=True)[:top_n]
+    return [(pid, scores[pid]) for pid in top_papers]
+
+async def fuzzy_match_papers(state: State, runtime: Runtime[RuntimeContext]) -> Dict[str, List[str]]:
+    """
+    Select top-N paper IDs based on fuzzy matching between query hints and paper metadata.
+    Args:
+        LangGraph state to retrieve query_hints: {'titles': [...], 'authors': [...], 'topics': [...], 'publicationYears': [...]}
+        Runtime Context to retrieve user's metadata: {paper_id: {Title, Authors, Summary, Published, ...}}
+    Returns:
+        top-N paper IDs ranked by fuzzy matching score
+    """
+    user_query = state.get("originalQuestion", "")
+    query_hints = state.get("metadataHints")
+    metadata = runtime.context.metadata
+    scope = state.get("paperScope", "multiple") 
+    top_n = 2 if scope == "single" else 4 
     
+    # Arxiv ids mentionned explicitly in the user's query
+    explicit_ids = get_explicit_ids(user_query)
+    if len(explicit_ids) >= top_n:
+        return {"arxivIDs": list(explicit_ids)}
+
+    # Return explicit ids (or empty) if no hints provided
+    if query_hints is None or not any([
+        query_hints.titles, query_hints.authors, query_hints.topics, query_hints.publicationYears
+    ]):
+        return {"arxivIDs": list(explicit_ids)}
+
+    # Score a snapshot of the library off the event loop (rapidfuzz over every paper)
+    ranked = await run_blocking(score_papers, list(metadata.items()), explicit_ids, query_hints, top_n)
+    if not ranked:
+        return {"arxivIDs": []}
+    top_papers = [pid for pid, _ in ranked]
+
     logger.info(f"--- Fuzzy Match Results ({len(top_papers)} papers) ---")
-    for pid in top_papers:
+    for pid, score in ranked:
         title = metadata.get(pid, {}).get("Title", "No Title")
-        score = scores.get(pid, 0.0)
         logger.info(f"ID: {pid} | Score: {score:.2f} | Title: {title}")
 
     return {"arxivIDs": top_papers}
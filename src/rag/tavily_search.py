@@ -1,6 +1,7 @@
 import logging
 from config import tavily 
 from core.schemas import State
+from core.telemetry import metrics, timed
 from langchain_core.documents import Document
 logger = logging.getLogger(__name__)
 
@@ -16,11 +17,13 @@ async def tavily_search(state: State):
     logger.info(f"--- WEB SEARCHING: {query} ---")
     
     try:
-        response = await tavily.search(
-            query=query, 
-            search_depth="advanced", 
-            max_results=3
-        )
+        with timed("tavily", "search"):
+            response = await tavily.search(
+                query=query, 
+                search_depth="advanced", 
+                max_results=3
+            )
+        metrics.inc("arxivhub_tavily_results_total", len(response.get("results", [])))
         
         search_docs = [
             Document(
@@ -34,9 +37,11 @@ async def tavily_search(state: State):
             for result in response.get("results", [])
         ]
         
-        # Merge with existing ArXiv docs if they exist
+        # Merge with existing ArXiv docs if they exist (scores stay aligned with docs)
         existing_docs = state.get("retrievedDocs", [])
-        return {"retrievedDocs": existing_docs + search_docs}
+        existing_scores = state.get("confidenceScores", [])[:len(existing_docs)]
+        web_scores = [result.get("score", 0.0) for result in response.get("results", [])]
+        return {"retrievedDocs": existing_docs + search_docs, "confidenceScores": existing_scores + web_scores}
 
     except Exception as e:
         print(f"Tavily search failed: {e}")
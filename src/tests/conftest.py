@@ -0,0 +1,14 @@
+import os
+import sys
+from pathlib import Path
+
+# Modules import each other from src/ (as when running the app from there)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.py builds remote clients at import time: give them inert credentials
+for _var, _value in {
+    "NVIDIA_API_KEY": "offline",
+    "TAVILY_API_KEY": "offline",
+    "EMBEDDING_MODEL": "nvidia/nv-embed-v1",
+}.items():
+    os.environ.setdefault(_var, _value)
@@ -0,0 +1,18 @@
+from langchain_core.documents import Document
+from rag.context import assemble_context
+
+def _doc(text: str, paper_id: str = "2401.00001") -> Document:
+    return Document(page_content=text, metadata={"paper_id": paper_id})
+
+def test_scores_follow_the_packed_passages():
+    shared = "attention weights are normalized across every head of the layer"
+    docs = [
+        _doc("Transformers stack self-attention layers. " + shared),
+        _doc("An unrelated passage about diffusion models.", "2401.00002"),
+        _doc(shared + " and summed into the residual stream."),
+    ]
+    packed, scores = assemble_context(docs, [0.6, 0.7, 0.9], token_budget=1000)
+
+    assert len(packed) == len(scores) == 2
+    assert scores == [0.9, 0.7] # the stitched passage keeps its best part's score
+    assert packed[0].page_content.endswith("residual stream.")
@@ -0,0 +1,39 @@
+import asyncio
+from typing import List
+from benchmarks.fakes import HashingEmbeddings
+from core.embedding_batcher import BatchingEmbeddings
+from core.telemetry import InstrumentedEmbeddings
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.query_calls = 0
+        self.batch_calls = 0
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.query_calls += 1
+        return await super().aembed_query(text)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        self.batch_calls += 1
+        return await super().aembed_queries(texts)
+
+class PerQueryEmbeddings(HashingEmbeddings):
+    aembed_queries = None # no batched query call
+
+def test_concurrent_queries_share_one_request():
+    inner = CountingEmbeddings()
+    embedder = BatchingEmbeddings(InstrumentedEmbeddings(inner), max_batch=32, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(embedder.aembed_query(f"query {i % 5}") for i in range(10)))
+
+    vectors = asyncio.run(run())
+    assert (inner.batch_calls, inner.query_calls) == (1, 0)
+    assert vectors[0] == vectors[5] == inner.embed_query("query 0")
+
+def test_embedder_without_batched_queries_is_not_delayed():
+    inner = PerQueryEmbeddings(dim=8)
+    embedder = BatchingEmbeddings(InstrumentedEmbeddings(inner), max_wait_ms=10_000)
+    vector = asyncio.run(asyncio.wait_for(embedder.aembed_query("attention"), timeout=1))
+    assert vector == inner.embed_query("attention")
@@ -0,0 +1,25 @@
+import asyncio
+from ingestion import importer
+
+def _fake_bulk(ingested):
+    async def bulk_ingest_papers(user_id, paper_metadata, vectorstore, arxiv_ids, executor=None, on_progress=None):
+        for arxiv_id in arxiv_ids:
+            ingested.append(arxiv_id)
+            paper_metadata[arxiv_id] = {"total_chunks": 3}
+            on_progress({"id": arxiv_id, "stage": "upserted", "chunks": 3})
+        return {"successful": list(arxiv_ids), "failed": []}
+    return bulk_ingest_papers
+
+def test_done_papers_removed_from_library_are_imported_again(tmp_path, monkeypatch):
+    ingested = []
+    monkeypatch.setattr(importer, "get_journal_path", lambda user_id: tmp_path / "import_journal.jsonl")
+    monkeypatch.setattr(importer, "bulk_ingest_papers", _fake_bulk(ingested))
+    ids = ["2401.00001", "2401.00002"]
+    metadata = {}
+
+    asyncio.run(importer.import_reading_list("alice", None, ids, paper_metadata=metadata))
+    del metadata["2401.00002"] # deleted (or moved) after the import
+    stats = asyncio.run(importer.import_reading_list("alice", None, ids, paper_metadata=metadata))
+
+    assert ingested == ids + ["2401.00002"]
+    assert (stats.already_in_library, stats.resumed_from_journal, stats.ingested) == (1, 0, 1)
@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from qdrant_client import AsyncQdrantClient, models
+from ingestion import paperingestion
+from ingestion.library_ops import transfer_papers
+from ingestion.paperingestion import load_paper_metadata, save_paper_metadata
+
+COLLECTION = "test_library_ops"
+PAPER = "2401.00001"
+ENTRY = {"Title": "Attention", "total_chunks": 1, "num_vectors": 1, "ingested_at": "2026-01-01T00:00:00"}
+
+async def _library(owner: str) -> SimpleNamespace:
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    payload = {"metadata": {"user_id": owner, "paper_id": PAPER}}
+    await client.upsert(COLLECTION, points=[models.PointStruct(id=str(uuid.uuid4()), vector=[1, 0], payload=payload)])
+    return SimpleNamespace(client=client, collection_name=COLLECTION)
+
+def test_resumed_move_completes_after_crash_between_saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(paperingestion, "BASE_USER_DATA_DIR", tmp_path)
+    source, target = f"src-{uuid.uuid4().hex[:8]}", f"dst-{uuid.uuid4().hex[:8]}"
+
+    async def run():
+        # Crashed move: points and target metadata updated, source metadata not saved yet
+        vectorstore = await _library(owner=target)
+        await save_paper_metadata(source, {PAPER: dict(ENTRY)})
+        await save_paper_metadata(target, {PAPER: dict(ENTRY)})
+        result = await transfer_papers(source, target, vectorstore, [PAPER], move=True)
+        return result, await load_paper_metadata(source), await load_paper_metadata(target)
+
+    result, source_metadata, target_metadata = asyncio.run(run())
+    assert result["successful"] == [PAPER] and not result["failed"]
+    assert PAPER not in source_metadata and PAPER in target_metadata
+
+def test_move_refuses_paper_owned_by_both_libraries(tmp_path, monkeypatch):
+    monkeypatch.setattr(paperingestion, "BASE_USER_DATA_DIR", tmp_path)
+    source, target = f"src-{uuid.uuid4().hex[:8]}", f"dst-{uuid.uuid4().hex[:8]}"
+
+    async def run():
+        vectorstore = await _library(owner=source) # e.g. copied earlier: the source keeps its points
+        await save_paper_metadata(source, {PAPER: dict(ENTRY)})
+        await save_paper_metadata(target, {PAPER: dict(ENTRY)})
+        result = await transfer_papers(source, target, vectorstore, [PAPER], move=True)
+        return result, await load_paper_metadata(source)
+
+    result, source_metadata = asyncio.run(run())
+    assert not result["successful"] and PAPER in source_metadata
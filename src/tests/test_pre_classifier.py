@@ -0,0 +1,21 @@
+import asyncio
+from langchain_core.messages import HumanMessage, AIMessage
+from rag.pre_classifier import classify, pre_classify
+
+def test_small_talk_and_explicit_ids():
+    assert classify("thanks a lot!", has_history=True)[0] == "casual"
+    assert classify("Summarize 2401.00001", has_history=False) == ("research", "arxiv_id")
+    assert classify("how does it compare with 2401.00001?", has_history=True)[0] == "none"
+
+def test_arxiv_id_route_drops_the_previous_summary():
+    state = {
+        "messages": [
+            HumanMessage(content="What is RLHF?"),
+            AIMessage(content="Reinforcement learning from human feedback ..."),
+            HumanMessage(content="Summarize 2401.00001"),
+        ],
+        "conversationSummary": "The user asked about RLHF.",
+    }
+    update = asyncio.run(pre_classify(state))
+    assert update["fastPath"] == "research"
+    assert update["conversationSummary"] == ""
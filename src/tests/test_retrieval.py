@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+from qdrant_client import AsyncQdrantClient, models
+from core.schemas import DEFAULT_RETRIEVAL_SETTINGS
+from rag.retrieval import coarse_to_fine, unindexed_papers
+from rag.retrieval_budget import plan_budget
+
+COLLECTION = "test_retrieval"
+USER = "alice"
+
+def _point(pid: int, vector, paper_id: str, **metadata) -> models.PointStruct:
+    return models.PointStruct(id=pid, vector=vector, payload={"metadata": {"user_id": USER, "paper_id": paper_id, **metadata}})
+
+async def _mixed_library() -> SimpleNamespace:
+    """One paper indexed with paper/section vectors, one legacy paper with chunks only."""
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE))
+    await client.upsert(COLLECTION, points=[
+        _point(1, [1, 0, 0, 0], "2401.00001", level="paper"),
+        _point(2, [1, 0, 0, 0], "2401.00001", level="section", section="Introduction"),
+        _point(3, [1, 0.2, 0, 0], "2401.00001", level="chunk", section="Introduction"),
+        _point(4, [0, 1, 0, 0], "1901.00002"), # legacy chunk: no level
+    ])
+    return SimpleNamespace(client=client, collection_name=COLLECTION)
+
+METADATA = {
+    "2401.00001": {"total_chunks": 1, "num_vectors": 3},
+    "1901.00002": {"total_chunks": 1},
+}
+
+def test_unindexed_papers():
+    assert unindexed_papers(METADATA) == ["1901.00002"]
+    assert unindexed_papers({"2401.00001": {"total_chunks": 4, "num_vectors": 4}}) == ["2401.00001"]
+
+def test_unscoped_query_reaches_legacy_papers():
+    async def run():
+        vectorstore = await _mixed_library()
+        budget = plan_budget("multiple", 0, DEFAULT_RETRIEVAL_SETTINGS)
+        return await coarse_to_fine(vectorstore, [0.6, 1, 0, 0], USER, [], budget, METADATA)
+
+    groups = asyncio.run(run())
+    papers = [hit.payload["metadata"]["paper_id"] for group in groups for hit in group]
+    assert papers[0] == "1901.00002" # legacy chunk scores best
+    assert "2401.00001" in papers
+
+def test_scoped_query_ignores_other_papers():
+    async def run():
+        vectorstore = await _mixed_library()
+        budget = plan_budget("single", 1, DEFAULT_RETRIEVAL_SETTINGS)
+        return await coarse_to_fine(vectorstore, [1, 1, 0, 0], USER, ["2401.00001"], budget, METADATA)
+
+    groups = asyncio.run(run())
+    assert {hit.payload["metadata"]["paper_id"] for group in groups for hit in group} == {"2401.00001"}
@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from qdrant_client import AsyncQdrantClient, models
+from ingestion import paperingestion, snapshots
+from ingestion.paperingestion import load_paper_metadata, save_paper_metadata
+
+COLLECTION = "test_snapshots"
+
+def _point(pid, vector, user_id: str, paper_id: str, index: int) -> models.PointStruct:
+    metadata = {"user_id": user_id, "paper_id": paper_id, "doc_key": f"{paper_id}-key", "chunk_index": index}
+    return models.PointStruct(id=pid, vector=vector, payload={"page_content": f"chunk {index}", "metadata": metadata})
+
+def test_restore_replaces_stale_points(tmp_path, monkeypatch):
+    monkeypatch.setattr(paperingestion, "BASE_USER_DATA_DIR", tmp_path / "user_data")
+    monkeypatch.setattr(snapshots, "EMBEDDING_MODEL", "test-model")
+    user = f"restore-{uuid.uuid4().hex[:8]}"
+    paper = "2401.00001"
+
+    async def run():
+        client = AsyncQdrantClient(location=":memory:")
+        await client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE))
+        vectorstore = SimpleNamespace(client=client, collection_name=COLLECTION)
+        await client.upsert(COLLECTION, points=[_point(str(uuid.uuid4()), [1, i, 0, 0], user, paper, i) for i in range(1, 3)])
+        await save_paper_metadata(user, {paper: {"total_chunks": 2, "num_vectors": 2}})
+        await snapshots.export_library(user, vectorstore, tmp_path / "snapshot")
+
+        # Re-ingested since the export: a stale point the snapshot does not overwrite
+        await client.upsert(COLLECTION, points=[_point(str(uuid.uuid4()), [0, 0, 1, 0], user, paper, 3)])
+        await snapshots.import_library(tmp_path / "snapshot", vectorstore)
+        points = (await client.count(COLLECTION, exact=True)).count
+        return points, await load_paper_metadata(user)
+
+    points, metadata = asyncio.run(run())
+    assert points == 2
+    assert list(metadata) == ["2401.00001"]
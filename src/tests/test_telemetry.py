@@ -0,0 +1,7 @@
+from core.telemetry import MetricsRegistry
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("arxivhub_errors_total", error='bad "quote" \\ and\nnewline')
+    line = registry.render_prometheus().splitlines()[1]
+    assert line == 'arxivhub_errors_total{error="bad \\"quote\\" \\\\ and\\nnewline"} 1.0'
@@ -1,16 +1,30 @@
 from .utils import (
     get_ingested_papers,
     prepare_dataset_samples,
+    render_inventory,
+    search_papers,
+    change_inventory_page,
     open_paper_detail_from_dataset, 
     back_to_main, 
     submit_papers, 
-    save_paper_notes
+    save_paper_notes,
+    handle_delete_paper,
+    submit_library_job,
+    poll_jobs,
+    INVENTORY_PAGE_SIZE
 )
 
 __all__ = [
     "get_ingested_papers", 
     "prepare_dataset_samples",
+    "render_inventory",
+    "search_papers",
+    "change_inventory_page",
     "back_to_main",
     "submit_papers",
-    "save_paper_notes"
+    "save_paper_notes",
+    "handle_delete_paper",
+    "submit_library_job",
+    "poll_jobs",
+    "INVENTORY_PAGE_SIZE"
 ]
\ No newline at end of file
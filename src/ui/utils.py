@@ -1,8 +1,19 @@
-import re
+import time
+import asyncio
 import gradio as gr
 from typing import List, Dict, Any, Tuple
 from config import get_vectorstore
-from ingestion import ingest_papers, save_notes, delete_paper
+from ingestion import save_notes, delete_papers, parse_ids, load_paper_metadata, inventories, metadata_cache, library_stats, user_exists
+from ingestion.jobs import job_queue
+
+# Finished jobs stay visible in the sidebar status for this long (seconds)
+JOB_STATUS_TTL = 60
+# Papers per sidebar page (only the current page is sent to the browser)
+INVENTORY_PAGE_SIZE = 10
+# Keystrokes closer together than this run a single search
+SEARCH_DEBOUNCE_S = 0.3
+# Latest search query per user (older pending searches are skipped)
+_latest_search: Dict[str, str] = {}
 
 def get_ingested_papers(user_paper_metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
     papers = []
@@ -27,15 +38,55 @@ def prepare_dataset_samples(user_paper_metadata: Dict[str, Any]) -> Tuple[List[L
     
     for p in papers:
         # Format: [display_text, paper_id]
-        display = f"{p['Title'][:60]}... • {p['Year']}" if len(p['Title']) > 60 else f"{p['Title']} • {p['Year']}"
-        samples.append([display])
+        samples.append([paper_label(p['Title'], p['Year'])])
         paper_ids.append(p['id'])
     
     return samples, paper_ids
 
-def open_paper_detail_from_dataset(
+def paper_label(title: str, year: str) -> str:
+    return f"{title[:60]}... • {year}" if len(title) > 60 else f"{title} • {year}"
+
+def render_inventory(
+    user_id: str,
+    user_paper_metadata: Dict[str, Any],
+    query: str = "",
+    page: int = 0
+    ) -> Tuple[Any, List[str], int, str]:
+    """One sidebar page from the user's inventory index: (dataset update, paper ids, page, page label)."""
+    index = inventories.get(user_id, user_paper_metadata)
+    page = max(page, 0)
+    entries, total = index.page(page, INVENTORY_PAGE_SIZE, query)
+    if not entries and page > 0:
+        # Past the end (e.g. after deletions or a narrower search): show the last page
+        page = max(0, (total - 1) // INVENTORY_PAGE_SIZE)
+        entries, total = index.page(page, INVENTORY_PAGE_SIZE, query)
+
+    samples = [[paper_label(e.title, e.year)] for e in entries]
+    empty = "No matching papers" if query.strip() else "No papers yet"
+    num_pages = max(1, -(-total // INVENTORY_PAGE_SIZE))
+    # Library badge from the cached stats (no Qdrant count per render)
+    stats = library_stats.get(user_id, user_paper_metadata)
+    label = f"Page {page + 1}/{num_pages} • {total} paper(s) • {stats.vectors:,} vectors"
+    return gr.update(samples=samples or [[empty]]), [e.paper_id for e in entries], page, label
+
+async def search_papers(user_id: str, query: str) -> Tuple[Any, ...]:
+    """Debounced sidebar search: only the last query typed within SEARCH_DEBOUNCE_S is run."""
+    if not user_id:
+        return gr.update(), gr.update(), gr.update(), gr.update()
+    _latest_search[user_id] = query
+    await asyncio.sleep(SEARCH_DEBOUNCE_S)
+    if _latest_search.get(user_id) != query:
+        return gr.update(), gr.update(), gr.update(), gr.update()
+    return render_inventory(user_id, await load_paper_metadata(user_id), query, 0)
+
+async def change_inventory_page(user_id: str, query: str, page: int, step: int) -> Tuple[Any, ...]:
+    if not user_id:
+        return gr.update(), gr.update(), gr.update(), gr.update()
+    return render_inventory(user_id, await load_paper_metadata(user_id), query, page + step)
+
+async def open_paper_detail_from_dataset(
     evt: gr.SelectData, 
-    user_paper_metadata: Dict[str, Any], 
+    user_id: str, 
     paper_ids_list: List[str]
     ) -> Tuple[Any, ...]:    
     """Handle paper selection from dataset"""
@@ -44,7 +95,7 @@ def open_paper_detail_from_dataset(
         return None, gr.update(visible=True), gr.update(visible=False), "", "", gr.update(), ""
     
     paper_id = paper_ids_list[selected_idx]
-    metadata = user_paper_metadata.get(paper_id, {})
+    metadata = (await load_paper_metadata(user_id)).get(paper_id, {})
     
     if not metadata:
         return None, gr.update(visible=True), gr.update(visible=False), "", "", gr.update(), ""
@@ -65,32 +116,14 @@ def open_paper_detail_from_dataset(
 def back_to_main():
     return 'main_chat', gr.update(visible=True), gr.update(visible=False), "", "", gr.update(), gr.update()
 
-def validate_arxiv_id(arxiv_id: str) -> bool:
-    pattern = r'^(\d{4}\.\d{4,5}(v\d+)?|[a-z]+(-[a-z]+)*/\d{7}(v\d+)?)$'
-    return bool(re.match(pattern, arxiv_id))
-
-def parse_ids(text: str) -> Tuple[List[str], List[str]]:
-    if not text:
-        return [], []
-    raw = re.split(r"[,\n\s]+", text)
-    all_entries = [entry.strip(" '\"") for entry in raw if entry.strip(" '\"")]
-    valid_ids, invalid_entries = [], []
-    for entry in all_entries:
-        if validate_arxiv_id(entry):
-            valid_ids.append(entry)
-        else:
-            invalid_entries.append(entry)
-    return valid_ids, invalid_entries
-
 async def submit_papers(
     user_id: str, 
-    user_paper_metadata: Dict[str, Any],
     text_input: str
-    ) -> Tuple[str, Any, Any, List[str], Dict]:
+    ) -> Tuple[str, Any, Any, List[str]]:
 
     valid_ids, invalid_entries = parse_ids(text_input)
     if not valid_ids and not invalid_entries:
-        return "Please enter at least one ArXiv ID", gr.update(value=""), gr.update(), gr.update(), user_paper_metadata
+        return "Please enter at least one ArXiv ID", gr.update(value=""), gr.update(), gr.update()
     
     validation_message = ""
     if invalid_entries:
@@ -103,32 +136,77 @@ async def submit_papers(
         validation_message += "\n\n"
     
     if not valid_ids:
-        return validation_message + "No valid arXiv IDs to process.", gr.update(value=""), gr.update(), gr.update(), user_paper_metadata
+        return validation_message + "No valid arXiv IDs to process.", gr.update(value=""), gr.update(), gr.update()
     
-    ArxivHubVectorstore = await get_vectorstore()
-    unique_ids = list(set(valid_ids))
-    result = await ingest_papers(user_id, user_paper_metadata, ArxivHubVectorstore ,unique_ids)
+    unique_ids = list(dict.fromkeys(valid_ids))
+    # Ingestion runs as a background job: progress is streamed to the sidebar by poll_jobs
+    job = await job_queue.submit(user_id, "ingest", unique_ids)
     
     clear_input = gr.update(value="")
-    final_message = validation_message + result.get('message', "Ingestion completed.")
-    
-    # Update dataset
-    new_samples, new_ids = prepare_dataset_samples(user_paper_metadata)
+    final_message = validation_message + f"📋 Queued {len(job.paper_ids)} paper(s) for ingestion. Progress is shown in the sidebar; you can keep chatting."
     
-    return final_message, clear_input, gr.update(samples=new_samples), new_ids, user_paper_metadata
+    return final_message, clear_input, gr.update(), gr.update()
+
+async def poll_jobs(user_id: str, seen_version: int, query: str, page: int) -> Tuple[Any, ...]:
+    """
+    Timer callback: render the user's job progress and refresh the current
+    inventory page whenever the user's library changed (jobs, other tabs).
+    """
+    unchanged = (gr.update(), gr.update(), gr.update(), gr.update())
+    if not user_id:
+        return ("", *unchanged, seen_version)
+    now = time.time()
+    jobs = job_queue.jobs_for(user_id)
+    visible = [j for j in jobs if j.active or (j.finished_at or 0) > now - JOB_STATUS_TTL]
+    status = "\n\n".join(j.describe() for j in visible)
+    library_stats.schedule_drift_check(user_id, await get_vectorstore())
 
-async def save_paper_notes(user_id: str, user_paper_metadata: Dict[str, Any], paper_id: str, notes: str):
-    await save_notes(user_id, user_paper_metadata, paper_id, notes)
+    version = metadata_cache.version(user_id)
+    if version == seen_version:
+        return (status, *unchanged, seen_version)
+    # The inventory index was updated incrementally by the writer: only the page is rendered
+    dataset, ids, page, label = render_inventory(user_id, await load_paper_metadata(user_id), query, page)
+    return status, dataset, ids, page, label, version
+
+async def save_paper_notes(user_id: str, paper_id: str, notes: str):
+    await save_notes(user_id, await load_paper_metadata(user_id), paper_id, notes)
     return "Notes saved successfully!"
 
-async def handle_delete_paper(user_id: str, user_paper_metadata: Dict[str, Any], paper_id: str):
+async def handle_delete_paper(user_id: str, paper_id: str) -> Tuple[Any, ...]:
+    """Delete the paper open in the detail view and return to the main chat (the sidebar refreshes on the next poll)."""
     if not paper_id or paper_id == 'main_chat':
-        return "Select a paper first", gr.update()
-    
+        return "Select a paper first", gr.update(), gr.update(), gr.update()
+
     ArxivHubVectorstore = await get_vectorstore()
-    success = await delete_paper(user_id, user_paper_metadata, ArxivHubVectorstore, paper_id)
-    
-    if success:
-        new_samples, new_ids = prepare_dataset_samples(user_paper_metadata)
-        return "🗑️ Paper deleted", gr.update(samples=new_samples), new_ids, 'main_chat'
-    return "❌ Delete failed", gr.update(), gr.update(), gr.update()
\ No newline at end of file
+    user_paper_metadata = await load_paper_metadata(user_id)
+    result = await delete_papers(user_id, user_paper_metadata, ArxivHubVectorstore, [paper_id])
+
+    if result["successful"]:
+        return "🗑️ Paper deleted", 'main_chat', gr.update(visible=True), gr.update(visible=False)
+    return "❌ Delete failed", gr.update(), gr.update(), gr.update()
+
+async def submit_library_job(user_id: str, ids_text: str, target_user: str, action: str) -> str:
+    """
+    Queue a bulk library operation ("delete", "clear", "move" or "copy") on the
+    papers listed in `ids_text` (ignored by "clear"); progress shows in the sidebar.
+    """
+    if action == "clear":
+        paper_ids = list(await load_paper_metadata(user_id))
+        if not paper_ids:
+            return "Your library is already empty."
+    else:
+        paper_ids, _ = parse_ids(ids_text)
+        if not paper_ids:
+            return "Please enter at least one ArXiv ID"
+    target_user = (target_user or "").strip() or None
+    if action in ("move", "copy"):
+        if not target_user:
+            return "Please enter the user to move or copy the papers to"
+        if target_user == user_id:
+            return "Papers are already in your library"
+        # The ID becomes a directory under user_data and a payload value: only existing, well-formed users
+        if not await user_exists(target_user):
+            return f"Unknown user: {target_user}"
+
+    job = await job_queue.submit(user_id, action, paper_ids, target_user_id=target_user)
+    return f"{job.describe()}. Progress is shown in the sidebar."